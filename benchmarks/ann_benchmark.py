@@ -0,0 +1,92 @@
+"""
+Recall@k vs latency benchmark of the IVF index against exact (flat) search.
+
+Runs on a synthetic clustered corpus by default, or on a persisted index built
+from the real Law embeddings (`--index data/index/law_vectors.npz`).
+
+Usage:
+    python -m benchmarks.ann_benchmark --rows 100000 --dim 768 --nprobe 1 2 4 8 16 32
+"""
+
+import argparse
+import json
+import time
+import numpy as np
+from src.retriever.ann_index import IVFIndex
+from src.retriever.vector_index import FlatIndex, load_index
+
+def synthetic_vectors(rows, dim, clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    return centers[labels] + 2.0 * rng.standard_normal((rows, dim)).astype(np.float32)
+
+def measure(search, queries, top_k):
+    latencies, results = [], []
+    for query in queries:
+        start = time.perf_counter()
+        results.append([number for _, number, _ in search(query, top_k)])
+        latencies.append((time.perf_counter() - start) * 1000)
+    return results, np.asarray(latencies)
+
+def recall_at_k(truth, results):
+    hits = sum(len(set(expected) & set(found)) for expected, found in zip(truth, results))
+    return hits / max(sum(len(expected) for expected in truth), 1)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--index", help="Persisted vector index to benchmark instead of synthetic data")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=0, help="0 picks about sqrt(rows)")
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.index:
+        source = load_index(args.index)
+        if source is None:
+            parser.error(f"No index found at {args.index}")
+        vectors = np.asarray(source.vectors)
+    else:
+        vectors = synthetic_vectors(args.rows, args.dim, args.clusters)
+    ids = [str(i) for i in range(len(vectors))]
+    texts = [""] * len(vectors)
+
+    rng = np.random.default_rng(1)
+    sample = vectors[rng.choice(len(vectors), size=args.queries)]
+    queries = sample + 0.1 * rng.standard_normal(sample.shape).astype(np.float32)
+
+    flat = FlatIndex(ids, texts, vectors)
+    start = time.perf_counter()
+    ivf = IVFIndex(ids, texts, vectors, nlist=args.nlist)
+    build_seconds = time.perf_counter() - start
+
+    truth, exact_latency = measure(flat.search, queries, args.top_k)
+    rows = [{
+        "engine": "flat", "nprobe": None, "recall": 1.0,
+        "p50_ms": float(np.percentile(exact_latency, 50)), "p99_ms": float(np.percentile(exact_latency, 99)),
+    }]
+    for nprobe in args.nprobe:
+        results, latency = measure(lambda q, k: ivf.search(q, k, nprobe=nprobe), queries, args.top_k)
+        rows.append({
+            "engine": "ivf", "nprobe": nprobe, "recall": recall_at_k(truth, results),
+            "p50_ms": float(np.percentile(latency, 50)), "p99_ms": float(np.percentile(latency, 99)),
+        })
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(ivf.centroids)} lists "
+          f"(trained in {build_seconds:.1f}s), recall@{args.top_k} over {args.queries} queries")
+    print(f"{'engine':<8}{'nprobe':>8}{'recall':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for row in rows:
+        nprobe = "-" if row["nprobe"] is None else row["nprobe"]
+        print(f"{row['engine']:<8}{nprobe:>8}{row['recall']:>10.3f}{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"rows": len(vectors), "dim": int(vectors.shape[1]), "top_k": args.top_k, "results": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
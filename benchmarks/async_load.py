@@ -0,0 +1,74 @@
+"""
+Load test for the async retrieval service against a stub Ollama server.
+
+Simulates many concurrent users issuing queries (with repeats, so coalescing
+kicks in) against a synthetic in-process index and reports throughput, latency
+percentiles and how many embedding calls reached the model server.
+
+Usage:
+    python -m benchmarks.async_load --users 64 --requests 20 --delay-ms 20
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import numpy as np
+from benchmarks.stub_ollama import run_stub_server
+from src.retriever.async_service import AsyncRetrievalService
+from src.retriever.embedding_cache import EmbeddingCache
+from src.retriever.vector_index import FlatIndex
+
+async def run_load(service, queries, users, requests_per_user, seed=0):
+    rng = np.random.default_rng(seed)
+    latencies = []
+
+    async def user(user_id):
+        picks = rng.integers(0, len(queries), size=requests_per_user)
+        for pick in picks:
+            started = time.perf_counter()
+            await service.retrieve(queries[pick], top_k=5)
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(users)))
+    return np.asarray(latencies), time.perf_counter() - started
+
+async def main_async(args):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.rows, args.dim)).astype(np.float32)
+    index = FlatIndex([str(i) for i in range(args.rows)], [""] * args.rows, vectors)
+    queries = [f"question {i}" for i in range(args.distinct_queries)]
+
+    with run_stub_server(dim=args.dim, delay_ms=args.delay_ms) as (base_url, calls):
+        # No embedding cache hits, so every distinct query really needs the model
+        cache = EmbeddingCache(path=None, max_memory_items=0)
+        async with AsyncRetrievalService(
+            index=index, cache=cache, embed_url=f"{base_url}/api/embed",
+            batch_window_ms=args.window_ms, max_batch_size=args.max_batch,
+        ) as service:
+            latencies, elapsed = await run_load(service, queries, args.users, args.requests)
+        stats = service.stats
+
+    total = len(latencies)
+    print(f"{total} requests from {args.users} users in {elapsed:.2f}s -> {total / elapsed:.0f} req/s")
+    print(f"latency ms: p50 {np.percentile(latencies, 50):.1f}  p95 {np.percentile(latencies, 95):.1f}  "
+          f"p99 {np.percentile(latencies, 99):.1f}")
+    print(f"coalesced requests: {stats['coalesced']}, model calls: {len(calls)} "
+          f"for {stats['embedded_texts']} texts (avg batch {stats['embedded_texts'] / max(len(calls), 1):.1f})")
+
+def main():
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--users", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=20, help="Requests per user")
+    parser.add_argument("--distinct-queries", type=int, default=200)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--delay-ms", type=float, default=20.0, help="Simulated model latency per call")
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-batch", type=int, default=32)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
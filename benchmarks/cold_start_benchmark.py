@@ -0,0 +1,107 @@
+"""
+Cold start benchmark: time for a fresh retriever process to answer its first query.
+
+Each method runs in its own Python process on the same synthetic corpus:
+
+- rebuild: building the index from embedding records, as a process does after
+  pulling every embedding from Neo4j (network transfer not included);
+- npz: loading the persisted index file (`VECTOR_INDEX_PATH`);
+- snapshot: memory-mapping the embedding snapshot (`EMBEDDING_SNAPSHOT_PATH`).
+
+Usage:
+    python -m benchmarks.cold_start_benchmark --rows 100000 --dim 768
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from unittest.mock import MagicMock
+import numpy as np
+from benchmarks.ann_benchmark import synthetic_vectors
+from src.retriever.snapshot import export_snapshot, load_snapshot
+from src.retriever.vector_index import FlatIndex, load_index
+
+METHODS = ("rebuild", "npz", "snapshot")
+
+def make_records(vectors):
+    return [
+        {"law_id": str(i), "l.text": f"Law {i}", "l.embedding": vector.tolist(), "embedded_at": 1}
+        for i, vector in enumerate(vectors)
+    ]
+
+def resident_mib():
+    # Current RSS; ru_maxrss would include the parent's peak carried over the fork
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+def run_child(method, directory):
+    query = np.ones(np.load(os.path.join(directory, "query.npy")).shape, dtype=np.float32)
+    if method == "rebuild":
+        records = make_records(np.load(os.path.join(directory, "vectors.npy")))
+        start = time.perf_counter()
+        index = FlatIndex()
+        index.rebuild(records)
+    elif method == "npz":
+        start = time.perf_counter()
+        index = load_index(os.path.join(directory, "index.npz"))
+    else:
+        start = time.perf_counter()
+        index = load_snapshot(os.path.join(directory, "snapshot.json"))
+    loaded = time.perf_counter() - start
+    index.search(query, 10)
+    first_query = time.perf_counter() - start
+    print(json.dumps({
+        "method": method,
+        "load_ms": loaded * 1000,
+        "first_query_ms": first_query * 1000,
+        "rss_mib": resident_mib(),
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--child", nargs=2, metavar=("METHOD", "DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(*args.child)
+        return
+
+    vectors = synthetic_vectors(args.rows, args.dim, clusters=200)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        np.save(os.path.join(directory, "vectors.npy"), vectors)
+        np.save(os.path.join(directory, "query.npy"), vectors[0])
+        FlatIndex([str(i) for i in range(len(vectors))], [f"Law {i}" for i in range(len(vectors))], vectors).save(
+            os.path.join(directory, "index.npz")
+        )
+        conn = MagicMock()
+        conn.query.return_value = make_records(vectors)
+        export_snapshot(conn, os.path.join(directory, "snapshot.json"))
+
+        for method in METHODS:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.cold_start_benchmark", "--child", method, directory],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, one fresh process per method")
+    print(f"{'method':<10}{'load ms':>10}{'1st query ms':>14}{'RSS MiB':>10}")
+    for row in results:
+        print(f"{row['method']:<10}{row['load_ms']:>10.1f}{row['first_query_ms']:>14.1f}{row['rss_mib']:>10.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"rows": len(vectors), "dim": int(vectors.shape[1]), "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Peak RSS and wall time of the python-docx parser against the streaming parser.
+
+Builds a synthetic .docx with `--paragraphs` numbered sections (a blank document
+whose word/document.xml is replaced with generated paragraphs), then parses it
+with each parser in its own Python process.
+
+Usage:
+    python -m benchmarks.docx_parse_benchmark --paragraphs 50000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import zipfile
+from xml.sax.saxutils import escape
+from docx import Document
+
+PARSERS = ("python-docx", "streaming")
+
+def section_number(i):
+    # Three levels deep: 1, 1.1, 1.1.1, ... like a consolidated code
+    return f"{i // 100 + 1}.{i // 10 % 10 + 1}.{i % 10 + 1}"
+
+def write_synthetic_docx(path, paragraphs):
+    with tempfile.TemporaryDirectory() as tmp:
+        template = os.path.join(tmp, "template.docx")
+        Document().save(template)
+        with zipfile.ZipFile(template) as source, zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as target:
+            for item in source.infolist():
+                if item.filename != "word/document.xml":
+                    target.writestr(item, source.read(item.filename))
+            with target.open("word/document.xml", "w") as xml:
+                xml.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                          b'<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                          b'<w:body>')
+                for i in range(paragraphs):
+                    text = escape(f"{section_number(i)}. The provisions of this section apply to case {i} "
+                                  f"as read with section {section_number(i // 2)} of this Ordinance.")
+                    xml.write(f'<w:p><w:r><w:t xml:space="preserve">{text}</w:t></w:r></w:p>'.encode("utf-8"))
+                xml.write(b'<w:sectPr/></w:body></w:document>')
+
+def peak_rss_mib():
+    # VmHWM is reset by exec, unlike ru_maxrss which keeps the parent's peak
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+def run_child(parser, path):
+    from src.database.import_laws_to_neo4j import parse_docx, parse_docx_streaming
+    baseline = peak_rss_mib()
+    start = time.perf_counter()
+    if parser == "streaming":
+        sections = sum(1 for _ in parse_docx_streaming(path, os.path.basename(path)))
+    else:
+        sections = len(parse_docx(path, os.path.basename(path)))
+    print(json.dumps({
+        "parser": parser,
+        "sections": sections,
+        "seconds": time.perf_counter() - start,
+        "peak_rss_mib": peak_rss_mib(),
+        "parse_rss_mib": peak_rss_mib() - baseline,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=50000)
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--child", nargs=2, metavar=("PARSER", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        run_child(*args.child)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "Synthetic_2024_Benchmark.docx")
+        write_synthetic_docx(path, args.paragraphs)
+        size_mib = os.path.getsize(path) / 2**20
+        for name in PARSERS:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.docx_parse_benchmark", "--child", name, path],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{args.paragraphs} paragraphs ({size_mib:.1f} MiB .docx), one fresh process per parser")
+    print(f"{'parser':<13}{'sections':>10}{'seconds':>10}{'peak RSS MiB':>14}{'parse MiB':>11}")
+    for row in results:
+        print(f"{row['parser']:<13}{row['sections']:>10}{row['seconds']:>10.2f}"
+              f"{row['peak_rss_mib']:>14.1f}{row['parse_rss_mib']:>11.1f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"paragraphs": args.paragraphs, "results": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+Memory and recall@k benchmark of the quantized (fp16 / int8) indexes against exact search.
+
+Runs on a synthetic clustered corpus by default, or on a persisted index built
+from the real Law embeddings (`--index data/index/law_vectors.npz`).
+
+Usage:
+    python -m benchmarks.quantization_benchmark --rows 100000 --dim 768 --rescore 0 1 4 16
+"""
+
+import argparse
+import json
+import numpy as np
+from benchmarks.ann_benchmark import synthetic_vectors, measure, recall_at_k
+from src.retriever.quantized_index import Float16Index, Int8Index
+from src.retriever.vector_index import FlatIndex, load_index
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--index", help="Persisted vector index to benchmark instead of synthetic data")
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--rescore", type=int, nargs="+", default=[0, 1, 2, 4, 8],
+                        help="Rescore factors to try; 0 ranks by the quantized scores alone")
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    args = parser.parse_args()
+
+    if args.index:
+        source = load_index(args.index)
+        if source is None:
+            parser.error(f"No index found at {args.index}")
+        vectors = np.asarray(source.vectors, dtype=np.float32)
+    else:
+        vectors = synthetic_vectors(args.rows, args.dim, args.clusters)
+    ids = [str(i) for i in range(len(vectors))]
+    texts = [""] * len(vectors)
+
+    rng = np.random.default_rng(1)
+    sample = vectors[rng.choice(len(vectors), size=args.queries)]
+    queries = sample + 0.1 * rng.standard_normal(sample.shape).astype(np.float32)
+
+    flat = FlatIndex(ids, texts, vectors)
+    truth, exact_latency = measure(flat.search, queries, args.top_k)
+    rows = [{
+        "engine": "flat", "rescore": None, "recall": 1.0, "bytes": int(flat.vectors.nbytes),
+        "p50_ms": float(np.percentile(exact_latency, 50)), "p99_ms": float(np.percentile(exact_latency, 99)),
+    }]
+    for index in (Float16Index(ids, texts, vectors), Int8Index(ids, texts, vectors)):
+        # Codes and scales; the full-precision rows stay in the memory-mapped scratch file
+        memory = index.memory_usage()["resident_bytes"]
+        for factor in args.rescore:
+            results, latency = measure(lambda q, k: index.search(q, k, rescore_factor=factor), queries, args.top_k)
+            rows.append({
+                "engine": index.backend, "rescore": factor, "recall": recall_at_k(truth, results), "bytes": int(memory),
+                "p50_ms": float(np.percentile(latency, 50)), "p99_ms": float(np.percentile(latency, 99)),
+            })
+
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, recall@{args.top_k} over {args.queries} queries")
+    print(f"{'engine':<8}{'rescore':>8}{'MiB':>10}{'saved':>8}{'recall':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for row in rows:
+        rescore = "-" if row["rescore"] is None else row["rescore"]
+        saved = 1 - row["bytes"] / rows[0]["bytes"]
+        print(f"{row['engine']:<8}{rescore:>8}{row['bytes'] / 2**20:>10.1f}{saved:>8.0%}"
+              f"{row['recall']:>10.3f}{row['p50_ms']:>10.3f}{row['p99_ms']:>10.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"rows": len(vectors), "dim": int(vectors.shape[1]), "top_k": args.top_k, "results": rows}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Retrieval benchmark and regression check on synthetic statute corpora.
+
+For each corpus size, every engine answers the same queries through
+`retrieve_similar_laws` (local mode), with Neo4j replaced by an in-memory
+FakeNeo4jConnection and Ollama by a stub embedder, so only retrieval is timed:
+
+- scan: no local index, every query scans the Law nodes returned by Neo4j
+  (skipped above `--scan-max-sections`, it is O(n) Python per query);
+- flat, ivf, fp16, int8: the local index backends, built from the embedding
+  records as `build_index` does.
+
+Reports build time, QPS, p50/p95/p99 latency, index memory, process RSS and
+recall@k against exact search. `--json` writes the results for CI, and
+`--baseline` compares them with an earlier run and exits non-zero on a
+recall, latency or memory regression.
+
+Usage:
+    python -m benchmarks.retrieval_benchmark --sections 1000 10000 100000 --json results.json
+    python -m benchmarks.retrieval_benchmark --sections 1000 10000 --baseline results.json
+"""
+
+import argparse
+import json
+import sys
+import time
+from unittest.mock import patch
+import numpy as np
+from benchmarks.cold_start_benchmark import resident_mib
+from benchmarks.synthetic_corpus import generate_corpus, exact_top_k, FakeNeo4jConnection, CorpusEmbedder
+from src.retriever import backend_retriever
+from src.retriever.semantic_cache import SemanticCache
+from src.retriever.vector_index import build_index
+
+ENGINES = ("scan", "flat", "ivf", "fp16", "int8")
+
+# Every query is searched; reusing a neighbour's results would skew recall and latency
+NO_CACHE = SemanticCache(max_items=0)
+
+def index_bytes(index):
+    arrays = [index.vectors, *index._extra_arrays().values()]
+    return int(sum(array.nbytes for array in arrays if not isinstance(array, np.memmap)))
+
+def make_queries(corpus, count, noise=0.5, seed=1):
+    # Each query is a random section plus noise of norm about `noise`
+    rng = np.random.default_rng(seed)
+    sample = corpus.vectors[rng.choice(len(corpus), size=count)]
+    vectors = sample + noise * rng.standard_normal(sample.shape).astype(np.float32) / np.sqrt(sample.shape[1])
+    return {f"benchmark query {i}": vector for i, vector in enumerate(vectors)}
+
+def run_engine(engine, corpus, queries, truth, top_k):
+    """
+    Times `retrieve_similar_laws` for every query with the given engine.
+
+    Returns:
+        dict: One result row (engine, build time, latency, QPS, memory and recall).
+    """
+    conn = FakeNeo4jConnection(corpus)
+    start = time.perf_counter()
+    index = None if engine == "scan" else build_index(conn, engine)
+    build_seconds = time.perf_counter() - start
+
+    embedder = CorpusEmbedder(queries, corpus.vectors.shape[1])
+    latencies, found = [], []
+    with patch.multiple(backend_retriever, get_embedding=embedder, get_vector_index=lambda: index,
+                        Neo4jConnection=lambda: conn):
+        wall_start = time.perf_counter()
+        for text in queries:
+            start = time.perf_counter()
+            results = backend_retriever.retrieve_similar_laws(text, top_k, mode="local", semantic_cache=NO_CACHE)
+            latencies.append((time.perf_counter() - start) * 1000)
+            found.append([law_id for _, law_id, _ in results])
+        wall_seconds = time.perf_counter() - wall_start
+
+    hits = sum(len(set(expected) & set(ids)) for expected, ids in zip(truth, found))
+    latencies = np.asarray(latencies)
+    return {
+        "engine": engine,
+        "sections": len(corpus),
+        "queries": len(queries),
+        "build_s": build_seconds,
+        "qps": len(queries) / wall_seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "index_bytes": index_bytes(index) if index is not None else 0,
+        "rss_mib": resident_mib(),
+        "recall": hits / max(sum(len(expected) for expected in truth), 1),
+    }
+
+def run_benchmark(sections, dim=768, queries=200, top_k=10, engines=ENGINES, scan_max_sections=20000,
+                  scan_queries=20, seed=0):
+    """
+    Runs every engine on a synthetic corpus of each size.
+
+    Returns:
+        dict: Benchmark parameters and one result row per (sections, engine).
+    """
+    results = []
+    for size in sections:
+        corpus = generate_corpus(size, dim, seed=seed)
+        all_queries = make_queries(corpus, queries, seed=seed + 1)
+        truth_rows = exact_top_k(corpus.vectors, np.asarray(list(all_queries.values())), top_k)
+        truth = [[corpus.ids[row] for row in rows] for rows in truth_rows]
+        for engine in engines:
+            engine_queries, engine_truth = all_queries, truth
+            if engine == "scan":
+                if size > scan_max_sections:
+                    continue
+                engine_queries = dict(list(all_queries.items())[:scan_queries])
+                engine_truth = truth[:scan_queries]
+            row = run_engine(engine, corpus, engine_queries, engine_truth, top_k)
+            results.append(row)
+            print(f"{size:>9}{engine:>7}{row['build_s']:>9.2f}{row['qps']:>10.1f}{row['p50_ms']:>9.2f}"
+                  f"{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}{row['index_bytes'] / 2**20:>10.1f}"
+                  f"{row['rss_mib']:>9.0f}{row['recall']:>8.3f}", flush=True)
+    return {"benchmark": "retrieval", "dim": dim, "top_k": top_k, "seed": seed, "results": results}
+
+def find_regressions(baseline, current, recall_tolerance=0.01, latency_tolerance=0.25, memory_tolerance=0.1):
+    """
+    Compares two benchmark runs row by row (same corpus size and engine).
+
+    Returns:
+        list: A message per regressed metric; empty when nothing regressed.
+    """
+    previous = {(row["sections"], row["engine"]): row for row in baseline["results"]}
+    regressions = []
+    for row in current["results"]:
+        before = previous.get((row["sections"], row["engine"]))
+        if before is None:
+            continue
+        name = f"{row['engine']} @ {row['sections']} sections"
+        if row["recall"] < before["recall"] - recall_tolerance:
+            regressions.append(f"{name}: recall {before['recall']:.3f} -> {row['recall']:.3f}")
+        if row["p95_ms"] > before["p95_ms"] * (1 + latency_tolerance):
+            regressions.append(f"{name}: p95 {before['p95_ms']:.2f} ms -> {row['p95_ms']:.2f} ms")
+        if row["index_bytes"] > before["index_bytes"] * (1 + memory_tolerance):
+            regressions.append(f"{name}: index {before['index_bytes']} B -> {row['index_bytes']} B")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sections", type=int, nargs="+", default=[1000, 10000, 100000],
+                        help="Corpus sizes to benchmark (up to 1000000)")
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--scan-max-sections", type=int, default=20000)
+    parser.add_argument("--scan-queries", type=int, default=20, help="Queries timed for the scan engine")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Earlier --json output to check for regressions")
+    parser.add_argument("--recall-tolerance", type=float, default=0.01)
+    parser.add_argument("--latency-tolerance", type=float, default=0.25, help="Allowed relative p95 increase")
+    parser.add_argument("--memory-tolerance", type=float, default=0.1, help="Allowed relative index size increase")
+    args = parser.parse_args()
+
+    print(f"{args.dim} dims, recall@{args.top_k} over {args.queries} queries")
+    print(f"{'sections':>9}{'engine':>7}{'build s':>9}{'QPS':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          f"{'idx MiB':>10}{'RSS MiB':>9}{'recall':>8}")
+    report = run_benchmark(args.sections, args.dim, args.queries, args.top_k, args.engines,
+                           args.scan_max_sections, args.scan_queries, args.seed)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(baseline, report, args.recall_tolerance, args.latency_tolerance,
+                                       args.memory_tolerance)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("✅ No regression against the baseline.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Local stand-in for the Ollama HTTP API, for tests and benchmarks.
+
+Embeddings are deterministic pseudo-random unit vectors derived from the text, so
+the same text always gets the same vector. An optional per-request delay mimics
+model latency.
+
+Generation streams a fixed answer as newline-delimited JSON chunks, one token
+per chunk with an optional per-token delay, like Ollama does.
+
+Endpoints:
+- POST /api/embeddings  {"model", "prompt"} -> {"embedding"}
+- POST /api/embed       {"model", "input"}  -> {"embeddings"}
+- POST /api/generate    {"model", "prompt"} -> stream of {"response", "done"}; without a prompt, loads nothing and answers {"done": true}
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+def stub_embedding(text, dim):
+    seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dim)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+class StubOllamaHandler(BaseHTTPRequestHandler):
+    dim = 64
+    delay = 0.0
+    calls = None
+    answer = "The answer is in the retrieved sections."
+    token_delay = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def do_POST(self):
+        payload = self._read_json()
+        self.calls.append((self.path, payload))
+        if self.delay:
+            time.sleep(self.delay)
+        if self.path == "/api/embeddings":
+            self._send_json({"embedding": stub_embedding(payload["prompt"], self.dim)})
+        elif self.path == "/api/embed":
+            inputs = payload["input"] if isinstance(payload["input"], list) else [payload["input"]]
+            self._send_json({"embeddings": [stub_embedding(text, self.dim) for text in inputs]})
+        elif self.path == "/api/generate":
+            if not payload.get("prompt"):
+                self._send_json({"model": payload.get("model"), "response": "", "done": True})
+            else:
+                self._stream_answer(payload["prompt"])
+        else:
+            self._send_json({"error": f"unknown endpoint {self.path}"}, status=404)
+
+    def _stream_answer(self, prompt):
+        tokens = re.findall(r"\S+\s*", self.answer)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for token in tokens:
+            if self.token_delay:
+                time.sleep(self.token_delay)
+            self.wfile.write(json.dumps({"response": token, "done": False}).encode("utf-8") + b"\n")
+            self.wfile.flush()
+        final = {"response": "", "done": True, "prompt_eval_count": len(prompt.split()), "eval_count": len(tokens)}
+        self.wfile.write(json.dumps(final).encode("utf-8") + b"\n")
+
+@contextmanager
+def run_stub_server(dim=64, delay_ms=0.0, token_delay_ms=0.0, answer=None):
+    """
+    Runs the stub server on a free local port.
+
+    Args:
+        delay_ms (float): Delay before every response (model latency, or the time to first token).
+        token_delay_ms (float): Delay before every streamed answer token.
+        answer (str): Answer streamed by `/api/generate` (default: a fixed sentence).
+
+    Yields:
+        tuple: (base_url, calls) where `calls` lists every (path, payload) received.
+    """
+    calls = []
+    attributes = {"dim": dim, "delay": delay_ms / 1000, "token_delay": token_delay_ms / 1000, "calls": calls}
+    if answer is not None:
+        attributes["answer"] = answer
+    handler = type("Handler", (StubOllamaHandler,), attributes)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}", calls
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,156 @@
+"""
+Synthetic statute corpora and an in-memory Neo4jConnection for retrieval benchmarks.
+
+Sections are numbered like a real code (chapters, sections, sub-sections) across
+several books, and their embeddings are clustered by chapter so approximate
+indexes behave as they would on real statutes. Queries are noisy copies of
+random sections, embedded by a stub that never calls Ollama.
+
+Classes:
+- SyntheticCorpus: Law ids, texts and row-normalized embeddings of a generated corpus.
+- FakeNeo4jConnection: Answers the retriever's Cypher queries from a SyntheticCorpus.
+- CorpusEmbedder: Stub embedder returning the prepared query vectors.
+
+Functions:
+- generate_corpus: Generates a corpus of a given size.
+- exact_top_k: Exact top-k rows of each query by cosine similarity (ground truth).
+"""
+
+import numpy as np
+from benchmarks.stub_ollama import stub_embedding
+from src.database.law_keys import make_law_id
+from src.retriever.vector_index import (
+    normalize_rows, EMBEDDING_ROWS_QUERY, EMBEDDING_COUNT_QUERY, EMBEDDING_CORPUS_VERSION_QUERY
+)
+from src.retriever.backend_retriever import SCAN_LAWS_QUERY
+
+WORDS = (
+    "marriage dower divorce talaq khula maintenance guardian custody inheritance succession "
+    "property contract lease mortgage gift waqf trust partnership offence penalty appeal court "
+    "notice registration council arbitration union chairman witness evidence decree petition"
+).split()
+
+# Rows generated (and scored when computing ground truth) per block
+BLOCK_SIZE = 65536
+
+class SyntheticCorpus:
+    """
+    Attributes:
+        ids (list): Law id of every section.
+        texts (list): Section texts.
+        vectors (np.ndarray): Row-normalized float32 embeddings.
+    """
+
+    def __init__(self, ids, texts, vectors):
+        self.ids = ids
+        self.texts = texts
+        self.vectors = vectors
+
+    def __len__(self):
+        return len(self.ids)
+
+def generate_corpus(sections, dim=768, books=10, sections_per_chapter=50, spread=0.8, seed=0):
+    """
+    Generates `sections` sections spread over `books` books.
+
+    Args:
+        spread (float): Norm of the noise added to the (unit) chapter center of
+            each section; larger values make chapters overlap more.
+    """
+    rng = np.random.default_rng(seed)
+    chapters = max(1, -(-sections // sections_per_chapter))
+    centers = normalize_rows(rng.standard_normal((chapters, dim)))
+    vectors = np.empty((sections, dim), dtype=np.float32)
+    for start in range(0, sections, BLOCK_SIZE):
+        rows = np.arange(start, min(start + BLOCK_SIZE, sections))
+        noise = rng.standard_normal((len(rows), dim)).astype(np.float32) / np.sqrt(dim)
+        vectors[rows] = normalize_rows(centers[rows // sections_per_chapter] + spread * noise)
+
+    ids, texts = [], []
+    chapters_per_book = max(1, -(-chapters // books))
+    for row in range(sections):
+        chapter, position = divmod(row, sections_per_chapter)
+        book = f"Book{chapter // chapters_per_book + 1}"
+        number = f"{chapter % chapters_per_book + 1}.{position // 10 + 1}.{position % 10 + 1}"
+        ids.append(make_law_id(book, "2024", "Synthetic", number))
+        words = rng.choice(WORDS, size=12)
+        texts.append(f"{number}. " + " ".join(words))
+    return SyntheticCorpus(ids, texts, vectors)
+
+def exact_top_k(vectors, queries, top_k):
+    queries = normalize_rows(queries)
+    best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+    best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+    for start in range(0, len(vectors), BLOCK_SIZE):
+        scores = queries @ vectors[start:start + BLOCK_SIZE].T
+        rows = np.broadcast_to(np.arange(start, start + scores.shape[1]), scores.shape)
+        best_scores = np.concatenate([best_scores, scores], axis=1)
+        best_rows = np.concatenate([best_rows, rows], axis=1)
+        keep = np.argsort(-best_scores, axis=1, kind="stable")[:, :top_k]
+        best_scores = np.take_along_axis(best_scores, keep, axis=1)
+        best_rows = np.take_along_axis(best_rows, keep, axis=1)
+    return best_rows
+
+class FakeNeo4jConnection:
+    """
+    In-memory stand-in for Neo4jConnection serving the retriever's read queries
+    (index build/refresh, corpus version, full scan) from a SyntheticCorpus.
+    Other queries return no records, so e.g. no server vector index is detected.
+
+    Index build records carry numpy rows instead of lists (a million sections as
+    Python floats would not fit in memory); the scan gets lists, as from the driver.
+    """
+
+    def __init__(self, corpus, embedded_at=1):
+        self.corpus = corpus
+        self.embedded_at = embedded_at
+        self.queries = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def close(self):
+        pass
+
+    def session(self):
+        return self
+
+    def query(self, query, parameters=None):
+        self.queries += 1
+        corpus = self.corpus
+        if query == EMBEDDING_ROWS_QUERY:
+            if (parameters or {}).get("since", 0) > self.embedded_at:
+                return []
+            return [
+                {"law_id": law_id, "l.text": text, "l.embedding": vector, "embedded_at": self.embedded_at}
+                for law_id, text, vector in zip(corpus.ids, corpus.texts, corpus.vectors)
+            ]
+        if query == EMBEDDING_COUNT_QUERY:
+            return [{"total": len(corpus)}]
+        if query == EMBEDDING_CORPUS_VERSION_QUERY:
+            return [{"total": len(corpus), "watermark": self.embedded_at}]
+        if query == SCAN_LAWS_QUERY:
+            return [
+                {"law_id": law_id, "l.text": text, "l.embedding": vector.tolist()}
+                for law_id, text, vector in zip(corpus.ids, corpus.texts, corpus.vectors)
+            ]
+        return []
+
+class CorpusEmbedder:
+    """
+    Stub embedder: returns the prepared vector of a benchmark query, and a
+    deterministic pseudo-random vector for any other text.
+    """
+
+    def __init__(self, queries, dim):
+        self.queries = queries
+        self.dim = dim
+        self.calls = 0
+
+    def __call__(self, text):
+        self.calls += 1
+        vector = self.queries.get(text)
+        return vector if vector is not None else stub_embedding(text, self.dim)
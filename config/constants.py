@@ -1,5 +1,6 @@
 import os
 import logging
+from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables early
@@ -18,6 +19,9 @@ def validate_env():
 
 validate_env()
 
+# Project paths
+BASE_DIR = Path(__file__).parents[1]
+
 # Neo4j configurations
 NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USER = os.getenv("NEO4J_USER")
@@ -25,4 +29,98 @@ NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 
 # OLLAMA configurations
 OLLAMA_URL = os.getenv("OLLAMA_URL")
-OLLAMA_MODEL = os.getenv("OLLAMA_MODEL")
\ No newline at end of file
+OLLAMA_MODEL = os.getenv("OLLAMA_MODEL")
+
+# Vector index configurations (optional)
+VECTOR_INDEX_PATH = os.getenv("VECTOR_INDEX_PATH", str(BASE_DIR / "data" / "index" / "law_vectors.npz"))
+VECTOR_INDEX_REFRESH_SECONDS = float(os.getenv("VECTOR_INDEX_REFRESH_SECONDS", "60"))
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "flat")
+# One index per document, so filtered queries and re-imports only touch their own documents
+VECTOR_INDEX_PARTITIONED = os.getenv("VECTOR_INDEX_PARTITIONED", "true").lower() in ("1", "true", "yes")
+
+# Approximate nearest neighbour (IVF) configurations (optional)
+IVF_NLIST = int(os.getenv("IVF_NLIST", "0"))
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "8"))
+
+# Embedding pipeline configurations (optional)
+EMBED_PAGE_SIZE = int(os.getenv("EMBED_PAGE_SIZE", "256"))
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "4"))
+
+# Embedding cache configurations (optional, set EMBEDDING_CACHE_PATH to "" for memory only)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(BASE_DIR / "data" / "cache" / "embeddings.sqlite3"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+
+# Import configurations (optional)
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "1"))
+
+# Neo4j native vector index configurations (optional, requires Neo4j 5.11+)
+NEO4J_VECTOR_INDEX = os.getenv("NEO4J_VECTOR_INDEX", "law_embedding")
+VECTOR_INDEX_DIMENSIONS = int(os.getenv("VECTOR_INDEX_DIMENSIONS", "768"))
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "local")
+
+# Neo4j driver pool configurations (optional)
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "100"))
+NEO4J_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_ACQUISITION_TIMEOUT", "60"))
+
+# Retrieval result cache configurations (optional)
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "256"))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "600"))
+
+# Async retrieval service configurations (optional)
+OLLAMA_EMBED_URL = os.getenv("OLLAMA_EMBED_URL", OLLAMA_URL.replace("/api/embeddings", "/api/embed"))
+EMBED_BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+EMBED_MAX_BATCH_SIZE = int(os.getenv("EMBED_MAX_BATCH_SIZE", "32"))
+
+# Lexical (BM25) and hybrid retrieval configurations (optional)
+BM25_INDEX_PATH = os.getenv("BM25_INDEX_PATH", str(BASE_DIR / "data" / "index" / "bm25.json"))
+RETRIEVAL_STRATEGY = os.getenv("RETRIEVAL_STRATEGY", "vector")
+HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "50"))
+LEXICAL_MAX_TERMS = int(os.getenv("LEXICAL_MAX_TERMS", "3"))
+
+# Graph context expansion configurations (optional)
+CONTEXT_DEPTH = int(os.getenv("CONTEXT_DEPTH", "1"))
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1024"))
+
+# Quantized vector index configurations (optional, VECTOR_INDEX_BACKEND=fp16 or int8)
+QUANTIZED_RESCORE_FACTOR = int(os.getenv("QUANTIZED_RESCORE_FACTOR", "4"))
+
+# Embedding snapshot configurations (optional, memory-mapped at retriever startup)
+EMBEDDING_SNAPSHOT_PATH = os.getenv("EMBEDDING_SNAPSHOT_PATH", str(BASE_DIR / "data" / "index" / "snapshot.json"))
+
+# Instrumentation configurations (optional)
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+METRICS_LOG_INTERVAL_SECONDS = float(os.getenv("METRICS_LOG_INTERVAL_SECONDS", "0"))
+METRICS_OTEL_SPANS = os.getenv("METRICS_OTEL_SPANS", "false").lower() in ("1", "true", "yes")
+
+# Embedding client configurations (optional)
+EMBED_TIMEOUT_SECONDS = float(os.getenv("EMBED_TIMEOUT_SECONDS", "30"))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "3"))
+EMBED_BACKOFF_SECONDS = float(os.getenv("EMBED_BACKOFF_SECONDS", "0.5"))
+EMBED_MAX_BACKOFF_SECONDS = float(os.getenv("EMBED_MAX_BACKOFF_SECONDS", "10"))
+EMBED_MAX_CONCURRENCY = int(os.getenv("EMBED_MAX_CONCURRENCY", "4"))
+EMBED_CIRCUIT_FAILURES = int(os.getenv("EMBED_CIRCUIT_FAILURES", "5"))
+EMBED_CIRCUIT_RESET_SECONDS = float(os.getenv("EMBED_CIRCUIT_RESET_SECONDS", "30"))
+EMBED_RETRY_PASSES = int(os.getenv("EMBED_RETRY_PASSES", "1"))
+
+# Chunking configurations (optional, sections longer than the window get Chunk nodes)
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "256"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "32"))
+
+# Semantic query cache configurations (optional, SEMANTIC_CACHE_SIZE=0 disables it)
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "600"))
+
+# Answer generation configurations (optional)
+OLLAMA_GENERATE_URL = os.getenv("OLLAMA_GENERATE_URL", OLLAMA_URL.replace("/api/embeddings", "/api/generate"))
+OLLAMA_GENERATE_MODEL = os.getenv("OLLAMA_GENERATE_MODEL", "llama3.2")
+ANSWER_CONTEXT_TOKENS = int(os.getenv("ANSWER_CONTEXT_TOKENS", "2048"))
+GENERATE_MAX_TOKENS = int(os.getenv("GENERATE_MAX_TOKENS", "512"))
+GENERATE_TIMEOUT_SECONDS = float(os.getenv("GENERATE_TIMEOUT_SECONDS", "120"))
+GENERATE_PRELOAD = os.getenv("GENERATE_PRELOAD", "true").lower() in ("1", "true", "yes")
+
+# Citation routing configurations (optional)
+CITATION_ROUTING = os.getenv("CITATION_ROUTING", "true").lower() in ("1", "true", "yes")
@@ -1,17 +1,99 @@
+"""
+This module creates the Neo4j indexes used by the importer and the retriever.
+
+Functions:
+- create_law_key_constraint: Enforces the (book, year, source, number) node key of Law nodes.
+- create_indexes: Creates the node key constraint and the b-tree indexes on the Law and Chunk metadata.
+- get_embedding_dimensions: Reads the embedding size from a stored Law embedding.
+- create_vector_index: Creates the native vector index on Law.embedding (Neo4j 5.11+).
+- main: Creates all indexes.
+"""
+
+import logging
 from src.database.neo4j_utils import Neo4jConnection
-from config.constants import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+from config.constants import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_VECTOR_INDEX, VECTOR_INDEX_DIMENSIONS
+
+# Strongest form the server supports first: NODE KEY needs Enterprise Edition,
+# composite UNIQUE needs Neo4j 5; older Community servers get a composite index
+# so every lookup on the key is still a single index seek.
+LAW_KEY_STATEMENTS = (
+    ("node key", "CREATE CONSTRAINT law_key IF NOT EXISTS FOR (l:Law) "
+                 "REQUIRE (l.book, l.year, l.source, l.number) IS NODE KEY"),
+    ("unique", "CREATE CONSTRAINT law_key IF NOT EXISTS FOR (l:Law) "
+               "REQUIRE (l.book, l.year, l.source, l.number) IS UNIQUE"),
+    ("index", "CREATE INDEX law_key IF NOT EXISTS FOR (l:Law) ON (l.book, l.year, l.source, l.number)"),
+)
+
+def create_law_key_constraint(conn):
+    """
+    Enforces (book, year, source, number) as the identity of Law nodes.
+
+    Returns:
+        str: The kind of schema object created: "node key", "unique" or "index".
+    """
+    for kind, statement in LAW_KEY_STATEMENTS:
+        try:
+            conn.query(statement)
+        except Exception as e:
+            logging.info(f"Law key {kind} not supported by the server: {e}")
+            continue
+        if kind == "index":
+            logging.warning("Law key is indexed but not enforced as unique on this server.")
+        print(f"✅ Law key {kind} on (book, year, source, number) created.")
+        return kind
+    raise RuntimeError("Could not create the Law key constraint or index.")
 
 def create_indexes(conn):
+    create_law_key_constraint(conn)
     conn.query("CREATE INDEX law_number IF NOT EXISTS FOR (l:Law) ON (l.number)")
     conn.query("CREATE INDEX law_book IF NOT EXISTS FOR (l:Law) ON (l.book)")
     conn.query("CREATE INDEX law_year IF NOT EXISTS FOR (l:Law) ON (l.year)")
     conn.query("CREATE INDEX law_source IF NOT EXISTS FOR (l:Law) ON (l.source)")
-    conn.query("CREATE INDEX law_text IF NOT EXISTS FOR (l:Law) ON (l.text)")
+    # Chunks of long sections carry their Law's key, so they can be found without the HAS_CHUNK edge
+    conn.query("CREATE INDEX chunk_key IF NOT EXISTS FOR (c:Chunk) ON (c.book, c.year, c.source, c.number)")
+    # Full section texts are never looked up by equality; the index only cost writes and disk
+    conn.query("DROP INDEX law_text IF EXISTS")
     print("✅ Indexes created.")
 
+def get_embedding_dimensions(conn):
+    result = list(conn.query(
+        "MATCH (l:Law) WHERE l.embedding IS NOT NULL RETURN size(l.embedding) AS dimensions LIMIT 1"
+    ))
+    return result[0]["dimensions"] if result else None
+
+def create_vector_index(conn, dimensions=None):
+    """
+    Creates a cosine vector index on Law.embedding.
+
+    The dimension is taken from a stored embedding when there is one, otherwise
+    from VECTOR_INDEX_DIMENSIONS. Servers without vector index support only log a
+    warning; retrieval then keeps using the in-process index.
+
+    Returns:
+        bool: Whether the vector index was created (or already existed).
+    """
+    dimensions = int(dimensions or get_embedding_dimensions(conn) or VECTOR_INDEX_DIMENSIONS)
+    try:
+        conn.query(
+            f"""
+            CREATE VECTOR INDEX {NEO4J_VECTOR_INDEX} IF NOT EXISTS
+            FOR (l:Law) ON (l.embedding)
+            OPTIONS {{indexConfig: {{
+                `vector.dimensions`: {dimensions},
+                `vector.similarity_function`: 'cosine'
+            }}}}
+            """
+        )
+    except Exception as e:
+        logging.warning(f"Vector index not created, the server does not support it: {e}")
+        return False
+    print(f"✅ Vector index {NEO4J_VECTOR_INDEX} ({dimensions} dimensions, cosine) created.")
+    return True
+
 def main():
     with Neo4jConnection() as conn:
         create_indexes(conn)
+        create_vector_index(conn)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
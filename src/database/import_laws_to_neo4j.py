@@ -8,16 +8,34 @@ Functions:
 - create_sibling_relation: Creates a sibling relationship between laws.
 - create_refers_to_relation: Creates a reference relationship between laws.
 - parse_docx: Parses a .docx file to extract law sections.
+- parse_docx_streaming: Streams the law sections of a .docx file straight from its XML.
 - extract_metadata_from_filename: Extracts metadata from the filename.
+- parse_documents: Parses many .docx files, optionally in a process pool.
+- import_document: Writes one document row by row (reference implementation of the import).
+- build_import_rows: Builds the node and edge rows of one document in memory.
+- bulk_import_document: Writes one document with batched UNWIND transactions.
+- compute_file_hash / compute_text_hash: Fingerprints used by the incremental import.
+- incremental_import_document: Upserts only the sections of a document whose text changed.
+- remove_document: Deletes a document that is no longer in the data folder.
 - main: Main function to orchestrate the import process.
 """
 
 from docx import Document
 from pathlib import Path
 from src.database.neo4j_utils import Neo4jConnection
-from config.constants import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+from src.database.law_keys import make_law_id
+from src.monitoring import metrics
+from src.retriever.bm25_index import BM25Index, load_bm25_index
+from config.constants import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, IMPORT_BATCH_SIZE, IMPORT_WORKERS
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from xml.etree.ElementTree import iterparse
+import argparse
+import hashlib
 import os
 import re
+import time
+import zipfile
 
 # Folder containing .docx files
 DATA_DIR = Path(__file__).parents[2] / "data" / "laws"
@@ -29,55 +47,223 @@ def create_law_node(conn, section_number, text, book, year, source):
     conn.query(
         """
         MERGE (l:Law {number: $number, book: $book, year: $year, source: $source})
-        SET l.text = $text
+        SET l.text = $text, l.text_hash = $text_hash
         """,
-        parameters={"number": section_number, "text": text, "book": book, "year": year, "source": source}
+        parameters={
+            "number": section_number, "text": text, "text_hash": compute_text_hash(text),
+            "book": book, "year": year, "source": source
+        }
     )
 
-def create_parent_child_relation(conn, parent_number, child_number):
+# Both ends of every edge belong to the same document, so each MATCH is one
+# seek on the (book, year, source, number) node key.
+def create_parent_child_relation(conn, parent_number, child_number, book, year, source):
     conn.query(
         """
-        MATCH (parent:Law {number: $parent_number})
-        MATCH (child:Law {number: $child_number})
+        MATCH (parent:Law {number: $parent_number, book: $book, year: $year, source: $source})
+        MATCH (child:Law {number: $child_number, book: $book, year: $year, source: $source})
         MERGE (parent)-[:HAS_CHILD]->(child)
         """,
-        parameters={"parent_number": parent_number, "child_number": child_number}
+        parameters={
+            "parent_number": parent_number, "child_number": child_number,
+            "book": book, "year": year, "source": source
+        }
     )
 
-def create_sibling_relation(conn, first_number, second_number):
+def create_sibling_relation(conn, first_number, second_number, book, year, source):
     conn.query(
         """
-        MATCH (a:Law {number: $first_number})
-        MATCH (b:Law {number: $second_number})
+        MATCH (a:Law {number: $first_number, book: $book, year: $year, source: $source})
+        MATCH (b:Law {number: $second_number, book: $book, year: $year, source: $source})
         MERGE (a)-[:NEXT_SIBLING]->(b)
         """,
-        parameters={"first_number": first_number, "second_number": second_number}
+        parameters={
+            "first_number": first_number, "second_number": second_number,
+            "book": book, "year": year, "source": source
+        }
     )
 
-def create_refers_to_relation(conn, from_number, to_number):
+def create_refers_to_relation(conn, from_number, to_number, book, year, source):
     conn.query(
         """
-        MATCH (a:Law {number: $from_number})
-        MATCH (b:Law {number: $to_number})
+        MATCH (a:Law {number: $from_number, book: $book, year: $year, source: $source})
+        MATCH (b:Law {number: $to_number, book: $book, year: $year, source: $source})
         MERGE (a)-[:REFERS_TO]->(b)
         """,
-        parameters={"from_number": from_number, "to_number": to_number}
+        parameters={
+            "from_number": from_number, "to_number": to_number,
+            "book": book, "year": year, "source": source
+        }
     )
 
+def merge_law_nodes(tx, rows):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MERGE (l:Law {number: row.number, book: row.book, year: row.year, source: row.source})
+        SET l.text = row.text, l.text_hash = row.text_hash
+        """,
+        rows=rows
+    )
+
+def upsert_changed_law_nodes(tx, rows):
+    # Changed text invalidates the embedding so the embedder picks the section up again
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MERGE (l:Law {number: row.number, book: row.book, year: row.year, source: row.source})
+        SET l.text = row.text, l.text_hash = row.text_hash
+        REMOVE l.embedding, l.embedded_at, l.embedding_model
+        WITH l
+        OPTIONAL MATCH (l)-[:HAS_CHUNK]->(c:Chunk)
+        DETACH DELETE c
+        """,
+        rows=rows
+    )
+
+def delete_law_nodes(tx, numbers, book, year, source):
+    tx.run(
+        """
+        UNWIND $numbers AS number
+        MATCH (l:Law {number: number, book: $book, year: $year, source: $source})
+        OPTIONAL MATCH (l)-[:HAS_CHUNK]->(c:Chunk)
+        DETACH DELETE l, c
+        """,
+        numbers=numbers, book=book, year=year, source=source
+    )
+
+def delete_document_relations(tx, book, year, source):
+    tx.run(
+        """
+        MATCH (l:Law {book: $book, year: $year, source: $source})-[r:HAS_CHILD|NEXT_SIBLING|REFERS_TO]->()
+        DELETE r
+        """,
+        book=book, year=year, source=source
+    )
+
+def set_document_fingerprint(tx, filename, file_hash, book, year, source):
+    tx.run(
+        """
+        MERGE (d:Document {filename: $filename})
+        SET d.file_hash = $file_hash, d.book = $book, d.year = $year, d.source = $source,
+            d.imported_at = timestamp()
+        """,
+        filename=filename, file_hash=file_hash, book=book, year=year, source=source
+    )
+
+def merge_parent_child_relations(tx, rows):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (parent:Law {number: row.parent_number, book: row.book, year: row.year, source: row.source})
+        MATCH (child:Law {number: row.child_number, book: row.book, year: row.year, source: row.source})
+        MERGE (parent)-[:HAS_CHILD]->(child)
+        """,
+        rows=rows
+    )
+
+def merge_sibling_relations(tx, rows):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (a:Law {number: row.first_number, book: row.book, year: row.year, source: row.source})
+        MATCH (b:Law {number: row.second_number, book: row.book, year: row.year, source: row.source})
+        MERGE (a)-[:NEXT_SIBLING]->(b)
+        """,
+        rows=rows
+    )
+
+def merge_refers_to_relations(tx, rows):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (a:Law {number: row.from_number, book: row.book, year: row.year, source: row.source})
+        MATCH (b:Law {number: row.to_number, book: row.book, year: row.year, source: row.source})
+        MERGE (a)-[:REFERS_TO]->(b)
+        """,
+        rows=rows
+    )
+
+# Match things like '1.', '1.1.', '1.1.1.', followed by text
+SECTION_PATTERN = re.compile(r'^(\d+(\.\d+)*\.)\s+(.*)')
+
+def _match_section(text):
+    match = SECTION_PATTERN.match(text)
+    if match:
+        section_number = match.group(1).rstrip(".")  # remove trailing dot
+        return section_number, match.group(3)
+    return None
+
 def parse_docx(filepath, filename):
     document = Document(filepath)
     lines = []
     for para in document.paragraphs:
         text = para.text.strip()
         if text:
-            # Match things like '1.', '1.1.', '1.1.1.', followed by text
-            match = re.match(r'^(\d+(\.\d+)*\.)\s+(.*)', text)
-            if match:
-                section_number = match.group(1).rstrip(".")  # remove trailing dot
-                section_text = match.group(3)
-                lines.append((section_number, section_text))
+            section = _match_section(text)
+            if section:
+                lines.append(section)
     return lines
 
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+def _run_text(run):
+    # Same mapping as python-docx >= 1.0 (pinned in requirements.txt): tabs, line breaks and hyphens become characters
+    parts = []
+    for child in run:
+        if child.tag == W_NS + "t":
+            parts.append(child.text or "")
+        elif child.tag in (W_NS + "tab", W_NS + "ptab"):
+            parts.append("\t")
+        elif child.tag == W_NS + "cr":
+            parts.append("\n")
+        elif child.tag == W_NS + "br":
+            if child.get(W_NS + "type", "textWrapping") == "textWrapping":
+                parts.append("\n")
+        elif child.tag == W_NS + "noBreakHyphen":
+            parts.append("-")
+    return "".join(parts)
+
+def _paragraph_text(paragraph):
+    parts = []
+    for child in paragraph:
+        if child.tag == W_NS + "r":
+            parts.append(_run_text(child))
+        elif child.tag == W_NS + "hyperlink":
+            # python-docx 0.8 dropped hyperlink text; 1.0 and later keep it
+            parts.extend(_run_text(run) for run in child.iter(W_NS + "r"))
+    return "".join(parts)
+
+def parse_docx_streaming(filepath, filename):
+    """
+    Yields the (section_number, text) tuples of a .docx file, in the same order and
+    with the same text as `parse_docx`, without building the python-docx object tree.
+
+    `word/document.xml` is read from the zip with `iterparse`; every top-level
+    body element is cleared and dropped once it has been processed, so memory
+    stays flat however long the document is.
+    """
+    with zipfile.ZipFile(filepath) as archive, archive.open("word/document.xml") as xml:
+        body = None
+        depth = 0
+        for event, element in iterparse(xml, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if body is None and element.tag == W_NS + "body":
+                    body = element
+                continue
+            depth -= 1
+            # Only paragraphs directly under <w:body> count, like Document.paragraphs
+            if body is None or depth != 2:
+                continue
+            if element.tag == W_NS + "p":
+                text = _paragraph_text(element).strip()
+                section = _match_section(text) if text else None
+                if section:
+                    yield section
+            element.clear()
+            body.remove(element)
+
 def extract_metadata_from_filename(filename):
     parts = filename.replace(".docx", "").split("_")
     book = parts[0]
@@ -85,46 +271,237 @@ def extract_metadata_from_filename(filename):
     source = parts[2]
     return book, year, source
 
-def main():
-    with Neo4jConnection() as conn:
-        print("✅ Connected to Neo4j")
+def compute_file_hash(filepath):
+    digest = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
 
-        # Step 1: Clear database
-        clear_database(conn)
+def compute_text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-        for filename in os.listdir(DATA_DIR):
-            filepath = DATA_DIR / filename
-            print(f"Processing {filename}")
+def get_document_hashes(conn):
+    result = conn.query("MATCH (d:Document) RETURN d.filename AS filename, d.file_hash AS file_hash")
+    return {record["filename"]: record["file_hash"] for record in result}
 
-            book, year, source = extract_metadata_from_filename(filename)
-            sections = parse_docx(filepath, filename)
-            print(f"Found {len(sections)} sections in {filename}")
+def get_section_hashes(conn, book, year, source):
+    result = conn.query(
+        """
+        MATCH (l:Law {book: $book, year: $year, source: $source})
+        RETURN l.number AS number, l.text_hash AS text_hash
+        """,
+        parameters={"book": book, "year": year, "source": source}
+    )
+    return {record["number"]: record["text_hash"] for record in result}
+
+def _timed_parse(filepath, filename, streaming=False):
+    started = time.perf_counter()
+    parser = parse_docx_streaming if streaming else parse_docx
+    sections = tuple(parser(filepath, filename))
+    return filename, sections, time.perf_counter() - started
+
+def parse_documents(filenames, data_dir=DATA_DIR, workers=IMPORT_WORKERS, streaming=False):
+    """
+    Parses the given files and yields (filename, sections, seconds) in input order.
+
+    With more than one worker the files are parsed in a process pool while the
+    caller consumes (and writes) the documents that are already done. With
+    `streaming` the files are parsed by `parse_docx_streaming`.
+    """
+    filepaths = [str(Path(data_dir) / filename) for filename in filenames]
+    parse = partial(_timed_parse, streaming=streaming)
+    if workers <= 1:
+        for filepath, filename in zip(filepaths, filenames):
+            yield parse(filepath, filename)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(parse, filepaths, filenames)
+
+def import_document(conn, sections, book, year, source):
+    last_section_per_level = {}  # for siblings
+
+    for idx, (section_number, section_text) in enumerate(sections):
+        create_law_node(conn, section_number, section_text, book, year, source)
+
+        # Handle Parent-Child
+        parent_number = ".".join(section_number.split(".")[:-1])
+        if parent_number:
+            create_parent_child_relation(conn, parent_number, section_number, book, year, source)
+
+        # Handle Sibling
+        level = section_number.count(".")
+        if level in last_section_per_level:
+            previous_sibling = last_section_per_level[level]
+            create_sibling_relation(conn, previous_sibling, section_number, book, year, source)
+
+        last_section_per_level[level] = section_number
+
+    # Step 2: Handle internal references (See Section X.X)
+    for section_number, section_text in sections:
+        references = re.findall(r'See Section (\d+(\.\d+)*)', section_text)
+        for ref_number, _ in references:
+            create_refers_to_relation(conn, section_number, ref_number, book, year, source)
+
+def build_import_rows(sections, book, year, source):
+    """
+    Builds the rows that `import_document` would write for one document.
+
+    Returns:
+        dict: Lists of parameter rows keyed by "nodes", "children", "siblings" and "references".
+    """
+    rows = {"nodes": [], "children": [], "siblings": [], "references": []}
+    document = {"book": book, "year": year, "source": source}
+    last_section_per_level = {}
 
-            last_section_per_level = {}  # for siblings
+    for section_number, section_text in sections:
+        rows["nodes"].append({
+            "number": section_number, "text": section_text, "text_hash": compute_text_hash(section_text),
+            "book": book, "year": year, "source": source
+        })
+        parent_number = ".".join(section_number.split(".")[:-1])
+        if parent_number:
+            rows["children"].append({"parent_number": parent_number, "child_number": section_number, **document})
+        level = section_number.count(".")
+        if level in last_section_per_level:
+            rows["siblings"].append({
+                "first_number": last_section_per_level[level], "second_number": section_number, **document
+            })
+        last_section_per_level[level] = section_number
 
-            for idx, (section_number, section_text) in enumerate(sections):
-                create_law_node(conn, section_number, section_text, book, year, source)
+    for section_number, section_text in sections:
+        for ref_number, _ in re.findall(r'See Section (\d+(\.\d+)*)', section_text):
+            rows["references"].append({"from_number": section_number, "to_number": ref_number, **document})
+    return rows
 
-                # Handle Parent-Child
-                parent_number = ".".join(section_number.split(".")[:-1])
-                if parent_number:
-                    create_parent_child_relation(conn, parent_number, section_number)
+def bulk_import_document(conn, sections, book, year, source, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Writes one document with a few UNWIND transactions of at most `batch_size` rows.
 
-                # Handle Sibling
-                level = section_number.count(".")
-                if level in last_section_per_level:
-                    previous_sibling = last_section_per_level[level]
-                    create_sibling_relation(conn, previous_sibling, section_number)
+    Nodes are written before any edge so that every relationship MATCH can see them.
 
-                last_section_per_level[level] = section_number
+    Returns:
+        int: The number of rows written.
+    """
+    rows = build_import_rows(sections, book, year, source)
+    return _write_rows(conn, rows, batch_size, nodes_writer=merge_law_nodes)
 
-            # Step 2: Handle internal references (See Section X.X)
-            for section_number, section_text in sections:
-                references = re.findall(r'See Section (\d+(\.\d+)*)', section_text)
-                for ref_number, _ in references:
-                    create_refers_to_relation(conn, section_number, ref_number)
+def _write_rows(conn, rows, batch_size, nodes_writer):
+    written = 0
+    for key, write in (
+        ("nodes", nodes_writer),
+        ("children", merge_parent_child_relations),
+        ("siblings", merge_sibling_relations),
+        ("references", merge_refers_to_relations),
+    ):
+        for start in range(0, len(rows[key]), batch_size):
+            batch = rows[key][start:start + batch_size]
+            conn.execute_write(write, batch)
+            written += len(batch)
+    return written
+
+def incremental_import_document(conn, sections, book, year, source, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Brings one changed document up to date without touching its unchanged sections.
+
+    Sections whose text hash changed (or that are new) are upserted with their
+    embedding removed, sections that disappeared are deleted, and the document's
+    structural edges are rebuilt (cheap, and they shift when sections move).
+
+    Returns:
+        dict: Counts of "upserted", "deleted" and "unchanged" sections.
+    """
+    existing = get_section_hashes(conn, book, year, source)
+    rows = build_import_rows(sections, book, year, source)
+    latest = {row["number"]: row for row in rows["nodes"]}
+    changed = [row for number, row in latest.items() if existing.get(number) != row["text_hash"]]
+    removed = [number for number in existing if number not in latest]
+
+    if removed:
+        conn.execute_write(delete_law_nodes, removed, book, year, source)
+    conn.execute_write(delete_document_relations, book, year, source)
+    _write_rows(conn, dict(rows, nodes=changed), batch_size, nodes_writer=upsert_changed_law_nodes)
+    return {"upserted": len(changed), "deleted": len(removed), "unchanged": len(latest) - len(changed)}
+
+def remove_document(conn, filename):
+    book, year, source = extract_metadata_from_filename(filename)
+    conn.query(
+        """
+        MATCH (l:Law {book: $book, year: $year, source: $source})
+        OPTIONAL MATCH (l)-[:HAS_CHUNK]->(c:Chunk)
+        DETACH DELETE l, c
+        """,
+        parameters={"book": book, "year": year, "source": source}
+    )
+    conn.query("MATCH (d:Document {filename: $filename}) DELETE d", parameters={"filename": filename})
+
+def main(bulk=False, batch_size=IMPORT_BATCH_SIZE, workers=IMPORT_WORKERS, incremental=False, streaming=False):
+    # Per-stage throughput is printed at the end of every import
+    metrics.enable()
+    # One reused session for the whole import instead of one per statement
+    with Neo4jConnection() as conn, conn.session():
+        print("✅ Connected to Neo4j")
+
+        filenames = os.listdir(DATA_DIR)
+        file_hashes = {}
+        # The lexical index is maintained alongside the graph, one document at a time
+        lexical_index = (load_bm25_index() if incremental else None) or BM25Index()
+        if incremental:
+            # Step 1: Skip unchanged files and drop the ones that were removed
+            file_hashes = {filename: compute_file_hash(DATA_DIR / filename) for filename in filenames}
+            stored_hashes = get_document_hashes(conn)
+            for filename in stored_hashes.keys() - file_hashes.keys():
+                print(f"Removing {filename}")
+                remove_document(conn, filename)
+                lexical_index.remove_document(filename)
+            unchanged = [filename for filename in filenames if stored_hashes.get(filename) == file_hashes[filename]]
+            if unchanged:
+                print(f"Skipping {len(unchanged)} unchanged documents")
+            filenames = [filename for filename in filenames if filename not in unchanged]
+        else:
+            # Step 1: Clear database
+            clear_database(conn)
+
+        # Parsing may run in worker processes; this loop is the single Neo4j writer
+        for filename, sections, parse_seconds in parse_documents(filenames, DATA_DIR, workers, streaming):
+            print(f"Processing {filename}")
+
+            book, year, source = extract_metadata_from_filename(filename)
+            print(f"Found {len(sections)} sections in {filename} (parsed in {parse_seconds:.2f}s)")
+            # Parsing may have run in a worker process, so its time is recorded here
+            metrics.record("import.parse", parse_seconds, items=len(sections))
+
+            with metrics.span("import.write", items=len(sections)):
+                if incremental:
+                    stats = incremental_import_document(conn, sections, book, year, source, batch_size)
+                    conn.execute_write(set_document_fingerprint, filename, file_hashes[filename], book, year, source)
+                    print(f"Upserted {stats['upserted']}, deleted {stats['deleted']}, "
+                          f"kept {stats['unchanged']} unchanged sections")
+                elif bulk:
+                    started = time.perf_counter()
+                    written = bulk_import_document(conn, sections, book, year, source, batch_size)
+                    elapsed = time.perf_counter() - started
+                    print(f"Wrote {written} rows in {elapsed:.2f}s ({written / max(elapsed, 1e-9):.0f} rows/s)")
+                else:
+                    import_document(conn, sections, book, year, source)
+            with metrics.span("import.lexical_index", items=len(sections)):
+                lexical_index.replace_document(filename, [
+                    (make_law_id(book, year, source, number), text) for number, text in sections
+                ])
+
+        lexical_index.save()
 
     print("✅ Import complete!")
+    metrics.print_summary(("import.", "neo4j."))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Import the .docx law files into Neo4j.")
+    parser.add_argument("--bulk", action="store_true", help="Write each document with batched UNWIND transactions")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Rows per UNWIND transaction")
+    parser.add_argument("--workers", type=int, default=IMPORT_WORKERS, help="Processes used to parse the .docx files")
+    parser.add_argument("--incremental", action="store_true", help="Only re-import documents and sections that changed")
+    parser.add_argument("--streaming", action="store_true", help="Parse word/document.xml with iterparse instead of python-docx")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(**vars(parse_args()))
@@ -0,0 +1,48 @@
+"""
+This module defines the identity of a Law node.
+
+A section number is only unique within one book, so a Law node is identified by
+its node key (book, year, source, number), which `create_indexes.py` enforces
+with a constraint. Outside the database the key travels as one string, the law
+id "<book>_<year>_<source>#<number>" (the document name and the section number).
+
+Long sections are also embedded as Chunk nodes carrying their Law's key plus a
+`position`; an index row of a chunk is identified by "<law id>@<position>".
+
+Functions:
+- make_law_id: Builds the law id of a section.
+- split_law_id: Splits a law id back into (book, year, source, number).
+- law_id_expression: Cypher expression that builds the law id of a node variable.
+- law_key_parameters: Node key parameters (plus the law id) for a list of law ids.
+- make_chunk_id: Builds the row id of a chunk of a section.
+- chunk_law_id: Law id of a row id (the row id itself for a whole section).
+- is_chunk_id: Whether a row id belongs to a chunk.
+"""
+
+LAW_KEY_PROPERTIES = ("book", "year", "source", "number")
+CHUNK_SEPARATOR = "@"
+
+def make_law_id(book, year, source, number):
+    return f"{book}_{year}_{source}#{number}"
+
+def split_law_id(law_id):
+    document, separator, number = law_id.rpartition("#")
+    if not separator:
+        return None, None, None, law_id
+    book, year, source = document.split("_", 2)
+    return book, year, source, number
+
+def law_id_expression(variable="l"):
+    return f"{variable}.book + '_' + {variable}.year + '_' + {variable}.source + '#' + {variable}.number"
+
+def law_key_parameters(law_ids):
+    return [dict(zip(LAW_KEY_PROPERTIES, split_law_id(law_id)), law_id=law_id) for law_id in law_ids]
+
+def make_chunk_id(law_id, position):
+    return f"{law_id}{CHUNK_SEPARATOR}{position}"
+
+def chunk_law_id(row_id):
+    return row_id.split(CHUNK_SEPARATOR, 1)[0]
+
+def is_chunk_id(row_id):
+    return CHUNK_SEPARATOR in row_id
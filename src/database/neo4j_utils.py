@@ -1,34 +1,166 @@
 """
 This module provides a utility class for interacting with the Neo4j database.
 
+All connections share one process-wide driver (and therefore one connection
+pool), so opening a Neo4jConnection per request costs no TCP/Bolt handshake.
+
 Classes:
 - Neo4jConnection: Manages the connection to the Neo4j database and provides query execution methods.
+
+Functions:
+- get_driver: Returns the shared, pooled Neo4j driver.
+- close_driver: Closes the shared driver (called automatically at exit).
+- pool_stats: Reports pool configuration and session usage counters.
 """
 
+import atexit
 import logging
+import threading
+import time
+from contextlib import contextmanager
 from neo4j import GraphDatabase
-from config.constants import NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD
+from src.monitoring import metrics
+from config.constants import (
+    NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, NEO4J_MAX_POOL_SIZE, NEO4J_ACQUISITION_TIMEOUT
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+_driver = None
+_driver_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = {"sessions_opened": 0, "active_sessions": 0, "peak_active_sessions": 0, "queries": 0, "query_seconds": 0.0}
+
+def get_driver():
+    global _driver
+    with _driver_lock:
+        if _driver is None:
+            _driver = GraphDatabase.driver(
+                NEO4J_URI,
+                auth=(NEO4J_USER, NEO4J_PASSWORD),
+                max_connection_pool_size=NEO4J_MAX_POOL_SIZE,
+                connection_acquisition_timeout=NEO4J_ACQUISITION_TIMEOUT,
+            )
+        return _driver
+
+def close_driver():
+    global _driver
+    with _driver_lock:
+        if _driver is not None:
+            _driver.close()
+            _driver = None
+
+atexit.register(close_driver)
+
+def _count_connections(driver):
+    # The driver keeps no public pool metrics; read them best-effort from the pool
+    try:
+        connections = [conn for pool in driver._pool.connections.values() for conn in pool]
+        in_use = sum(1 for conn in connections if conn.in_use)
+        return {"open_connections": len(connections), "in_use_connections": in_use}
+    except Exception:
+        return {}
+
+def pool_stats():
+    """
+    Returns the pool configuration and usage counters of the shared driver.
+
+    Returns:
+        dict: max_pool_size, acquisition_timeout, sessions_opened, active_sessions,
+        peak_active_sessions, queries, query_seconds and, when the driver exposes
+        them, open_connections and in_use_connections.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["max_pool_size"] = NEO4J_MAX_POOL_SIZE
+    stats["acquisition_timeout"] = NEO4J_ACQUISITION_TIMEOUT
+    if _driver is not None:
+        stats.update(_count_connections(_driver))
+    return stats
+
+def _update_stats(**deltas):
+    with _stats_lock:
+        for key, delta in deltas.items():
+            _stats[key] += delta
+        _stats["peak_active_sessions"] = max(_stats["peak_active_sessions"], _stats["active_sessions"])
+
 class Neo4jConnection:
     def __init__(self):
         self.uri = NEO4J_URI
         self.user = NEO4J_USER
         self.password = NEO4J_PASSWORD
-        self.driver = GraphDatabase.driver(self.uri, auth=(self.user, self.password))
+        self.driver = get_driver()
+        self._session = None
+        self._tx = None
 
     def close(self):
-        self.driver.close()
+        # The driver is shared by the whole process and stays open for the next connection
+        self._session = None
+        self._tx = None
 
-    def query(self, query, parameters=None):
+    @contextmanager
+    def _open_session(self):
+        if self._session is not None:
+            yield self._session
+            return
+        _update_stats(sessions_opened=1, active_sessions=1)
         try:
             with self.driver.session() as session:
-                return session.run(query, parameters)
+                yield session
+        finally:
+            _update_stats(active_sessions=-1)
+
+    @contextmanager
+    def session(self):
+        """
+        Reuses one session for every query and write issued inside the block.
+        """
+        if self._session is not None:
+            yield self
+            return
+        with self._open_session() as session:
+            self._session = session
+            try:
+                yield self
+            finally:
+                self._session = None
+
+    @contextmanager
+    def transaction(self):
+        """
+        Runs every query and write issued inside the block in one explicit transaction,
+        committed when the block exits normally and rolled back otherwise.
+        """
+        with self.session():
+            tx = self._session.begin_transaction()
+            self._tx = tx
+            try:
+                yield self
+                tx.commit()
+            except Exception:
+                tx.rollback()
+                raise
+            finally:
+                self._tx = None
+                tx.close()
+
+    @metrics.timed("neo4j.query")
+    def query(self, query, parameters=None):
+        """
+        Runs a query and returns its records, fully consumed before the session is released.
+        """
+        started = time.perf_counter()
+        try:
+            if self._tx is not None:
+                return list(self._tx.run(query, parameters))
+            with self._open_session() as session:
+                return list(session.run(query, parameters))
         except Exception as e:
             logging.error(f"Error executing query: {query}, Error: {e}")
             raise
+        finally:
+            _update_stats(queries=1, query_seconds=time.perf_counter() - started)
 
     def __enter__(self):
         return self
@@ -36,12 +168,15 @@ class Neo4jConnection:
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.close()
 
+    @metrics.timed("neo4j.write")
     def execute_write(self, func, *args, **kwargs):
         """
         Execute a write transaction with the given function and arguments.
         """
         try:
-            with self.driver.session() as session:
+            if self._tx is not None:
+                return func(self._tx, *args, **kwargs)
+            with self._open_session() as session:
                 return session.write_transaction(func, *args, **kwargs)
         except Exception as e:
             logging.error(f"Error executing write transaction: {e}")
@@ -0,0 +1,47 @@
+"""
+This module splits long section texts into overlapping, token-bounded chunks.
+
+Tokens are counted the way BERT-style embedding models (nomic-embed-text)
+pre-tokenize: runs of word characters and single punctuation marks. Word-piece
+splitting only adds tokens, so the window is kept well below the model context
+(CHUNK_MAX_TOKENS) instead of letting Ollama truncate long sections silently.
+Chunks are cut at token boundaries of the original text, so they keep its
+spacing and punctuation. The same count sizes every prompt budget
+(CONTEXT_TOKEN_BUDGET, ANSWER_CONTEXT_TOKENS), so all of them are in one unit.
+
+Functions:
+- count_tokens: Counts the pre-tokenizer tokens of a text.
+- split_into_chunks: Splits a text into windows of at most `max_tokens` tokens that overlap by `overlap` tokens.
+"""
+
+import re
+from config.constants import CHUNK_MAX_TOKENS, CHUNK_OVERLAP_TOKENS
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+def count_tokens(text):
+    return sum(1 for _ in TOKEN_PATTERN.finditer(text))
+
+def split_into_chunks(text, max_tokens=CHUNK_MAX_TOKENS, overlap=CHUNK_OVERLAP_TOKENS):
+    """
+    Splits a text into overlapping windows of tokens.
+
+    Args:
+        max_tokens (int): Tokens per chunk.
+        overlap (int): Tokens shared by consecutive chunks, so a provision cut at a
+            window boundary is still whole in one of them.
+
+    Returns:
+        list: The chunk texts; `[text]` when the text fits in one window.
+    """
+    spans = [match.span() for match in TOKEN_PATTERN.finditer(text)]
+    if len(spans) <= max_tokens:
+        return [text]
+    step = max(1, max_tokens - overlap)
+    chunks = []
+    for start in range(0, len(spans), step):
+        end = min(start + max_tokens, len(spans))
+        chunks.append(text[spans[start][0]:spans[end - 1][1]])
+        if end == len(spans):
+            break
+    return chunks
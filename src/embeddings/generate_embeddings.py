@@ -2,47 +2,246 @@
 This module generates embeddings for laws stored in the Neo4j database.
 
 Functions:
-- get_embedding: Fetches an embedding for a given text using the OLLAMA API.
-- add_embedding: Adds an embedding to a law node in the database.
-- main: Main function to orchestrate the embedding generation process.
+- get_embedding: Fetches an embedding for a given text, through the embedding cache.
+- combine_chunk_embeddings: Section embedding and Chunk rows from the embeddings of its chunks.
+- embed_section: Embeds a section, chunk by chunk when it is longer than the chunk window.
+- add_embedding: Adds an embedding (and the chunks of a long section) to a law node in the database.
+- add_embeddings_batch: Writes a batch of embeddings and chunks in a single UNWIND transaction.
+- fetch_pending_laws: Fetches a page of Law nodes without an up-to-date embedding.
+- run_pipeline: Pipeline mode: paged, concurrent, batched and resumable embedding generation.
+- embed_records: Embeds and writes Law records one by one, returning the ones that failed.
+- main: Main function to orchestrate the embedding generation process, then export the embedding snapshot.
 """
 
 from src.database.neo4j_utils import Neo4jConnection
-from config.constants import OLLAMA_URL, OLLAMA_MODEL
-from src.retriever.api_utils import fetch_embedding
+from src.monitoring import metrics
+from config.constants import OLLAMA_MODEL, EMBED_PAGE_SIZE, EMBED_BATCH_SIZE, EMBED_WORKERS, EMBED_RETRY_PASSES
+from src.retriever.embedding_client import get_embedding_client
+from src.retriever.embedding_cache import get_embedding_cache
+from src.retriever.snapshot import export_snapshot
+from src.retriever.vector_index import normalize_rows
+from src.embeddings.chunking import split_into_chunks
+from concurrent.futures import ThreadPoolExecutor
+import argparse
 import requests
 import json
 import os
+import time
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Laws whose embedding is missing or was produced by another model. Processed
+# nodes drop out of the match, so every page starts where the last one ended and
+# a crashed run resumes where it stopped.
+PENDING_LAWS_QUERY = """
+    MATCH (l:Law)
+    WHERE (l.embedding IS NULL OR coalesce(l.embedding_model, '') <> $model)
+      AND NOT id(l) IN $skip
+    RETURN id(l) AS node_id, l.number, l.text
+    LIMIT $page_size
+"""
+
 def get_embedding(text):
-    return fetch_embedding(OLLAMA_URL, OLLAMA_MODEL, text)
+    return get_embedding_cache().get_or_fetch(
+        OLLAMA_MODEL, text, lambda: get_embedding_client().embed(text)
+    )
+
+# Replaces the Chunk nodes of the matched law `l` with the `chunks` list (empty for short sections)
+REPLACE_CHUNKS_CLAUSE = """
+    WITH l, {chunks} AS chunks
+    OPTIONAL MATCH (l)-[:HAS_CHUNK]->(old:Chunk)
+    DETACH DELETE old
+    WITH DISTINCT l, chunks
+    UNWIND chunks AS chunk
+    CREATE (l)-[:HAS_CHUNK]->(:Chunk {{
+        book: l.book, year: l.year, source: l.source, number: l.number, position: chunk.position,
+        text: chunk.text, embedding: chunk.embedding, embedded_at: l.embedded_at, embedding_model: $model
+    }})
+"""
+
+def combine_chunk_embeddings(chunk_texts, embeddings):
+    """
+    Builds the section embedding and the Chunk rows of a section from the
+    embeddings of its chunks. A section of one chunk keeps its own embedding and
+    has no Chunk rows; a longer one is embedded as the normalized mean of its
+    chunks (used by the Neo4j scan and vector index), and retrieval scores it by
+    its best chunk.
 
-def add_embedding(tx, number, embedding):
+    Returns:
+        tuple: (embedding, chunks) where chunks is a list of {position, text, embedding} dicts.
+    """
+    if len(chunk_texts) == 1:
+        return embeddings[0], []
+    mean = normalize_rows(normalize_rows(embeddings).mean(axis=0))
+    chunks = [
+        {"position": position, "text": text, "embedding": embedding}
+        for position, (text, embedding) in enumerate(zip(chunk_texts, embeddings))
+    ]
+    return mean.tolist(), chunks
+
+def embed_section(text):
+    chunk_texts = split_into_chunks(text)
+    return combine_chunk_embeddings(chunk_texts, [get_embedding(chunk_text) for chunk_text in chunk_texts])
+
+def add_embedding(tx, number, embedding, book, year, source, model=OLLAMA_MODEL, chunks=()):
     tx.run(
         """
-        MATCH (l:Law {number: $number})
-        SET l.embedding = $embedding
-        """,
+        MATCH (l:Law {number: $number, book: $book, year: $year, source: $source})
+        SET l.embedding = $embedding, l.embedded_at = timestamp(), l.embedding_model = $model
+        """ + REPLACE_CHUNKS_CLAUSE.format(chunks="$chunks"),
         number=number,
-        embedding=embedding
+        book=book,
+        year=year,
+        source=source,
+        embedding=embedding,
+        model=model,
+        chunks=list(chunks)
+    )
+
+def add_embeddings_batch(tx, rows, model=OLLAMA_MODEL):
+    tx.run(
+        """
+        UNWIND $rows AS row
+        MATCH (l:Law) WHERE id(l) = row.node_id
+        SET l.embedding = row.embedding, l.embedded_at = timestamp(), l.embedding_model = $model
+        """ + REPLACE_CHUNKS_CLAUSE.format(chunks="coalesce(row.chunks, [])"),
+        rows=rows,
+        model=model
     )
 
-def main():
+def fetch_pending_laws(conn, page_size, skip=(), model=OLLAMA_MODEL):
+    return list(conn.query(
+        PENDING_LAWS_QUERY,
+        parameters={"model": model, "skip": list(skip), "page_size": page_size}
+    ))
+
+def _embed_or_none(text):
     try:
-        with Neo4jConnection() as conn:
-            result = conn.query("MATCH (l:Law) RETURN l.number, l.text")
-            for record in result:
-                number = record["l.number"]
-                text = record["l.text"]
-                embedding = get_embedding(text)
-                conn.execute_write(add_embedding, number, embedding)
-                logging.info(f"✅ Embedded {number}")
+        return get_embedding(text)
+    except Exception as e:
+        logging.error(f"Error embedding text: {e}")
+        return None
+
+def _wait_for_retry_pass(failed_count):
+    # Give an open circuit time to let a trial call through before retrying
+    wait = get_embedding_client().breaker.seconds_until_retry()
+    logging.info(f"Retrying {failed_count} failed laws in {wait:.1f}s")
+    time.sleep(wait)
+
+def run_pipeline(conn, page_size=EMBED_PAGE_SIZE, batch_size=EMBED_BATCH_SIZE, workers=EMBED_WORKERS,
+                 retry_passes=EMBED_RETRY_PASSES):
+    """
+    Embeds every Law node without an up-to-date embedding.
+
+    Pages of pending nodes are split into chunks (see `chunking`), embedded by a
+    bounded thread pool and written back with UNWIND batches of `batch_size` rows. Nodes that fail to embed go to a
+    dead-letter set and are skipped for the rest of the pass; up to `retry_passes`
+    further passes retry them, and whatever still fails is picked up by the next run.
+
+    Returns:
+        dict: Counts of embedded and failed nodes and the elapsed seconds.
+    """
+    started = time.perf_counter()
+    embedded = 0
+    failed = set()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for retry_pass in range(retry_passes + 1):
+            if retry_pass:
+                if not failed:
+                    break
+                _wait_for_retry_pass(len(failed))
+                failed = set()
+            while True:
+                page = fetch_pending_laws(conn, page_size, skip=failed)
+                if not page:
+                    break
+                sections = [split_into_chunks(record["l.text"]) for record in page]
+                chunk_texts = [chunk_text for section in sections for chunk_text in section]
+                # Items count embedding calls: one per chunk, of at most CHUNK_MAX_TOKENS tokens
+                with metrics.span("embed.page", items=len(chunk_texts)):
+                    embeddings = iter(list(pool.map(_embed_or_none, chunk_texts)))
+                rows = []
+                for record, section in zip(page, sections):
+                    section_embeddings = [next(embeddings) for _ in section]
+                    if any(embedding is None for embedding in section_embeddings):
+                        failed.add(record["node_id"])
+                    else:
+                        embedding, chunks = combine_chunk_embeddings(section, section_embeddings)
+                        rows.append({"node_id": record["node_id"], "embedding": embedding, "chunks": chunks})
+                with metrics.span("embed.write", items=len(rows)):
+                    for start in range(0, len(rows), batch_size):
+                        conn.execute_write(add_embeddings_batch, rows[start:start + batch_size])
+                embedded += len(rows)
+                elapsed = time.perf_counter() - started
+                logging.info(f"✅ Embedded {embedded} laws ({embedded / elapsed:.1f}/s), {len(failed)} failed")
+    return {"embedded": embedded, "failed": len(failed), "seconds": time.perf_counter() - started}
+
+def embed_records(conn, records):
+    """
+    Embeds and writes the given Law records (number, text, book, year, source) one by one.
+
+    Returns:
+        list: The records that failed, for a later retry pass.
+    """
+    dead_letters = []
+    for record in records:
+        number = record["l.number"]
+        try:
+            with metrics.span("embed.text"):
+                embedding, chunks = embed_section(record["l.text"])
+            conn.execute_write(
+                add_embedding, number, embedding, record["l.book"], record["l.year"], record["l.source"],
+                chunks=chunks
+            )
+        except Exception as e:
+            logging.error(f"Error embedding {record['l.book']} {number}: {e}")
+            dead_letters.append(record)
+            continue
+        logging.info(f"✅ Embedded {record['l.book']} {number}")
+    return dead_letters
+
+def main(pipeline=False, page_size=EMBED_PAGE_SIZE, batch_size=EMBED_BATCH_SIZE, workers=EMBED_WORKERS, snapshot=True,
+         retry_passes=EMBED_RETRY_PASSES):
+    # Per-stage throughput is printed at the end of every run
+    metrics.enable()
+    try:
+        with Neo4jConnection() as conn, conn.session():
+            if pipeline:
+                run_pipeline(conn, page_size=page_size, batch_size=batch_size, workers=workers,
+                             retry_passes=retry_passes)
+            else:
+                result = conn.query("MATCH (l:Law) RETURN l.number, l.text, l.book, l.year, l.source")
+                dead_letters = embed_records(conn, result)
+                for _ in range(retry_passes):
+                    if not dead_letters:
+                        break
+                    _wait_for_retry_pass(len(dead_letters))
+                    dead_letters = embed_records(conn, dead_letters)
+                if dead_letters:
+                    logging.warning(f"{len(dead_letters)} laws could not be embedded; run again to retry them.")
+            if snapshot:
+                with metrics.span("embed.snapshot"):
+                    export_snapshot(conn)
     except Exception as e:
         logging.error(f"Error in embedding generation: {e}")
+    finally:
+        stats = get_embedding_cache().stats()
+        logging.info(f"Embedding cache: {stats['hits']} hits, {stats['misses']} model calls")
+        metrics.print_summary(("embed.", "ollama.", "neo4j."))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate embeddings for the Law nodes in Neo4j.")
+    parser.add_argument("--pipeline", action="store_true", help="Paged, concurrent and resumable mode")
+    parser.add_argument("--page-size", type=int, default=EMBED_PAGE_SIZE, help="Pending laws fetched per page")
+    parser.add_argument("--batch-size", type=int, default=EMBED_BATCH_SIZE, help="Embeddings written per UNWIND transaction")
+    parser.add_argument("--workers", type=int, default=EMBED_WORKERS, help="Concurrent embedding requests")
+    parser.add_argument("--no-snapshot", dest="snapshot", action="store_false",
+                        help="Skip exporting the memory-mapped embedding snapshot")
+    parser.add_argument("--retry-passes", type=int, default=EMBED_RETRY_PASSES,
+                        help="Extra passes over the laws that failed to embed")
+    return parser.parse_args()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(**vars(parse_args()))
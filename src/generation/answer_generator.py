@@ -0,0 +1,194 @@
+"""
+This module answers a question from the retrieved law sections with a local
+Ollama model, streaming the answer token by token.
+
+Retrieval runs in a worker thread while the prompt header is assembled and the
+generation model is asked to load (an empty `/api/generate` request), so the
+first answer token is not delayed by a cold model on top of retrieval. The
+sections are then added to the prompt in rank order until ANSWER_CONTEXT_TOKENS
+is reached, which keeps the prompt, and so the prompt evaluation time, bounded
+however long the sections or their graph context are.
+
+Every request records its prompt size, time to first token (from the start of
+the request, retrieval included) and decode throughput, in the returned stats
+and as `generate.*` metrics.
+
+Functions:
+- format_section: Formats one retrieved section (and its context) for the prompt.
+- build_prompt: Builds the prompt from the retrieved sections within a token budget.
+- preload_model: Asks Ollama to load the generation model.
+- stream_answer: Streams the answer tokens of a prompt and records their timing.
+- answer_query: Retrieves the sections of a question and streams the answer.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from config.constants import (
+    OLLAMA_GENERATE_URL, OLLAMA_GENERATE_MODEL, ANSWER_CONTEXT_TOKENS, GENERATE_MAX_TOKENS,
+    GENERATE_TIMEOUT_SECONDS, GENERATE_PRELOAD, RETRIEVAL_STRATEGY
+)
+from src.database.law_keys import split_law_id
+from src.embeddings.chunking import count_tokens, split_into_chunks
+from src.monitoring import metrics
+from src.retriever.api_utils import stream_generation
+from src.retriever.backend_retriever import retrieve_similar_laws_cached
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROMPT_HEADER = (
+    "You are a legal assistant. Answer the question using only the law sections below, "
+    "and cite the section numbers you rely on. If the sections do not answer the question, say so.\n\n"
+    "Question: {query}\n\n"
+    "Sections:\n\n"
+)
+PROMPT_FOOTER = "Answer:"
+
+# Retrieval runs here while the request thread assembles the prompt and preloads the model
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="answer-retrieval")
+
+def format_section(result):
+    score, law_id, text, *context = result
+    book, year, source, number = split_law_id(law_id)
+    lines = [f"[Section {number}" + (f", {book} ({year}, {source})]" if book else "]"), text]
+    for item in (context[0] if context else []):
+        lines.append(f"{item['relation'].capitalize()} {item['number']}: {item['text']}")
+    return "\n".join(lines) + "\n\n"
+
+def build_prompt(query, results, token_budget=ANSWER_CONTEXT_TOKENS, header=None):
+    """
+    Builds the prompt from the retrieved sections, best first, within a token budget.
+
+    A section that does not fit ends the prompt, so a lower-ranked section never
+    displaces a better one. When even the best section does not fit, its
+    beginning is kept rather than sending no context at all.
+
+    Args:
+        results (list): (score, law_id, text[, context]) tuples sorted by rank.
+        token_budget (int): Maximum tokens of the prompt (counted as in `chunking`).
+        header (str): The formatted prompt header, when already assembled.
+
+    Returns:
+        tuple: (prompt, prompt_tokens, sections) where `sections` is the number of results used.
+    """
+    header = header if header is not None else PROMPT_HEADER.format(query=query)
+    remaining = token_budget - count_tokens(header) - count_tokens(PROMPT_FOOTER)
+    parts = [header]
+    for result in results:
+        block = format_section(result)
+        tokens = count_tokens(block)
+        if tokens > remaining:
+            if len(parts) == 1 and remaining > 0:
+                parts.append(split_into_chunks(block, remaining, 0)[0] + "\n\n")
+            break
+        parts.append(block)
+        remaining -= tokens
+    sections = len(parts) - 1
+    parts.append(PROMPT_FOOTER)
+    prompt = "".join(parts)
+    return prompt, count_tokens(prompt), sections
+
+def preload_model(model=OLLAMA_GENERATE_MODEL, url=OLLAMA_GENERATE_URL, session=None, timeout=GENERATE_TIMEOUT_SECONDS):
+    """
+    Asks Ollama to load the model (a request without a prompt); failures are only logged.
+    """
+    try:
+        with metrics.span("generate.preload"):
+            response = (session or requests).post(url, json={"model": model, "stream": False}, timeout=timeout)
+        if response.status_code != 200:
+            logging.warning(f"Could not preload generation model {model}: {response.text}")
+    except requests.RequestException as e:
+        logging.warning(f"Could not preload generation model {model}: {e}")
+
+def stream_answer(prompt, stats, model=OLLAMA_GENERATE_MODEL, url=OLLAMA_GENERATE_URL, session=None,
+                  timeout=GENERATE_TIMEOUT_SECONDS, started=None, max_tokens=GENERATE_MAX_TOKENS):
+    """
+    Streams the answer to a prompt.
+
+    Args:
+        stats (dict): Filled with `first_token_seconds`, `tokens`, `decode_seconds`
+            and `tokens_per_second` once the stream ends (or is abandoned).
+        started (float): `time.perf_counter()` at the start of the request; time to
+            first token is measured from it (default: from the generate call).
+
+    Yields:
+        str: The answer tokens, as the model produces them.
+    """
+    started = time.perf_counter() if started is None else started
+    first_token_at = None
+    tokens = 0
+    try:
+        for chunk in stream_generation(url, model, prompt, session=session, timeout=timeout,
+                                       options={"num_predict": max_tokens}):
+            token = chunk.get("response")
+            if token:
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                    stats["first_token_seconds"] = first_token_at - started
+                    metrics.record("generate.first_token", stats["first_token_seconds"])
+                tokens += 1
+                yield token
+            if chunk.get("done"):
+                stats["prompt_eval_count"] = chunk.get("prompt_eval_count")
+                stats["eval_count"] = chunk.get("eval_count")
+    except Exception as e:
+        logging.error(f"Error generating answer: {e}")
+        metrics.record("generate.decode", 0.0, items=tokens, error=True)
+        raise
+    finally:
+        decode_seconds = time.perf_counter() - first_token_at if first_token_at is not None else 0.0
+        stats["tokens"] = tokens
+        stats["decode_seconds"] = decode_seconds
+        # The first token ends the prompt evaluation; the rate covers the ones decoded after it
+        stats["tokens_per_second"] = (tokens - 1) / decode_seconds if tokens > 1 and decode_seconds > 0 else 0.0
+    metrics.record("generate.decode", decode_seconds, items=tokens)
+    logging.info(
+        f"Generated {tokens} tokens: first token {stats.get('first_token_seconds', 0.0) * 1000:.0f} ms, "
+        f"{stats['tokens_per_second']:.1f} tokens/s, prompt {stats.get('prompt_tokens', 0)} tokens."
+    )
+
+def _timed_retrieval(*args):
+    # Timed in the worker, so the preload running meanwhile is not counted as retrieval
+    started = time.perf_counter()
+    results, cache_hit = retrieve_similar_laws_cached(*args)
+    return results, cache_hit, time.perf_counter() - started
+
+def answer_query(query, top_k=3, strategy=RETRIEVAL_STRATEGY, context_depth=0, filters=None, cache=None,
+                 token_budget=ANSWER_CONTEXT_TOKENS, model=OLLAMA_GENERATE_MODEL, url=OLLAMA_GENERATE_URL,
+                 session=None, preload=GENERATE_PRELOAD):
+    """
+    Retrieves the sections for a question and starts streaming the answer.
+
+    Retrieval (through the result cache, see `retrieve_similar_laws_cached`) runs
+    in a worker while the prompt header is assembled and the model preloaded.
+
+    Returns:
+        tuple: (results, tokens, stats) where `tokens` is a generator of answer
+        tokens and `stats` holds `retrieval_seconds` (the retrieval alone, timed in
+        the worker), `preload_seconds`, `cache_hit`, `prompt_tokens`, `prompt_chars`
+        and `sections` now, and the generation timings once `tokens` is exhausted.
+    """
+    started = time.perf_counter()
+    retrieval = _executor.submit(_timed_retrieval, query, top_k, cache, strategy, context_depth, filters)
+    header = PROMPT_HEADER.format(query=query)
+    preload_seconds = 0.0
+    if preload:
+        preload_started = time.perf_counter()
+        preload_model(model, url, session)
+        preload_seconds = time.perf_counter() - preload_started
+    results, cache_hit, retrieval_seconds = retrieval.result()
+
+    prompt, prompt_tokens, sections = build_prompt(query, results, token_budget, header)
+    metrics.increment("generate.prompt_tokens", prompt_tokens)
+    stats = {
+        "retrieval_seconds": retrieval_seconds,
+        "preload_seconds": preload_seconds,
+        "cache_hit": cache_hit,
+        "prompt_tokens": prompt_tokens,
+        "prompt_chars": len(prompt),
+        "sections": sections,
+    }
+    tokens = stream_answer(prompt, stats, model, url, session, started=started)
+    return results, tokens, stats
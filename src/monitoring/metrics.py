@@ -0,0 +1,270 @@
+"""
+This module provides lightweight timers and counters for the hot paths.
+
+Stages (an Ollama call, a Neo4j query, parsing a document, scoring a query)
+are timed with the `timed` decorator or a `span` block and accumulate calls,
+items, errors, total and max seconds per stage name. When metrics are disabled
+(the default, see METRICS_ENABLED) a timed call costs one flag check and a span
+is a shared no-op object. With METRICS_OTEL_SPANS and the `opentelemetry-api`
+package installed, every span is also reported as an OpenTelemetry span.
+
+Servers expose the totals in the Prometheus text format (`start_exporters`,
+METRICS_PORT) and/or log a summary every METRICS_LOG_INTERVAL_SECONDS; batch
+jobs print a per-stage throughput table at the end of a run.
+
+Functions:
+- enable / disable / is_enabled: Switch collection on or off for the process.
+- timed: Decorator timing every call of a (sync or async) function as a stage.
+- span: Context manager timing a block as a stage.
+- record: Adds an externally measured duration to a stage.
+- increment: Adds to a counter.
+- snapshot / reset: Returns or clears the collected values.
+- render_prometheus: Formats the collected values in the Prometheus text format.
+- format_summary / print_summary: Per-stage throughput table.
+- start_metrics_server: Serves `/metrics` from a background thread.
+- start_log_summary: Logs the summary periodically from a background thread.
+- start_exporters: Starts the exporters configured in the environment (once per process).
+"""
+
+import functools
+import inspect
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config.constants import METRICS_ENABLED, METRICS_PORT, METRICS_LOG_INTERVAL_SECONDS, METRICS_OTEL_SPANS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PROMETHEUS_PREFIX = "lawchatbot"
+
+_enabled = METRICS_ENABLED
+_lock = threading.Lock()
+# stage -> [calls, items, errors, seconds, max_seconds]
+_timers = {}
+_counters = {}
+_tracer = None
+_exporters_started = False
+
+def _load_tracer():
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        logging.warning("METRICS_OTEL_SPANS is set but opentelemetry-api is not installed, spans are not exported.")
+        return None
+    return trace.get_tracer(__name__)
+
+if METRICS_OTEL_SPANS:
+    _tracer = _load_tracer()
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def record(stage, seconds, items=1, error=False):
+    if not _enabled:
+        return
+    with _lock:
+        timer = _timers.get(stage)
+        if timer is None:
+            timer = _timers[stage] = [0, 0, 0, 0.0, 0.0]
+        timer[0] += 1
+        timer[1] += items
+        timer[2] += int(error)
+        timer[3] += seconds
+        timer[4] = max(timer[4], seconds)
+
+def increment(counter, value=1):
+    if not _enabled:
+        return
+    with _lock:
+        _counters[counter] = _counters.get(counter, 0) + value
+
+class _Span:
+    """
+    Times one execution of a stage. `items` can be updated inside the block
+    (e.g. to the number of rows processed) and is added to the stage's items.
+    """
+
+    __slots__ = ("stage", "items", "_started", "_otel")
+
+    def __init__(self, stage, items):
+        self.stage = stage
+        self.items = items
+        self._otel = None
+
+    def __enter__(self):
+        if _tracer is not None:
+            self._otel = _tracer.start_as_current_span(self.stage)
+            self._otel.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        record(self.stage, time.perf_counter() - self._started, self.items, error=exc_type is not None)
+        if self._otel is not None:
+            self._otel.__exit__(exc_type, exc_val, exc_tb)
+        return False
+
+class _NullSpan:
+    """
+    Shared span returned while metrics are disabled; setting `items` on it is harmless.
+    """
+
+    items = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def span(stage, items=1):
+    """
+    Times the enclosed block as one call of `stage`.
+
+    Example:
+        with metrics.span("retrieve.score") as timer:
+            timer.items = len(index)
+            results = index.search(query_embedding, top_k)
+    """
+    return _Span(stage, items) if _enabled else _NULL_SPAN
+
+def timed(stage):
+    """
+    Decorator timing every call of the function as one call of `stage`.
+    """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _enabled:
+                    return await func(*args, **kwargs)
+                with _Span(stage, 1):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(stage, 1):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def snapshot():
+    """
+    Returns the collected values.
+
+    Returns:
+        dict: "stages" maps each stage to calls, items, errors, seconds and
+        max_seconds; "counters" maps each counter to its value.
+    """
+    with _lock:
+        stages = {
+            stage: dict(zip(("calls", "items", "errors", "seconds", "max_seconds"), timer))
+            for stage, timer in _timers.items()
+        }
+        return {"stages": stages, "counters": dict(_counters)}
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+def render_prometheus(prefix=PROMETHEUS_PREFIX):
+    values = snapshot()
+    lines = []
+    for metric, field, kind in (
+        ("stage_calls_total", "calls", "counter"),
+        ("stage_items_total", "items", "counter"),
+        ("stage_errors_total", "errors", "counter"),
+        ("stage_seconds_total", "seconds", "counter"),
+        ("stage_max_seconds", "max_seconds", "gauge"),
+    ):
+        lines.append(f"# TYPE {prefix}_{metric} {kind}")
+        for stage, stats in sorted(values["stages"].items()):
+            lines.append(f'{prefix}_{metric}{{stage="{stage}"}} {stats[field]}')
+    lines.append(f"# TYPE {prefix}_events_total counter")
+    for counter, value in sorted(values["counters"].items()):
+        lines.append(f'{prefix}_events_total{{event="{counter}"}} {value}')
+    return "\n".join(lines) + "\n"
+
+def format_summary(prefixes=None):
+    """
+    Formats a per-stage throughput table, limited to stages starting with one of `prefixes`.
+    """
+    values = snapshot()
+    lines = [f"{'stage':<24}{'calls':>8}{'items':>10}{'seconds':>10}{'items/s':>11}{'mean ms':>10}{'max ms':>10}"]
+    for stage, stats in sorted(values["stages"].items()):
+        if prefixes and not stage.startswith(tuple(prefixes)):
+            continue
+        rate = stats["items"] / stats["seconds"] if stats["seconds"] else 0.0
+        mean_ms = stats["seconds"] / stats["calls"] * 1000
+        lines.append(f"{stage:<24}{stats['calls']:>8}{stats['items']:>10}{stats['seconds']:>10.2f}"
+                     f"{rate:>11.1f}{mean_ms:>10.2f}{stats['max_seconds'] * 1000:>10.1f}")
+    for counter, value in sorted(values["counters"].items()):
+        if not prefixes or counter.startswith(tuple(prefixes)):
+            lines.append(f"{counter:<24}{value:>8}")
+    return "\n".join(lines)
+
+def print_summary(prefixes=None):
+    print(format_summary(prefixes))
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes are too frequent to log
+        pass
+
+def start_metrics_server(port=METRICS_PORT, host="0.0.0.0"):
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logging.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+def start_log_summary(interval=METRICS_LOG_INTERVAL_SECONDS):
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            logging.info("Metrics summary:\n" + format_summary())
+
+    threading.Thread(target=run, name="metrics-log", daemon=True).start()
+    return stop
+
+def start_exporters():
+    """
+    Starts the metrics server and/or the periodic log summary configured in the
+    environment. Only the first call in a process starts anything.
+    """
+    global _exporters_started
+    with _lock:
+        if _exporters_started or not _enabled:
+            return
+        _exporters_started = True
+    if METRICS_PORT:
+        start_metrics_server(METRICS_PORT)
+    if METRICS_LOG_INTERVAL_SECONDS > 0:
+        start_log_summary(METRICS_LOG_INTERVAL_SECONDS)
@@ -0,0 +1,155 @@
+"""
+This module provides an approximate nearest neighbour backend for the retrieval index.
+
+The IVF-flat index clusters the normalized Law embeddings with spherical
+k-means and keeps one inverted list of rows per centroid. A query only scores
+the rows of the `nprobe` closest lists, trading recall for latency.
+
+Classes:
+- IVFIndex: Inverted-file index with exact (flat) scoring inside the probed lists.
+
+Functions:
+- spherical_kmeans: Clusters row-normalized vectors by cosine similarity.
+"""
+
+import logging
+import numpy as np
+from config.constants import IVF_NLIST, IVF_NPROBE
+from src.retriever.vector_index import VectorIndex, normalize_rows
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Rows scored per matrix product while assigning vectors to centroids
+ASSIGN_BLOCK_SIZE = 65536
+
+def assign_to_centroids(vectors, centroids):
+    assignments = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_SIZE):
+        block = vectors[start:start + ASSIGN_BLOCK_SIZE]
+        assignments[start:start + ASSIGN_BLOCK_SIZE] = np.argmax(block @ centroids.T, axis=1)
+    return assignments
+
+def spherical_kmeans(vectors, nlist, iterations=20, seed=0):
+    """
+    Clusters row-normalized vectors into `nlist` unit-norm centroids.
+
+    Args:
+        vectors (np.ndarray): Row-normalized float32 matrix.
+        nlist (int): Number of clusters.
+        iterations (int): Number of Lloyd iterations.
+        seed (int): Seed for the initial centroid sample.
+
+    Returns:
+        tuple: (centroids, assignments)
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=nlist, replace=False)].copy()
+    assignments = assign_to_centroids(vectors, centroids)
+    for _ in range(iterations):
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, vectors)
+        empty = np.flatnonzero(~sums.any(axis=1))
+        if len(empty):
+            # Re-seed empty clusters with random rows so every list stays usable
+            sums[empty] = vectors[rng.choice(len(vectors), size=len(empty), replace=False)]
+        centroids = normalize_rows(sums)
+        new_assignments = assign_to_centroids(vectors, centroids)
+        if np.array_equal(new_assignments, assignments):
+            break
+        assignments = new_assignments
+    return centroids, assignments
+
+class IVFIndex(VectorIndex):
+    """
+    IVF-flat index over the Law embeddings.
+
+    Attributes:
+        nlist (int): Number of inverted lists; 0 picks about sqrt(n) at training time.
+        nprobe (int): Number of lists scanned per query (the recall/latency knob).
+        centroids (np.ndarray): Unit-norm cluster centroids, empty until trained.
+        assignments (np.ndarray): List id of every row.
+    """
+
+    backend = "ivf"
+
+    def __init__(self, ids=None, texts=None, vectors=None, watermark=0, nlist=IVF_NLIST, nprobe=IVF_NPROBE):
+        super().__init__(ids, texts, vectors, watermark)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self._lists = None
+        if len(self):
+            self.train()
+
+    @property
+    def is_trained(self):
+        return len(self.centroids) > 0
+
+    def train(self, iterations=20, seed=0):
+        """
+        Clusters the current rows and rebuilds every inverted list.
+        """
+        nlist = self.nlist or int(round(np.sqrt(len(self))))
+        nlist = min(max(nlist, 1), len(self))
+        if nlist == 0:
+            return
+        self.centroids, self.assignments = spherical_kmeans(self.vectors, nlist, iterations, seed)
+        self._lists = None
+        logging.info(f"Trained IVF index with {nlist} lists over {len(self)} rows.")
+
+    def upsert(self, ids, texts, vectors):
+        rows = super().upsert(ids, texts, vectors)
+        if rows and self.is_trained:
+            # New and updated rows join their nearest existing list; the centroids
+            # themselves only move on the next full rebuild/train.
+            assignments = np.zeros(len(self), dtype=np.int32)
+            assignments[:len(self.assignments)] = self.assignments
+            rows = np.asarray(rows)
+            assignments[rows] = assign_to_centroids(self.vectors[rows], self.centroids)
+            self.assignments = assignments
+            self._lists = None
+        return rows
+
+    def rebuild(self, records):
+        self.centroids = np.zeros((0, 0), dtype=np.float32)
+        self.assignments = np.zeros(0, dtype=np.int32)
+        super().rebuild(records)
+        if len(self):
+            self.train()
+
+    def inverted_lists(self):
+        if self._lists is None:
+            order = np.argsort(self.assignments, kind="stable")
+            bounds = np.searchsorted(self.assignments[order], np.arange(len(self.centroids) + 1))
+            self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+        return self._lists
+
+    def search(self, query_vector, top_k=3, nprobe=None):
+        if len(self) == 0 or top_k <= 0:
+            return []
+        query = normalize_rows(query_vector)
+        if not self.is_trained:
+            return self._top_k(np.arange(len(self)), self.vectors @ query, top_k)
+        nprobe = min(nprobe or self.nprobe, len(self.centroids))
+        centroid_scores = self.centroids @ query
+        probed = np.argpartition(-centroid_scores, nprobe - 1)[:nprobe]
+        lists = self.inverted_lists()
+        rows = np.concatenate([lists[i] for i in probed])
+        if len(rows) == 0:
+            return []
+        return self._top_k(rows, self.vectors[rows] @ query, top_k)
+
+    def _extra_arrays(self):
+        return {
+            "centroids": self.centroids,
+            "assignments": self.assignments,
+            "nlist": np.array(self.nlist),
+        }
+
+    def _load_extra_arrays(self, data, path):
+        self.centroids = data["centroids"].astype(np.float32, copy=False)
+        self.assignments = data["assignments"].astype(np.int32, copy=False)
+        self.nlist = int(data["nlist"])
+        self._lists = None
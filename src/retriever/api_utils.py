@@ -1,13 +1,31 @@
 """
 This module provides utility functions for handling API requests.
 
+Classes:
+- EmbeddingHTTPError: Raised when the OLLAMA API answers with an error status.
+- GenerationHTTPError: Raised when the OLLAMA generate API answers with an error.
+
 Functions:
 - fetch_embedding: Sends a request to the OLLAMA API to fetch embeddings.
+- fetch_embeddings_async: Fetches a batch of embeddings from the OLLAMA batch API (asyncio).
+- stream_generation: Streams the response chunks of the OLLAMA generate API.
 """
 
+import json
 import requests
+from src.monitoring import metrics
+
+class EmbeddingHTTPError(Exception):
+    """
+    The OLLAMA API answered with a non-200 status (kept in `status_code`).
+    """
 
-def fetch_embedding(url, model, text):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+@metrics.timed("ollama.embed")
+def fetch_embedding(url, model, text, session=None, timeout=None):
     """
     Fetches an embedding for the given text using the specified API.
 
@@ -15,16 +33,88 @@ def fetch_embedding(url, model, text):
         url (str): The API endpoint URL.
         model (str): The model to use for generating embeddings.
         text (str): The input text to embed.
+        session (requests.Session): Keep-alive session to send the request with (optional).
+        timeout (float): Seconds to wait for the connection and for the response (optional).
 
     Returns:
         list: The embedding vector.
 
     Raises:
-        Exception: If the API request fails.
+        EmbeddingHTTPError: If the API answers with an error status.
+        requests.RequestException: If the request itself fails.
     """
     payload = {"model": model, "prompt": text}
-    response = requests.post(url, json=payload)
+    response = (session or requests).post(url, json=payload, timeout=timeout)
     if response.status_code == 200:
         return response.json()["embedding"]
     else:
-        raise Exception(f"Failed to fetch embedding: {response.text}")
+        raise EmbeddingHTTPError(f"Failed to fetch embedding: {response.text}", response.status_code)
+
+@metrics.timed("ollama.embed_batch")
+async def fetch_embeddings_async(client, url, model, texts):
+    """
+    Fetches embeddings for several texts in one call to the OLLAMA batch endpoint.
+
+    Args:
+        client (httpx.AsyncClient): The HTTP client to send the request with.
+        url (str): The batch API endpoint URL (`/api/embed`).
+        model (str): The model to use for generating embeddings.
+        texts (list): The input texts to embed.
+
+    Returns:
+        list: One embedding vector per input text.
+
+    Raises:
+        Exception: If the API request fails.
+    """
+    payload = {"model": model, "input": list(texts)}
+    response = await client.post(url, json=payload)
+    if response.status_code == 200:
+        return response.json()["embeddings"]
+    else:
+        raise Exception(f"Failed to fetch embeddings: {response.text}")
+
+class GenerationHTTPError(Exception):
+    """
+    The OLLAMA generate API answered with a non-200 status or an error chunk.
+    """
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+def stream_generation(url, model, prompt, session=None, timeout=None, options=None):
+    """
+    Calls the OLLAMA generate API with streaming and yields its chunks as they arrive.
+
+    Args:
+        url (str): The generate endpoint URL (`/api/generate`).
+        model (str): The generation model.
+        prompt (str): The full prompt.
+        options (dict): Model options such as `num_predict` (optional).
+
+    Yields:
+        dict: One chunk per line of the stream; "response" holds the next
+        token(s), and the last chunk has "done" set and the eval counts.
+
+    Raises:
+        GenerationHTTPError: If the API answers with an error status or streams an error.
+    """
+    payload = {"model": model, "prompt": prompt, "stream": True}
+    if options:
+        payload["options"] = options
+    response = (session or requests).post(url, json=payload, stream=True, timeout=timeout)
+    try:
+        if response.status_code != 200:
+            raise GenerationHTTPError(f"Failed to generate: {response.text}", response.status_code)
+        for line in response.iter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if "error" in chunk:
+                raise GenerationHTTPError(f"Failed to generate: {chunk['error']}")
+            yield chunk
+            if chunk.get("done"):
+                break
+    finally:
+        response.close()
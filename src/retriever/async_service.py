@@ -0,0 +1,184 @@
+"""
+This module provides an asyncio retrieval service for serving many concurrent users.
+
+It exposes the same top-k API as `retrieve_similar_laws`, but never blocks the
+event loop on the embedding call, Neo4j, the embedding cache's SQLite store or
+the index scan (the blocking parts run in worker threads):
+
+- identical in-flight queries (same normalized text and top_k) share one retrieval;
+- query embeddings requested within EMBED_BATCH_WINDOW_MS of each other are sent
+  to Ollama's batch `/api/embed` endpoint as one call;
+- scoring uses the in-process vector index, with an async Neo4j scan as fallback
+  (a worker thread running the sync scan when the installed driver has no async API).
+
+Classes:
+- AsyncRetrievalService: Coalescing, micro-batching async retriever.
+"""
+
+import asyncio
+import logging
+import httpx
+from config.constants import (
+    NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, OLLAMA_MODEL, OLLAMA_EMBED_URL,
+    EMBED_BATCH_WINDOW_MS, EMBED_MAX_BATCH_SIZE
+)
+from src.monitoring import metrics
+from src.retriever.api_utils import fetch_embeddings_async
+from src.retriever.backend_retriever import (
+    get_vector_index, scan_similar_laws, search_vector_index, max_sim_sections, cosine_similarity, SCAN_LAWS_QUERY
+)
+from src.retriever.embedding_cache import get_embedding_cache
+from src.retriever.result_cache import normalize_query
+
+try:
+    from neo4j import AsyncGraphDatabase
+except ImportError:  # neo4j < 5 has no asyncio driver
+    AsyncGraphDatabase = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class AsyncRetrievalService:
+    """
+    Async top-k retrieval with request coalescing and micro-batched query embedding.
+
+    Args:
+        embed_batch (callable): Async function mapping a list of texts to their embeddings;
+            defaults to Ollama's batch endpoint at `embed_url`.
+        embed_url (str): Ollama batch embedding endpoint.
+        index (VectorIndex): Index to search; defaults to the process-wide index.
+        cache (EmbeddingCache): Embedding cache consulted before batching.
+        batch_window_ms (float): How long the first query of a batch waits for others.
+        max_batch_size (int): Flush a batch as soon as it holds this many texts.
+    """
+
+    def __init__(self, embed_batch=None, index=None, cache=None, embed_url=OLLAMA_EMBED_URL,
+                 batch_window_ms=EMBED_BATCH_WINDOW_MS, max_batch_size=EMBED_MAX_BATCH_SIZE):
+        self._embed_batch = embed_batch
+        self.embed_url = embed_url
+        self._index = index
+        self._cache = cache if cache is not None else get_embedding_cache()
+        self.batch_window = batch_window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._client = None
+        self._neo4j_driver = None
+        self._inflight = {}
+        self._pending = {}
+        self._flush_handle = None
+        # Running batch embedding tasks; the loop only keeps weak references to tasks
+        self._batch_tasks = set()
+        self.stats = {"requests": 0, "coalesced": 0, "embed_calls": 0, "embedded_texts": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        if self._batch_tasks:
+            await asyncio.gather(*self._batch_tasks, return_exceptions=True)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self._neo4j_driver is not None:
+            await self._neo4j_driver.close()
+            self._neo4j_driver = None
+
+    async def retrieve(self, query, top_k=3):
+        """
+        Returns the top-k (score, law_id, text) tuples for the query.
+        """
+        self.stats["requests"] += 1
+        key = (normalize_query(query), top_k)
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._retrieve(query, top_k))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled caller does not cancel the retrieval shared with others
+        return await asyncio.shield(task)
+
+    # Coalesced requests share one call, so this counts distinct retrievals
+    @metrics.timed("async.retrieve")
+    async def _retrieve(self, query, top_k):
+        embedding = await self.embed(query)
+        index = self._index if self._index is not None else await asyncio.to_thread(get_vector_index)
+        if index is not None and len(index) > 0:
+            return await asyncio.to_thread(search_vector_index, index, embedding, top_k)
+        return await self._scan(embedding, top_k)
+
+    async def embed(self, text):
+        """
+        Returns the embedding of the text, joining the current micro-batch on a cache miss.
+        """
+        # A miss in the in-memory LRU reads SQLite
+        embedding = await asyncio.to_thread(self._cache.get, OLLAMA_MODEL, text)
+        if embedding is not None:
+            return embedding
+        future = self._pending.get(text)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[text] = future
+            if len(self._pending) >= self.max_batch_size:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.batch_window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.ensure_future(self._embed_pending(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _embed_pending(self, batch):
+        texts = list(batch)
+        self.stats["embed_calls"] += 1
+        self.stats["embedded_texts"] += len(texts)
+        try:
+            embeddings = await self._call_embed_batch(texts)
+        except Exception as e:
+            logging.error(f"Error fetching {len(texts)} query embeddings: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        # Cached (in one SQLite transaction, off the loop) before the waiters resume, so a repeat query hits
+        try:
+            await asyncio.to_thread(self._cache.put_many, OLLAMA_MODEL, list(zip(texts, embeddings)))
+        except Exception as e:
+            logging.warning(f"Could not cache {len(texts)} query embeddings: {e}")
+        for text, embedding in zip(texts, embeddings):
+            if not batch[text].done():
+                batch[text].set_result(embedding)
+
+    async def _call_embed_batch(self, texts):
+        if self._embed_batch is not None:
+            return await self._embed_batch(texts)
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=30)
+        return await fetch_embeddings_async(self._client, self.embed_url, OLLAMA_MODEL, texts)
+
+    async def _scan(self, embedding, top_k):
+        if AsyncGraphDatabase is None:
+            return await asyncio.to_thread(scan_similar_laws, embedding, top_k)
+        if self._neo4j_driver is None:
+            self._neo4j_driver = AsyncGraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USER, NEO4J_PASSWORD))
+        async with self._neo4j_driver.session() as session:
+            result = await session.run(SCAN_LAWS_QUERY)
+            records = [record async for record in result]
+        return await asyncio.to_thread(_score_records, records, embedding, top_k)
+
+def _score_records(records, embedding, top_k):
+    scored = [
+        (cosine_similarity(embedding, record["l.embedding"]), record["law_id"], record["l.text"])
+        for record in records if record["l.embedding"]
+    ]
+    return max_sim_sections(scored, top_k)
@@ -2,47 +2,582 @@
 This module retrieves similar laws based on a query using embeddings.
 
 Functions:
-- get_embedding: Fetches an embedding for a given text using the OLLAMA API.
+- get_embedding: Fetches an embedding for a given text, through the embedding cache.
 - cosine_similarity: Computes the cosine similarity between two vectors.
-- retrieve_similar_laws: Retrieves the top-k similar laws for a given query.
+- load_startup_index: Loads the embedding snapshot (or the persisted index) at process start.
+- get_vector_index: Returns the process-wide vector index, refreshing it periodically.
+- scan_similar_laws: Scores every (matching) Law node in the database (fallback when no index exists).
+- has_server_vector_index: Detects whether Neo4j serves the native vector index on Law.embedding.
+- query_server_vector_index: Runs the top-k search inside Neo4j with db.index.vector.queryNodes.
+- max_sim_sections: Collapses section and chunk rows to sections, scored by their best row.
+- search_vector_index: Searches the loaded index for sections, restricted to the metadata filters.
+- retrieve_similar_laws: Retrieves the top-k similar laws for a given query (timed per stage), reusing
+  the results of a near-duplicate recent query from the semantic cache.
+- semantic_cache_stats: Hit rate and latency saved by the semantic cache.
+- get_bm25_index: Returns the lexical index, reloaded when the importer rewrites it.
+- reciprocal_rank_fusion: Fuses several ranked result lists.
+- get_citation_index: Returns the section-number trie over the loaded vector (or BM25) index.
+- resolve_citation: Answers a citation query ("Section 4.2") by exact lookup, without Ollama.
+- routing_stats: Per-route query counts, latency and citation hit rate.
+- retrieve_laws: Routes citations to `resolve_citation`, other queries to the vector, lexical, hybrid or auto strategy.
+- retrieve_laws_with_context: Retrieves laws and expands them with their graph context.
+- get_corpus_version: Returns a token that changes whenever the embedded corpus changes.
+- retrieve_similar_laws_cached: Cached retrieval keyed on (normalized query, top_k, filters, corpus version).
+- get_filter_options: Books, years and sources that retrieval can be filtered on.
+
+Retrieval functions take optional metadata `filters` (see `metadata_filters.make_filters`).
 """
 
-from config.constants import OLLAMA_URL, OLLAMA_MODEL
+from config.constants import (
+    OLLAMA_MODEL, VECTOR_INDEX_PATH, VECTOR_INDEX_REFRESH_SECONDS, NEO4J_VECTOR_INDEX, RETRIEVAL_MODE,
+    RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS, BM25_INDEX_PATH, RETRIEVAL_STRATEGY, HYBRID_CANDIDATES,
+    LEXICAL_MAX_TERMS, CONTEXT_DEPTH, CONTEXT_TOKEN_BUDGET, VECTOR_INDEX_BACKEND, EMBEDDING_SNAPSHOT_PATH,
+    CITATION_ROUTING, VECTOR_INDEX_PARTITIONED, SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_TTL_SECONDS
+)
 from src.database.neo4j_utils import Neo4jConnection
-from src.retriever.api_utils import fetch_embedding
+from src.database.law_keys import law_id_expression, chunk_law_id, is_chunk_id, CHUNK_SEPARATOR
+from src.monitoring import metrics
+from src.retriever.embedding_client import get_embedding_client
+from src.retriever.embedding_cache import get_embedding_cache
+from src.retriever.context_expansion import expand_context
+from src.retriever.bm25_index import load_bm25_index, tokenize
+from src.retriever.citation_router import (
+    CitationIndex, RoutingStats, book_aliases, looks_like_citation, parse_citation
+)
+from src.retriever.metadata_filters import (
+    FILTER_CONDITION, cypher_filter_parameters, filter_results, filters_key
+)
+from src.retriever.partitioned_index import PartitionedIndex, partition_index
+from src.retriever.result_cache import ResultCache, normalize_query
+from src.retriever.semantic_cache import SemanticCache
+from src.retriever.snapshot import load_snapshot, is_snapshot_fresh
+from src.retriever.vector_index import load_index, EMBEDDING_CORPUS_VERSION_QUERY
 import numpy as np
 import requests
 import os
+import threading
+import time
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 def get_embedding(text):
-    return fetch_embedding(OLLAMA_URL, OLLAMA_MODEL, text)
+    return get_embedding_cache().get_or_fetch(
+        OLLAMA_MODEL, text, lambda: get_embedding_client().embed(text)
+    )
 
 def cosine_similarity(vec1, vec2):
     vec1, vec2 = np.array(vec1), np.array(vec2)
     return np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
 
-def retrieve_similar_laws(query, top_k=3):
+def load_startup_index():
+    """
+    Returns the index a new process starts from, without pulling every embedding from Neo4j.
+
+    The flat backend memory-maps the embedding snapshot and only asks Neo4j for
+    the rows embedded since the snapshot when its corpus version is stale.
+    Other backends, or a missing snapshot, load the persisted index file.
+    With VECTOR_INDEX_PARTITIONED the index is split per document (the snapshot
+    partitions are slices of the mapping).
+    """
+    index = load_snapshot(EMBEDDING_SNAPSHOT_PATH) if VECTOR_INDEX_BACKEND == "flat" else None
+    if index is None:
+        index = load_index(VECTOR_INDEX_PATH)
+    else:
+        try:
+            with Neo4jConnection() as conn:
+                if not is_snapshot_fresh(index, conn):
+                    logging.info("Embedding snapshot is stale, pulling newer embeddings from Neo4j.")
+                    index.refresh(conn)
+        except Exception as e:
+            logging.warning(f"Could not check the embedding snapshot version, serving it as is: {e}")
+    return partition_index(index) if VECTOR_INDEX_PARTITIONED else index
+
+# Loaded once per process; None until the first query or when no index has been built
+_vector_index = None
+_vector_index_refreshed_at = 0.0
+# Held while loading or refreshing; searches never take it
+_vector_index_lock = threading.Lock()
+
+def get_vector_index():
+    """
+    Returns the process-wide vector index, shared by every thread (Streamlit
+    sessions, the answer generation workers).
+
+    The first caller loads it while the others wait. Afterwards, once every
+    VECTOR_INDEX_REFRESH_SECONDS, one caller refreshes a copy of the index and
+    swaps it in; searches in flight on other threads keep the index they started with.
+    """
+    global _vector_index, _vector_index_refreshed_at
+    if _vector_index is None:
+        with _vector_index_lock:
+            if _vector_index is None:
+                _vector_index = load_startup_index()
+                _vector_index_refreshed_at = time.monotonic()
+        return _vector_index
+    if time.monotonic() - _vector_index_refreshed_at < VECTOR_INDEX_REFRESH_SECONDS:
+        return _vector_index
+    # Whoever holds the lock refreshes; the other threads keep serving the current index
+    if not _vector_index_lock.acquire(blocking=False):
+        return _vector_index
     try:
-        query_embedding = get_embedding(query)
+        _vector_index_refreshed_at = time.monotonic()
+        index = _vector_index.copy()
         with Neo4jConnection() as conn:
-            result = conn.query("MATCH (l:Law) RETURN l.number, l.text, l.embedding")
-            scored = []
-            for record in result:
-                if record["l.embedding"]:
-                    score = cosine_similarity(query_embedding, record["l.embedding"])
-                    scored.append((score, record["l.number"], record["l.text"]))
-            scored.sort(reverse=True)
-            return scored[:top_k]
+            if index.refresh(conn):
+                index.save(VECTOR_INDEX_PATH)
+        _vector_index = index
+    except Exception as e:
+        logging.warning(f"Vector index refresh failed, serving the loaded index: {e}")
+    finally:
+        _vector_index_lock.release()
+    return _vector_index
+
+_SCAN_CHUNKS = f"""
+    MATCH (l:Law)-[:HAS_CHUNK]->(c:Chunk)
+    {{where}}
+    RETURN {law_id_expression('l')} + '{CHUNK_SEPARATOR}' + toString(c.position) AS law_id, l.text AS `l.text`,
+           c.embedding AS `l.embedding`
+"""
+
+SCAN_LAWS_QUERY = f"""
+    MATCH (l:Law) RETURN {law_id_expression('l')} AS law_id, l.text, l.embedding
+    UNION ALL
+    {_SCAN_CHUNKS.format(where="")}
+"""
+
+# The filter is evaluated in Neo4j, so only the matching nodes' embeddings are transferred
+FILTERED_SCAN_LAWS_QUERY = f"""
+    MATCH (l:Law)
+    WHERE {FILTER_CONDITION}
+    RETURN {law_id_expression('l')} AS law_id, l.text, l.embedding
+    UNION ALL
+    {_SCAN_CHUNKS.format(where=f"WHERE {FILTER_CONDITION}")}
+"""
+
+def max_sim_sections(results, top_k=3):
+    """
+    Collapses ranked (score, row id, text) results to sections: a long section
+    scores the best of its own row and its chunk rows (max-sim).
+
+    Returns:
+        list: Up to top_k (score, law_id, text) tuples, one per section.
+    """
+    sections, seen = [], set()
+    for score, row_id, text in sorted(results, key=lambda result: result[0], reverse=True):
+        law_id = chunk_law_id(row_id)
+        if law_id not in seen:
+            seen.add(law_id)
+            sections.append((score, law_id, text))
+            if len(sections) == top_k:
+                break
+    return sections
+
+def scan_similar_laws(query_embedding, top_k=3, filters=None):
+    with Neo4jConnection() as conn:
+        if filters:
+            result = conn.query(FILTERED_SCAN_LAWS_QUERY, parameters=cypher_filter_parameters(filters))
+        else:
+            result = conn.query(SCAN_LAWS_QUERY)
+        scored = []
+        for record in result:
+            if record["l.embedding"]:
+                score = cosine_similarity(query_embedding, record["l.embedding"])
+                scored.append((score, record["law_id"], record["l.text"]))
+        return max_sim_sections(scored, top_k)
+
+SERVER_VECTOR_QUERY = f"""
+    CALL db.index.vector.queryNodes($index_name, $top_k, $embedding)
+    YIELD node, score
+    RETURN score, {law_id_expression("node")} AS law_id, node.text AS text
+"""
+
+# None = not checked yet; re-checked every VECTOR_INDEX_REFRESH_SECONDS and after a failed query
+_server_vector_index_available = None
+_server_vector_index_checked_at = 0.0
+
+def has_server_vector_index(conn):
+    """
+    Returns whether Neo4j serves NEO4J_VECTOR_INDEX and it is ONLINE.
+
+    The answer is kept for VECTOR_INDEX_REFRESH_SECONDS, so an index created or
+    dropped meanwhile, or a transient error of the check itself, only decides
+    the retrieval mode until the next check.
+    """
+    global _server_vector_index_available, _server_vector_index_checked_at
+    if (_server_vector_index_available is None
+            or time.monotonic() - _server_vector_index_checked_at >= VECTOR_INDEX_REFRESH_SECONDS):
+        try:
+            result = list(conn.query(
+                "SHOW INDEXES YIELD name, type, state WHERE name = $name AND type = 'VECTOR' RETURN state",
+                parameters={"name": NEO4J_VECTOR_INDEX}
+            ))
+            _server_vector_index_available = bool(result) and result[0]["state"] == "ONLINE"
+        except Exception as e:
+            logging.info(f"Server-side vector index unavailable, using local retrieval: {e}")
+            _server_vector_index_available = False
+        _server_vector_index_checked_at = time.monotonic()
+    return _server_vector_index_available
+
+def query_server_vector_index(conn, query_embedding, top_k=3):
+    result = conn.query(
+        SERVER_VECTOR_QUERY,
+        parameters={"index_name": NEO4J_VECTOR_INDEX, "top_k": top_k, "embedding": list(query_embedding)}
+    )
+    # Neo4j reports cosine scores rescaled to [0, 1]; map them back to the cosine similarity
+    return [(2 * record["score"] - 1, record["law_id"], record["text"]) for record in result]
+
+def search_vector_index(index, query_embedding, top_k=3, filters=None):
+    """
+    Searches the index for the top-k sections passing the filters. A partitioned
+    index only scans the partitions of the matching documents. Rows are collapsed
+    to sections with `max_sim_sections`; while chunk rows of the same sections
+    (or, on a single index, filtered-out rows) leave fewer than top_k sections,
+    the search is repeated with four times as many candidates.
+    """
+    partitioned = isinstance(index, PartitionedIndex)
+    size = index.size(filters) if partitioned else len(index)
+    # Items count the searched rows, so items/s is the scan rate of a flat index
+    with metrics.span("retrieve.score", items=size):
+        candidates = top_k
+        while True:
+            if partitioned:
+                results = index.search(query_embedding, candidates, filters)
+            else:
+                results = filter_results(index.search(query_embedding, candidates), filters)
+            sections = max_sim_sections(results, top_k)
+            if len(sections) >= top_k or candidates >= size:
+                return sections
+            candidates = min(size, candidates * 4)
+
+# Built at import rather than on first use, and locked internally, so retrieval workers share it safely
+_semantic_cache = SemanticCache(SEMANTIC_CACHE_SIZE, SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_TTL_SECONDS)
+
+def semantic_cache_stats():
+    """
+    Returns the semantic cache hits, misses, hit rate, size and the retrieval
+    time saved by its hits (total seconds and mean milliseconds per hit).
+    """
+    return _semantic_cache.stats()
+
+@metrics.timed("retrieve.total")
+def retrieve_similar_laws(query, top_k=3, mode=RETRIEVAL_MODE, filters=None, semantic_cache=None):
+    """
+    Retrieves the top-k laws most similar to the query.
+
+    The query is always embedded; when a recent query with the same top_k and
+    filters embedded within SEMANTIC_CACHE_THRESHOLD of it (and the corpus has
+    not changed since), its results are returned without searching.
+
+    Returns:
+        list: (score, law_id, text) tuples sorted by descending score.
+    """
+    if semantic_cache is None:
+        semantic_cache = _semantic_cache
+    try:
+        with metrics.span("retrieve.embed"):
+            query_embedding = get_embedding(query)
+        if not semantic_cache.enabled:
+            return _search_similar_laws(query_embedding, top_k, mode, filters)
+        key = (top_k, mode, filters_key(filters))
+        version = get_corpus_version()
+        results = semantic_cache.get(query_embedding, key, version)
+        if results is None:
+            started = time.perf_counter()
+            results = _search_similar_laws(query_embedding, top_k, mode, filters)
+            semantic_cache.put(query_embedding, results, key, version, time.perf_counter() - started)
+        return results
     except Exception as e:
         logging.error(f"Error retrieving similar laws: {e}")
         raise
 
+def _search_similar_laws(query_embedding, top_k, mode, filters):
+    global _server_vector_index_available
+    # db.index.vector.queryNodes cannot pre-filter, filtered queries use the local partitions
+    if mode in ("server", "auto") and not filters:
+        with Neo4jConnection() as conn:
+            if has_server_vector_index(conn):
+                try:
+                    with metrics.span("retrieve.server_search"):
+                        return query_server_vector_index(conn, query_embedding, top_k)
+                except Exception as e:
+                    # The index may have been dropped: check it again on the next query
+                    _server_vector_index_available = None
+                    logging.warning(f"Server-side vector search failed, falling back to local retrieval: {e}")
+        if mode == "server":
+            logging.warning("RETRIEVAL_MODE=server but no vector index is online, falling back to local retrieval.")
+    index = get_vector_index()
+    if index is not None and len(index) > 0:
+        return search_vector_index(index, query_embedding, top_k, filters)
+    with metrics.span("retrieve.scan"):
+        return scan_similar_laws(query_embedding, top_k, filters)
+
+_bm25_index = None
+_bm25_index_mtime = None
+# Held while (re)loading, so concurrent first requests load the file once
+_bm25_index_lock = threading.Lock()
+
+def get_bm25_index():
+    global _bm25_index, _bm25_index_mtime
+    try:
+        mtime = os.path.getmtime(BM25_INDEX_PATH)
+    except OSError:
+        return _bm25_index
+    if mtime != _bm25_index_mtime:
+        with _bm25_index_lock:
+            if mtime != _bm25_index_mtime:
+                _bm25_index = load_bm25_index(BM25_INDEX_PATH)
+                _bm25_index_mtime = mtime
+    return _bm25_index
+
+def reciprocal_rank_fusion(result_lists, top_k=3, k=60):
+    """
+    Fuses ranked (score, law_id, text) lists with reciprocal rank fusion.
+
+    Returns:
+        list: (fused score, law_id, text) tuples sorted by descending fused score.
+    """
+    fused, texts = {}, {}
+    for results in result_lists:
+        for rank, (_, law_id, text) in enumerate(results):
+            fused[law_id] = fused.get(law_id, 0.0) + 1.0 / (k + rank + 1)
+            texts[law_id] = text
+    ranked = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    return [(score, law_id, texts[law_id]) for law_id, score in ranked]
+
+_citation_index = None
+_citation_index_version = None
+# Held while building; the index is published before its version, so a matching version means it is complete
+_citation_index_lock = threading.Lock()
+
+def get_citation_index():
+    """
+    Returns the citation trie over the rows of the loaded vector index (or of
+    the BM25 index when no vector index is loaded), rebuilt whenever that index
+    changes; None when neither exists.
+    """
+    global _citation_index, _citation_index_version
+    index = get_vector_index()
+    if index is not None and len(index) > 0:
+        version = ("vector", id(index), len(index), index.watermark)
+        rows = lambda: (
+            (law_id, text) for law_id, text in zip(index.ids, index.texts) if not is_chunk_id(law_id)
+        )
+    else:
+        lexical_index = get_bm25_index()
+        if lexical_index is None or len(lexical_index) == 0:
+            return None
+        version = ("lexical", id(lexical_index), len(lexical_index))
+        rows = lambda: lexical_index.sections.values()
+    if version != _citation_index_version:
+        with _citation_index_lock:
+            if version != _citation_index_version:
+                _citation_index = CitationIndex(rows())
+                _citation_index_version = version
+    return _citation_index
+
+# Uses the law_number index: an exact seek plus a prefix range for the sub-sections
+CITATION_QUERY = f"""
+    MATCH (l:Law)
+    WHERE (l.number = $number OR l.number STARTS WITH $prefix) AND (size($cited_books) = 0 OR l.book IN $cited_books)
+      AND {FILTER_CONDITION}
+    RETURN {law_id_expression('l')} AS law_id, l.text AS text, size(split(l.number, '.')) AS depth
+    ORDER BY depth
+    LIMIT $top_k
+"""
+
+_book_aliases = None
+_book_aliases_lock = threading.Lock()
+
+def _get_book_aliases(conn):
+    global _book_aliases
+    if _book_aliases is None:
+        with _book_aliases_lock:
+            if _book_aliases is None:
+                records = conn.query(
+                    "MATCH (l:Law) RETURN DISTINCT l.book AS book, l.book + '_' + l.year + '_' + l.source AS document"
+                )
+                _book_aliases = {
+                    alias: record["book"] for record in records if record["book"]
+                    for alias in book_aliases(record["book"], record["document"])
+                }
+    return _book_aliases
+
+def resolve_citation(query, top_k=3, filters=None):
+    """
+    Answers a citation query ("Section 7", "s. 4.2 of the Muslim Family Laws
+    Ordinance") from the citation trie, or with an index seek in Neo4j when no
+    local index is loaded. Never calls Ollama.
+
+    Returns:
+        list: (score, law_id, text) tuples (empty when the cited section does not
+        exist), or None when the query is not a citation.
+    """
+    if not looks_like_citation(query):
+        return None
+    index = get_citation_index()
+    if index is not None:
+        return index.resolve(query, top_k, filters)
+    with Neo4jConnection() as conn:
+        citation = parse_citation(query, _get_book_aliases(conn))
+        if citation is None:
+            return None
+        number, books = citation
+        result = conn.query(CITATION_QUERY, parameters={
+            "number": number, "prefix": f"{number}.", "cited_books": sorted(books), "top_k": top_k,
+            **cypher_filter_parameters(filters),
+        })
+    depth = number.count(".") + 1
+    return [(1.0 / (1 + record["depth"] - depth), record["law_id"], record["text"]) for record in result]
+
+_routing_stats = RoutingStats()
+
+def routing_stats():
+    """
+    Returns per-route ("citation", "citation_miss", "retrieval") query counts and
+    mean/max latency, and the share of queries answered by the citation route.
+    """
+    return _routing_stats.snapshot()
+
+def retrieve_laws(query, top_k=3, strategy=RETRIEVAL_STRATEGY, routing=CITATION_ROUTING, filters=None):
+    """
+    Retrieves the top-k laws passing the metadata filters. With `routing`,
+    citations that resolve to a section are answered by `resolve_citation`;
+    everything else uses the strategy:
+
+    - "vector": embedding similarity only (`retrieve_similar_laws`).
+    - "lexical": BM25 only; never calls Ollama.
+    - "hybrid": BM25 and vector candidates fused with reciprocal rank fusion.
+    - "auto": lexical for short keyword-style queries with BM25 hits, hybrid otherwise.
+    """
+    started = time.perf_counter()
+    route = "retrieval"
+    if routing:
+        try:
+            cited = resolve_citation(query, top_k, filters)
+        except Exception as e:
+            logging.warning(f"Citation lookup failed, using {strategy} retrieval: {e}")
+            cited = None
+        if cited:
+            _routing_stats.record("citation", time.perf_counter() - started)
+            return cited
+        if cited is not None:
+            route = "citation_miss"
+    results = _retrieve_by_strategy(query, top_k, strategy, filters)
+    _routing_stats.record(route, time.perf_counter() - started)
+    return results
+
+def _retrieve_by_strategy(query, top_k, strategy, filters=None):
+    if strategy == "vector":
+        return retrieve_similar_laws(query, top_k, filters=filters)
+    lexical_index = get_bm25_index()
+    if lexical_index is None or len(lexical_index) == 0:
+        logging.warning("No BM25 index found, falling back to vector retrieval.")
+        return retrieve_similar_laws(query, top_k, filters=filters)
+    lexical = lexical_index.search(query, max(top_k, HYBRID_CANDIDATES), filters)
+    if strategy == "lexical":
+        return lexical[:top_k]
+    if strategy == "auto" and lexical and len(tokenize(query)) <= LEXICAL_MAX_TERMS:
+        return lexical[:top_k]
+    vector = retrieve_similar_laws(query, max(top_k, HYBRID_CANDIDATES), filters=filters)
+    return reciprocal_rank_fusion([lexical, vector], top_k)
+
+def retrieve_laws_with_context(query, top_k=3, strategy=RETRIEVAL_STRATEGY, depth=CONTEXT_DEPTH,
+                               token_budget=CONTEXT_TOKEN_BUDGET, filters=None):
+    """
+    Retrieves the top-k laws and expands them with ancestors, children and
+    REFERS_TO targets in one extra Cypher query (see `expand_context`).
+
+    Returns:
+        list: (score, law_id, text, context) tuples.
+    """
+    results = retrieve_laws(query, top_k, strategy, filters=filters)
+    try:
+        with Neo4jConnection() as conn:
+            return expand_context(conn, results, depth, token_budget)
+    except Exception as e:
+        logging.error(f"Error expanding context: {e}")
+        return [(score, law_id, text, []) for score, law_id, text in results]
+
+_corpus_version = None
+_corpus_version_checked_at = 0.0
+
+def get_corpus_version():
+    """
+    Returns a token that changes whenever the set of embedded laws changes.
+
+    Taken from the loaded vector index (row count and `embedded_at` watermark,
+    kept current by its periodic refresh); without an index the same aggregate
+    is read from Neo4j at most once per VECTOR_INDEX_REFRESH_SECONDS.
+    """
+    global _corpus_version, _corpus_version_checked_at
+    index = get_vector_index()
+    if index is not None and len(index) > 0:
+        return f"{len(index)}:{index.watermark}"
+    if _corpus_version is None or time.monotonic() - _corpus_version_checked_at >= VECTOR_INDEX_REFRESH_SECONDS:
+        with Neo4jConnection() as conn:
+            record = conn.query(EMBEDDING_CORPUS_VERSION_QUERY)[0]
+        _corpus_version = f"{record['total']}:{record['watermark'] or 0}"
+        _corpus_version_checked_at = time.monotonic()
+    return _corpus_version
+
+_result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS)
+
+def retrieve_similar_laws_cached(query, top_k=3, cache=None, strategy=RETRIEVAL_STRATEGY, context_depth=0,
+                                 filters=None):
+    """
+    Retrieves laws (see `retrieve_laws`) through a TTL/LRU result cache.
+
+    With `context_depth` > 0 the results are expanded with their graph context
+    (see `retrieve_laws_with_context`) and carry a fourth `context` element.
+
+    Returns:
+        tuple: (results, cache_hit)
+    """
+    if cache is None:
+        cache = _result_cache
+    version = get_corpus_version()
+    key = (normalize_query(query), top_k, strategy, context_depth, filters_key(filters))
+    results = cache.get(key, version)
+    if results is not None:
+        return results, True
+    if context_depth > 0:
+        results = retrieve_laws_with_context(query, top_k, strategy, depth=context_depth, filters=filters)
+    else:
+        results = retrieve_laws(query, top_k, strategy, filters=filters)
+    cache.put(key, results, version)
+    return results, False
+
+FILTER_OPTIONS_QUERY = "MATCH (l:Law) RETURN DISTINCT l.book AS book, l.year AS year, l.source AS source"
+
+def get_filter_options():
+    """
+    Returns the values retrieval can be filtered on, from the partitions of the
+    loaded index or, without a partitioned index, from Neo4j.
+
+    Returns:
+        dict: Sorted "books" and "sources", and the numeric "years".
+    """
+    index = get_vector_index()
+    if isinstance(index, PartitionedIndex) and len(index) > 0:
+        documents = [document.split("_", 2) for document in index.partitions]
+        documents = [parts for parts in documents if len(parts) == 3]
+    else:
+        with Neo4jConnection() as conn:
+            documents = [
+                (record["book"], record["year"], record["source"]) for record in conn.query(FILTER_OPTIONS_QUERY)
+                if record["book"] is not None
+            ]
+    return {
+        "books": sorted({book for book, _, _ in documents}),
+        "years": sorted({int(year) for _, year, _ in documents if str(year).isdigit()}),
+        "sources": sorted({source for _, _, source in documents}),
+    }
+
 if __name__ == "__main__":
     query = input("Enter your query: ")
     results = retrieve_similar_laws(query)
-    for score, number, text in results:
-        print(f"[{score:.2f}] {number}: {text}")
+    for score, law_id, text in results:
+        print(f"[{score:.2f}] {law_id}: {text}")
@@ -0,0 +1,150 @@
+"""
+This module provides a local inverted BM25 index over the Law texts.
+
+The importer keeps the index up to date document by document, so lexical
+queries ("dower", "talaq", "5.2") are answered without calling Ollama.
+
+Classes:
+- BM25Index: Incrementally maintained inverted index with Okapi BM25 scoring.
+
+Functions:
+- tokenize: Splits text into lowercase word and section-number tokens.
+- load_bm25_index: Loads the persisted index, returning None if it does not exist.
+"""
+
+import heapq
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from config.constants import BM25_INDEX_PATH
+from src.retriever.metadata_filters import law_id_matches
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Section numbers ("4.2.1") stay one token so citations match exactly
+TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)*|[^\W\d_]+")
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+class BM25Index:
+    """
+    Inverted index over section texts, grouped by the source document they came from.
+
+    Args:
+        k1 (float): Term frequency saturation.
+        b (float): Length normalization.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = defaultdict(dict)  # term -> {doc_key: term frequency}
+        self.lengths = {}                  # doc_key -> number of tokens
+        self.sections = {}                 # doc_key -> (law_id, text)
+        self.documents = {}                # filename -> [doc_key, ...]
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def _add(self, doc_key, law_id, text):
+        tokens = tokenize(text)
+        for term, frequency in Counter(tokens).items():
+            self.postings[term][doc_key] = frequency
+        self.lengths[doc_key] = len(tokens)
+        self.sections[doc_key] = (law_id, text)
+        self.total_length += len(tokens)
+
+    def _remove(self, doc_key):
+        _, text = self.sections.pop(doc_key)
+        for term in set(tokenize(text)):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(doc_key, None)
+                if not postings:
+                    del self.postings[term]
+        self.total_length -= self.lengths.pop(doc_key)
+
+    def replace_document(self, filename, sections):
+        """
+        Replaces every section indexed for `filename` with the given (law_id, text) sections.
+        """
+        self.remove_document(filename)
+        keys = []
+        for law_id, text in sections:
+            doc_key = f"{filename}#{law_id}"
+            if doc_key in self.sections:
+                self._remove(doc_key)
+            else:
+                keys.append(doc_key)
+            self._add(doc_key, law_id, text)
+        self.documents[filename] = keys
+
+    def remove_document(self, filename):
+        for doc_key in self.documents.pop(filename, []):
+            self._remove(doc_key)
+
+    def search(self, query, top_k=3, filters=None):
+        """
+        Returns the top-k sections by BM25 score, among those passing the metadata filters.
+
+        Returns:
+            list: (score, law_id, text) tuples sorted by descending score.
+        """
+        if not self.lengths:
+            return []
+        count = len(self.lengths)
+        average_length = self.total_length / count or 1.0
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_key, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc_key] / average_length)
+                scores[doc_key] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+        if filters:
+            scores = {
+                doc_key: score for doc_key, score in scores.items()
+                if law_id_matches(self.sections[doc_key][0], filters)
+            }
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(score, *self.sections[doc_key]) for doc_key, score in best]
+
+    def save(self, path=BM25_INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "k1": self.k1,
+                "b": self.b,
+                "documents": {
+                    filename: [self.sections[doc_key] for doc_key in keys]
+                    for filename, keys in self.documents.items()
+                },
+            }, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=BM25_INDEX_PATH):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        index = cls(k1=data["k1"], b=data["b"])
+        for filename, sections in data["documents"].items():
+            index.replace_document(filename, sections)
+        return index
+
+def load_bm25_index(path=BM25_INDEX_PATH):
+    if not os.path.exists(path):
+        return None
+    try:
+        return BM25Index.load(path)
+    except Exception as e:
+        logging.error(f"Error loading BM25 index from {path}: {e}")
+        return None
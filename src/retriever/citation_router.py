@@ -0,0 +1,197 @@
+"""
+This module routes citation queries ("Section 7", "s. 4.2 of the Muslim Family
+Laws Ordinance", "4.2.1") to an exact lookup instead of embedding them.
+
+Section numbers follow the importer's grammar (`SECTION_PATTERN`: dot-separated
+integers, optional trailing dot). Books are recognised through aliases derived
+from the book part of the document name (`extract_metadata_from_filename`):
+"MuslimFamilyLawsOrdinance" is matched by "muslim family laws ordinance",
+"muslimfamilylawsordinance" and "mflo". Aliases that are stopwords or shorter
+than three letters are dropped, since a book named "THE" (a file name cut at its
+first underscore) would otherwise be cited by every query containing "the"; a
+book left without aliases is cited by its full document name ("the 1961 gazette").
+Sections are resolved through a trie
+over the number components, so a lookup costs a few dict accesses, and a
+citation of a parent ("Section 4") is completed with its sub-sections.
+
+Classes:
+- CitationIndex: Trie of section numbers over (law_id, text) rows.
+- RoutingStats: Per-route query counts, latency and citation hit rate.
+
+Functions:
+- book_aliases: Lowercase aliases a book can be cited by.
+- looks_like_citation: Cheap pre-check, True when the query may be a citation.
+- parse_citation: Extracts (section number, cited books) from a query, or None.
+"""
+
+import re
+import threading
+from src.database.law_keys import split_law_id
+from src.monitoring import metrics
+from src.retriever.metadata_filters import law_id_matches
+
+# An explicit marker followed by a section number: "Section 7", "sec. 4.2", "s. 4.2.1", "art 3", "§ 5"
+CITATION_PATTERN = re.compile(
+    r"(?:\b(?:sections?|sec\.?|art(?:icle)?\.?)|(?<!\w)s\.|§)\s*(\d+(?:\.\d+)*)", re.IGNORECASE
+)
+# A query that is a bare section number ("4.2.1"), or one followed by a book ("4.2. of the civil law")
+BARE_CITATION_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)*)\.?(\s+(?:of|in|under)\b.*)?\s*$", re.IGNORECASE)
+CAMEL_CASE_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+# Words that occur in ordinary questions and so never identify a book
+ALIAS_STOPWORDS = frozenset({
+    "the", "and", "for", "from", "with", "under", "into", "about", "this", "that", "what", "which",
+    "section", "sections", "law", "laws", "act", "code",
+})
+MIN_ALIAS_LENGTH = 3
+
+def book_aliases(book, document=None):
+    """
+    Returns the lowercase aliases a book can be cited by.
+
+    Args:
+        document (str): The full document name "<book>_<year>_<source>"; cited
+            as a whole when every alias of the book itself is a stopword or too short.
+    """
+    words = [word.lower() for word in CAMEL_CASE_WORD.findall(book)] or [book.lower()]
+    aliases = {book.lower(), " ".join(words), "".join(words)}
+    if len(words) > 1:
+        aliases.add("".join(word[0] for word in words))
+    aliases = {alias for alias in aliases if len(alias) >= MIN_ALIAS_LENGTH and alias not in ALIAS_STOPWORDS}
+    if not aliases and document:
+        # Matched as queries are normalized: "THE_1961_Gazette" is cited as "the 1961 gazette"
+        aliases.add(_normalize(document).strip())
+    return aliases
+
+def _normalize(text):
+    return " " + " ".join(re.findall(r"[^\W_]+", text.lower())) + " "
+
+def looks_like_citation(query):
+    return CITATION_PATTERN.search(query) is not None or BARE_CITATION_PATTERN.match(query) is not None
+
+def parse_citation(query, aliases=None):
+    """
+    Extracts the cited section number and, when an alias is mentioned, the cited books.
+
+    Args:
+        aliases (dict): alias -> book, e.g. from `CitationIndex.aliases`.
+
+    Returns:
+        tuple: (number, books) where books is a set (empty when no book is
+        named), or None when the query is not a citation.
+    """
+    match = CITATION_PATTERN.search(query)
+    bare = match is None
+    if bare:
+        match = BARE_CITATION_PATTERN.match(query)
+        if match is None:
+            return None
+    normalized = _normalize(query)
+    books = {book for alias, book in (aliases or {}).items() if f" {alias} " in normalized}
+    if bare and match.group(2) and not books:
+        # "2 of my children ..." is a question, not a citation
+        return None
+    return match.group(1), books
+
+class _TrieNode:
+    __slots__ = ("children", "laws")
+
+    def __init__(self):
+        self.children = {}
+        self.laws = []
+
+class CitationIndex:
+    """
+    Trie keyed by section number components ("4.2.1" -> 4 -> 2 -> 1) whose
+    nodes hold the (law_id, text) rows with that number, in every book.
+
+    Attributes:
+        aliases (dict): alias -> book, for every book seen.
+    """
+
+    def __init__(self, rows=()):
+        self._root = _TrieNode()
+        self.aliases = {}
+        self._size = 0
+        for law_id, text in rows:
+            self.add(law_id, text)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, law_id, text):
+        book, _, _, number = split_law_id(law_id)
+        node = self._root
+        for component in number.split("."):
+            node = node.children.setdefault(component, _TrieNode())
+        node.laws.append((law_id, text, book))
+        if book is not None:
+            for alias in book_aliases(book, law_id.rpartition("#")[0]):
+                self.aliases.setdefault(alias, book)
+        self._size += 1
+
+    def lookup(self, number, books=(), top_k=3, filters=None):
+        """
+        Returns the sections numbered `number` (score 1.0), completed breadth-first
+        with their sub-sections (score 1 / (1 + depth below the cited section)),
+        among those passing the metadata filters.
+
+        Returns:
+            list: Up to top_k (score, law_id, text) tuples.
+        """
+        node = self._root
+        for component in number.split("."):
+            node = node.children.get(component)
+            if node is None:
+                return []
+        results = []
+        level, depth = [node], 0
+        while level and len(results) < top_k:
+            for current in level:
+                for law_id, text, book in current.laws:
+                    if (not books or book in books) and law_id_matches(law_id, filters):
+                        results.append((1.0 / (1 + depth), law_id, text))
+            level = [child for current in level for child in current.children.values()]
+            depth += 1
+        return results[:top_k]
+
+    def resolve(self, query, top_k=3, filters=None):
+        """
+        Answers a citation query from the trie.
+
+        Returns:
+            list: (score, law_id, text) tuples (empty when the cited section does
+            not exist), or None when the query is not a citation.
+        """
+        citation = parse_citation(query, self.aliases)
+        if citation is None:
+            return None
+        number, books = citation
+        return self.lookup(number, books, top_k, filters)
+
+class RoutingStats:
+    """
+    Counts queries and latency per route ("citation", "citation_miss",
+    "retrieval") and reports the share of queries answered by the citation route.
+    """
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route, seconds):
+        with self._lock:
+            stats = self._routes.setdefault(route, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+        metrics.record(f"route.{route}", seconds)
+
+    def snapshot(self):
+        with self._lock:
+            routes = {
+                route: {"queries": count, "mean_ms": seconds / count * 1000, "max_ms": longest * 1000}
+                for route, (count, seconds, longest) in self._routes.items()
+            }
+        total = sum(route["queries"] for route in routes.values())
+        hits = routes.get("citation", {}).get("queries", 0)
+        return {"routes": routes, "queries": total, "citation_hit_rate": hits / total if total else 0.0}
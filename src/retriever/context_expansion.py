@@ -0,0 +1,93 @@
+"""
+This module expands retrieved sections with their surrounding graph context.
+
+Every top-k hit is expanded with its ancestors and children (along HAS_CHILD, up
+to a given depth) and the sections it REFERS_TO, all fetched for the whole hit
+list in one Cypher round trip.
+
+Functions:
+- build_context_query: Builds the batched expansion query for a given depth.
+- expand_context: Attaches deduplicated, budget-limited context to retrieval results.
+"""
+
+import logging
+from config.constants import CONTEXT_DEPTH, CONTEXT_TOKEN_BUDGET
+from src.database.law_keys import law_id_expression, law_key_parameters
+from src.embeddings.chunking import count_tokens
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Variable-length bounds cannot be query parameters, so the depth is formatted in
+def build_context_query(depth):
+    depth = int(depth)
+    return f"""
+        UNWIND $keys AS key
+        MATCH (hit:Law {{number: key.number, book: key.book, year: key.year, source: key.source}})
+        OPTIONAL MATCH up = (ancestor:Law)-[:HAS_CHILD*1..{depth}]->(hit)
+        WITH key, hit, collect(ancestor {{
+            law_id: {law_id_expression("ancestor")}, .number, .text, distance: length(up)
+        }}) AS ancestors
+        OPTIONAL MATCH down = (hit)-[:HAS_CHILD*1..{depth}]->(child:Law)
+        WITH key, hit, ancestors, collect(child {{
+            law_id: {law_id_expression("child")}, .number, .text, distance: length(down)
+        }}) AS children
+        OPTIONAL MATCH (hit)-[:REFERS_TO]->(target:Law)
+        RETURN key.law_id AS law_id, ancestors, children, collect(target {{
+            law_id: {law_id_expression("target")}, .number, .text, distance: 1
+        }}) AS references
+    """
+
+def _candidates(record):
+    by_distance = lambda item: item["distance"]
+    # Parents first (they name the section), then cross-references, then sub-sections
+    return (
+        [dict(item, relation="ancestor") for item in sorted(record["ancestors"], key=by_distance)]
+        + [dict(item, relation="reference") for item in record["references"]]
+        + [dict(item, relation="child") for item in sorted(record["children"], key=by_distance)]
+    )
+
+def expand_context(conn, results, depth=CONTEXT_DEPTH, token_budget=CONTEXT_TOKEN_BUDGET):
+    """
+    Expands each (score, law_id, text) hit with its graph neighbourhood.
+
+    Context is handed out round-robin over the hits (so the top hit cannot use
+    the whole budget), and a section is included at most once per request:
+    never when it is itself a hit, and only under the first hit that reaches it.
+
+    Args:
+        conn (Neo4jConnection): Connection used for the single expansion query.
+        results (list): (score, law_id, text) tuples from retrieval.
+        depth (int): Maximum HAS_CHILD distance for ancestors and children.
+        token_budget (int): Maximum total tokens of added context.
+
+    Returns:
+        list: (score, law_id, text, context) tuples, where context is a list of
+        {"law_id", "number", "text", "relation", "distance"} dicts.
+    """
+    if not results or depth < 1:
+        return [(score, law_id, text, []) for score, law_id, text in results]
+    law_ids = [law_id for _, law_id, _ in results]
+    records = conn.query(build_context_query(depth), parameters={"keys": law_key_parameters(law_ids)})
+    candidates = {}
+    for record in records:
+        candidates.setdefault(record["law_id"], []).extend(_candidates(record))
+
+    seen = set(law_ids)
+    contexts = {law_id: [] for law_id in law_ids}
+    queues = [candidates.get(law_id, []) for law_id in law_ids]
+    remaining = token_budget
+    while remaining > 0 and any(queues):
+        for law_id, queue in zip(law_ids, queues):
+            while queue:
+                item = queue.pop(0)
+                if item["law_id"] in seen or item["text"] is None:
+                    continue
+                tokens = count_tokens(item["text"])
+                if tokens > remaining:
+                    continue
+                seen.add(item["law_id"])
+                contexts[law_id].append(item)
+                remaining -= tokens
+                break
+    return [(score, law_id, text, contexts[law_id]) for score, law_id, text in results]
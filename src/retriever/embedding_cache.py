@@ -0,0 +1,147 @@
+"""
+This module provides a persistent, content-addressed cache for embeddings.
+
+Embeddings are keyed by the SHA-256 of (model, text), kept in an in-memory LRU
+and persisted to SQLite so that re-embedding unchanged text never reaches Ollama,
+across runs and across processes.
+
+Classes:
+- EmbeddingCache: Two-level (LRU + SQLite) embedding cache with hit/miss counters.
+
+Functions:
+- make_cache_key: Computes the cache key for a model and a text.
+- get_embedding_cache: Returns the process-wide embedding cache.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+from config.constants import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_SIZE
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+def make_cache_key(model, text):
+    return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).hexdigest()
+
+class EmbeddingCache:
+    """
+    Embedding cache with an in-memory LRU in front of an optional SQLite store.
+
+    Args:
+        path (str): SQLite file to persist to; None or "" keeps the cache in memory only.
+        max_memory_items (int): Capacity of the in-memory LRU.
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_PATH, max_memory_items=EMBEDDING_CACHE_SIZE):
+        self.path = path or None
+        self.max_memory_items = max_memory_items
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._db = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Opened lazily so that constructing the cache never touches the disk
+        if self._db is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, model TEXT, vector BLOB)"
+            )
+        return self._db
+
+    def _remember(self, key, embedding):
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+
+    def get(self, model, text):
+        """
+        Returns the cached embedding for (model, text), or None on a miss.
+        """
+        key = make_cache_key(model, text)
+        with self._lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return list(embedding)
+            if self.path:
+                row = self._connection().execute(
+                    "SELECT vector FROM embeddings WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    embedding = np.frombuffer(row[0], dtype=np.float64).tolist()
+                    self._remember(key, embedding)
+                    self.disk_hits += 1
+                    return list(embedding)
+            self.misses += 1
+            return None
+
+    def put(self, model, text, embedding):
+        self.put_many(model, [(text, embedding)])
+
+    def put_many(self, model, items):
+        """
+        Caches (text, embedding) pairs, persisted in one transaction.
+        """
+        rows = []
+        with self._lock:
+            for text, embedding in items:
+                key = make_cache_key(model, text)
+                self._remember(key, list(embedding))
+                rows.append((key, model, np.asarray(embedding, dtype=np.float64).tobytes()))
+            if self.path and rows:
+                db = self._connection()
+                db.executemany("INSERT OR REPLACE INTO embeddings (key, model, vector) VALUES (?, ?, ?)", rows)
+                db.commit()
+
+    def get_or_fetch(self, model, text, fetch):
+        """
+        Returns the cached embedding, calling `fetch()` and caching its result on a miss.
+        """
+        embedding = self.get(model, text)
+        if embedding is None:
+            embedding = fetch()
+            self.put(model, text, embedding)
+        return embedding
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "memory_items": len(self._memory),
+        }
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+def get_embedding_cache():
+    global _embedding_cache
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = EmbeddingCache()
+        return _embedding_cache
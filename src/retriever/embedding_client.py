@@ -0,0 +1,184 @@
+"""
+This module provides a resilient client for the OLLAMA embeddings API.
+
+Requests share one keep-alive `requests.Session` (a connection pool sized to
+the concurrency limit), carry a timeout, and are retried with jittered
+exponential backoff on connection errors, timeouts, 429 and 5xx answers. At
+most `max_concurrency` requests are in flight per process, and a circuit
+breaker fails calls fast once Ollama keeps failing, letting one trial call
+through after a cool-down.
+
+Classes:
+- CircuitOpenError: Raised instead of calling Ollama while the circuit is open.
+- CircuitBreaker: Consecutive-failure circuit breaker (closed, open, half-open).
+- EmbeddingClient: Pooled, bounded, retrying embedding client.
+
+Functions:
+- is_retryable: Whether an embedding error is worth retrying.
+- get_embedding_client: Returns the process-wide embedding client.
+"""
+
+import logging
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from config.constants import (
+    OLLAMA_URL, OLLAMA_MODEL, EMBED_TIMEOUT_SECONDS, EMBED_MAX_RETRIES, EMBED_BACKOFF_SECONDS,
+    EMBED_MAX_BACKOFF_SECONDS, EMBED_MAX_CONCURRENCY, EMBED_CIRCUIT_FAILURES, EMBED_CIRCUIT_RESET_SECONDS
+)
+from src.monitoring import metrics
+from src.retriever.api_utils import fetch_embedding, EmbeddingHTTPError
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+class CircuitOpenError(Exception):
+    """
+    Ollama failed too often recently; the call was not attempted.
+    """
+
+def is_retryable(error):
+    if isinstance(error, EmbeddingHTTPError):
+        return error.status_code == 429 or error.status_code >= 500
+    return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failed calls. While open every
+    call is refused; after `reset_seconds` one trial call is let through
+    (half-open), which closes the circuit on success and reopens it on failure.
+    """
+
+    def __init__(self, failure_threshold=EMBED_CIRCUIT_FAILURES, reset_seconds=EMBED_CIRCUIT_RESET_SECONDS,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half-open" if self.clock() - self.opened_at >= self.reset_seconds else "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self.clock() - self.opened_at < self.reset_seconds or self._trial_running:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logging.warning(f"Embedding circuit opened after {self.failures} consecutive failures.")
+                self.opened_at = self.clock()
+            self._trial_running = False
+
+    def seconds_until_retry(self):
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.reset_seconds - (self.clock() - self.opened_at))
+
+class EmbeddingClient:
+    """
+    Embedding client with a keep-alive session, timeouts, retries, bounded
+    concurrency and a circuit breaker.
+
+    Args:
+        max_retries (int): Retries after the first attempt of a call.
+        backoff (float): Base delay in seconds; attempt n waits a random time up to
+            min(max_backoff, backoff * 2**n) ("full jitter").
+        max_concurrency (int): Requests in flight at once across all threads.
+        breaker (CircuitBreaker): Shared breaker (a new one by default).
+        sleep (callable): Used to wait between retries (replaced in tests).
+    """
+
+    def __init__(self, url=OLLAMA_URL, model=OLLAMA_MODEL, timeout=EMBED_TIMEOUT_SECONDS,
+                 max_retries=EMBED_MAX_RETRIES, backoff=EMBED_BACKOFF_SECONDS, max_backoff=EMBED_MAX_BACKOFF_SECONDS,
+                 max_concurrency=EMBED_MAX_CONCURRENCY, breaker=None, session=None, sleep=time.sleep):
+        self.url = url
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.sleep = sleep
+        self._slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, max_concurrency))
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+
+    def _delay(self, attempt):
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    def embed(self, text):
+        """
+        Returns the embedding of the text.
+
+        Raises:
+            CircuitOpenError: If the circuit is open; Ollama is not called.
+            Exception: The last error once the retries are exhausted, or a
+                non-retryable error (e.g. 400 or 404) right away.
+        """
+        if not self.breaker.allow():
+            metrics.increment("ollama.circuit_rejected")
+            raise CircuitOpenError(
+                f"Embedding circuit is open, retry in {self.breaker.seconds_until_retry():.1f}s"
+            )
+        attempt = 0
+        while True:
+            try:
+                with self._slots:
+                    embedding = fetch_embedding(self.url, self.model, text, session=self.session, timeout=self.timeout)
+            except Exception as e:
+                if not is_retryable(e):
+                    # Ollama answered, so it is up: a bad request must not trip the circuit
+                    self.breaker.record_success()
+                    raise
+                if attempt >= self.max_retries:
+                    self.breaker.record_failure()
+                    raise
+                delay = self._delay(attempt)
+                attempt += 1
+                metrics.increment("ollama.retry")
+                logging.warning(f"Embedding attempt {attempt} failed ({e}), retrying in {delay:.2f}s")
+                self.sleep(delay)
+            else:
+                self.breaker.record_success()
+                return embedding
+
+    def close(self):
+        self.session.close()
+
+_embedding_client = None
+_embedding_client_lock = threading.Lock()
+
+def get_embedding_client():
+    global _embedding_client
+    with _embedding_client_lock:
+        if _embedding_client is None:
+            _embedding_client = EmbeddingClient()
+        return _embedding_client
@@ -0,0 +1,105 @@
+"""
+This module defines the metadata filters of a retrieval query.
+
+A filter restricts results to some books, a range of years and some sources,
+the three parts of a document name ("<book>_<year>_<source>", see `law_keys`).
+Because every filter field is a property of the whole document, a filter
+selects whole documents: the partitioned index skips the others entirely and
+the Neo4j scan pushes the same conditions into its WHERE clause.
+
+Functions:
+- make_filters: Builds a filter dict, or None when nothing is filtered.
+- filters_key: Hashable form of a filter, for cache keys.
+- document_matches: Whether a document name passes a filter.
+- law_id_matches: Whether a law id passes a filter.
+- filter_results: Keeps the (score, law_id, text, ...) results that pass a filter.
+- cypher_filter_parameters: Parameters for FILTER_CONDITION.
+"""
+
+# Cypher condition over the Law variable `l`; every parameter is null when unused
+FILTER_CONDITION = """
+    ($books IS NULL OR l.book IN $books)
+    AND ($sources IS NULL OR l.source IN $sources)
+    AND ($year_from IS NULL OR toInteger(l.year) >= $year_from)
+    AND ($year_to IS NULL OR toInteger(l.year) <= $year_to)
+"""
+
+def make_filters(books=None, year_from=None, year_to=None, sources=None):
+    """
+    Builds a metadata filter.
+
+    Args:
+        books (iterable): Book names to keep; empty or None keeps every book.
+        year_from (int): Smallest year to keep, inclusive.
+        year_to (int): Largest year to keep, inclusive.
+        sources (iterable): Sources to keep; empty or None keeps every source.
+
+    Returns:
+        dict: The filter, or None when it would keep everything.
+    """
+    filters = {
+        "books": frozenset(books) if books else None,
+        "year_from": int(year_from) if year_from is not None else None,
+        "year_to": int(year_to) if year_to is not None else None,
+        "sources": frozenset(sources) if sources else None,
+    }
+    return filters if any(value is not None for value in filters.values()) else None
+
+def filters_key(filters):
+    if not filters:
+        return None
+    return (
+        tuple(sorted(filters["books"])) if filters["books"] else None,
+        filters["year_from"],
+        filters["year_to"],
+        tuple(sorted(filters["sources"])) if filters["sources"] else None,
+    )
+
+def _parse_year(year):
+    try:
+        return int(year)
+    except (TypeError, ValueError):
+        return None
+
+def _metadata_matches(book, year, source, filters):
+    if filters["books"] is not None and book not in filters["books"]:
+        return False
+    if filters["sources"] is not None and source not in filters["sources"]:
+        return False
+    if filters["year_from"] is not None or filters["year_to"] is not None:
+        year = _parse_year(year)
+        if year is None:
+            return False
+        if filters["year_from"] is not None and year < filters["year_from"]:
+            return False
+        if filters["year_to"] is not None and year > filters["year_to"]:
+            return False
+    return True
+
+def document_matches(document, filters):
+    if not filters:
+        return True
+    parts = document.split("_", 2)
+    if len(parts) != 3:
+        # Legacy ids without a document only pass an empty filter
+        return False
+    return _metadata_matches(*parts, filters)
+
+def law_id_matches(law_id, filters):
+    if not filters:
+        return True
+    return document_matches(law_id.rpartition("#")[0], filters)
+
+def filter_results(results, filters):
+    if not filters:
+        return results
+    return [result for result in results if law_id_matches(result[1], filters)]
+
+def cypher_filter_parameters(filters):
+    filters = filters or {}
+    return {
+        "books": sorted(filters["books"]) if filters.get("books") else None,
+        "sources": sorted(filters["sources"]) if filters.get("sources") else None,
+        "year_from": filters.get("year_from"),
+        "year_to": filters.get("year_to"),
+    }
@@ -0,0 +1,286 @@
+"""
+This module partitions the vector index by document.
+
+Every imported file ("<book>_<year>_<source>", the document part of a law id)
+gets its own index of the configured backend. A query filtered on books, years
+or sources (see `metadata_filters`) only searches the partitions of the
+matching documents, so it costs the size of the selected documents rather than
+of the corpus; an unfiltered query merges the per-partition top-k.
+
+Refreshes upsert new embeddings into their own partitions, and a partition
+whose row count no longer matches Neo4j (a re-imported or deleted book) is
+rebuilt alone from a per-document query. A partition is copied before it
+changes and the partitions dict is replaced rather than mutated, so a refresh
+never changes what a search running on another thread sees. The index is
+persisted as one file per partition plus a manifest, and `save` only rewrites
+the partitions that changed.
+
+Classes:
+- PartitionedIndex: One vector index per document, searched with metadata filters.
+
+Functions:
+- partition_key: Partition (document name) of a law id.
+- partitions_dir: Directory holding the partition files of an index path.
+- partition_index: Splits a single index (e.g. the memory-mapped snapshot) into partitions.
+"""
+
+import heapq
+import json
+import logging
+import os
+import numpy as np
+from config.constants import VECTOR_INDEX_PATH, VECTOR_INDEX_BACKEND
+from src.database.law_keys import law_id_expression, CHUNK_SEPARATOR
+from src.retriever.metadata_filters import document_matches
+from src.retriever.vector_index import (
+    VectorIndex, get_index_class, EMBEDDING_ROWS_QUERY, EMBEDDING_COUNT_QUERY
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+PARTITIONS_FORMAT = 1
+
+DOCUMENT_ROWS_QUERY = f"""
+    MATCH (l:Law)
+    WHERE l.book = $book AND l.year = $year AND l.source = $source AND l.embedding IS NOT NULL
+    RETURN {law_id_expression("l")} AS law_id, l.text, l.embedding, coalesce(l.embedded_at, 0) AS embedded_at
+    UNION ALL
+    MATCH (l:Law)-[:HAS_CHUNK]->(c:Chunk)
+    WHERE l.book = $book AND l.year = $year AND l.source = $source AND c.embedding IS NOT NULL
+    RETURN {law_id_expression("l")} + '{CHUNK_SEPARATOR}' + toString(c.position) AS law_id, l.text AS `l.text`,
+           c.embedding AS `l.embedding`, coalesce(c.embedded_at, 0) AS embedded_at
+"""
+
+DOCUMENT_COUNTS_QUERY = """
+    MATCH (l:Law) WHERE l.embedding IS NOT NULL
+    OPTIONAL MATCH (l)-[:HAS_CHUNK]->(c:Chunk) WHERE c.embedding IS NOT NULL
+    WITH l, count(c) AS chunks
+    RETURN l.book + '_' + l.year + '_' + l.source AS document, count(l) + sum(chunks) AS total
+"""
+
+def partition_key(law_id):
+    return law_id.rpartition("#")[0]
+
+def partitions_dir(path=VECTOR_INDEX_PATH):
+    return f"{os.path.splitext(path)[0]}.partitions"
+
+def _group_rows(law_ids):
+    groups = {}
+    for row, law_id in enumerate(law_ids):
+        groups.setdefault(partition_key(law_id), []).append(row)
+    return groups
+
+class PartitionedIndex:
+    """
+    One vector index of the `backend` class per document.
+
+    Attributes:
+        partitions (dict): Document name -> VectorIndex.
+        watermark (int): Largest `embedded_at` timestamp seen across partitions.
+    """
+
+    def __init__(self, backend=VECTOR_INDEX_BACKEND, watermark=0):
+        self.backend = backend
+        self.partitions = {}
+        self.watermark = int(watermark)
+        self._dirty = set()
+        self._removed = set()
+
+    def __len__(self):
+        return sum(len(partition) for partition in self.partitions.values())
+
+    def copy(self):
+        """
+        Returns a copy that can be refreshed while this index keeps serving
+        searches; the partitions are shared until one of them changes.
+        """
+        index = PartitionedIndex(self.backend, self.watermark)
+        index.partitions = dict(self.partitions)
+        index._dirty, index._removed = set(self._dirty), set(self._removed)
+        return index
+
+    @property
+    def ids(self):
+        return [law_id for partition in self.partitions.values() for law_id in partition.ids]
+
+    @property
+    def texts(self):
+        return [text for partition in self.partitions.values() for text in partition.texts]
+
+    def documents(self, filters=None):
+        return [document for document in self.partitions if document_matches(document, filters)]
+
+    def size(self, filters=None):
+        """
+        Returns the number of rows a query with these filters searches.
+        """
+        return sum(
+            len(partition) for document, partition in self.partitions.items() if document_matches(document, filters)
+        )
+
+    def search(self, query_vector, top_k=3, filters=None):
+        """
+        Returns the top-k rows by cosine similarity among the partitions that pass the filters.
+
+        Returns:
+            list: (score, law_id, text) tuples sorted by descending score.
+        """
+        if top_k <= 0:
+            return []
+        results = []
+        # A refresh swaps in a new dict; the search keeps the one it started with
+        for document, partition in self.partitions.items():
+            if document_matches(document, filters):
+                results.extend(partition.search(query_vector, top_k))
+        return heapq.nlargest(top_k, results, key=lambda result: result[0])
+
+    def _upsert_records(self, records):
+        groups = {}
+        for record in records:
+            groups.setdefault(partition_key(record["law_id"]), []).append(record)
+        partitions = dict(self.partitions)
+        for document, group in groups.items():
+            partition = partitions.get(document)
+            partition = partition.copy() if partition is not None else get_index_class(self.backend)()
+            partition._upsert_records(group)
+            partitions[document] = partition
+            self._dirty.add(document)
+            self._removed.discard(document)
+        self.partitions = partitions
+        if records:
+            self.watermark = max(self.watermark, max(record["embedded_at"] for record in records))
+        return len(records)
+
+    def rebuild(self, records):
+        """
+        Replaces every partition with the given embedding records.
+        """
+        self._removed.update(self.partitions)
+        self.partitions = {}
+        self.watermark = 0
+        self._upsert_records(records)
+
+    def rebuild_partition(self, conn, document):
+        """
+        Replaces one partition with the embeddings of its document in Neo4j.
+
+        Returns:
+            int: The number of rows in the rebuilt partition.
+        """
+        book, year, source = document.split("_", 2)
+        records = list(conn.query(DOCUMENT_ROWS_QUERY, parameters={"book": book, "year": year, "source": source}))
+        if not records:
+            self.drop_partition(document)
+            return 0
+        partition = get_index_class(self.backend)()
+        partition.rebuild(records)
+        self.partitions = {**self.partitions, document: partition}
+        self._dirty.add(document)
+        self._removed.discard(document)
+        self.watermark = max(self.watermark, partition.watermark)
+        logging.info(f"Rebuilt vector index partition {document} ({len(partition)} rows).")
+        return len(partition)
+
+    def drop_partition(self, document):
+        if document in self.partitions:
+            self.partitions = {name: partition for name, partition in self.partitions.items() if name != document}
+            self._dirty.discard(document)
+            self._removed.add(document)
+
+    def refresh(self, conn):
+        """
+        Pulls embeddings written since the last refresh into their partitions.
+
+        When the number of embedded laws no longer matches the index, the
+        per-document counts are compared and only the partitions that differ
+        are rebuilt (or dropped when their document is gone).
+
+        Returns:
+            int: The number of rows written.
+        """
+        records = list(conn.query(EMBEDDING_ROWS_QUERY, parameters={"since": self.watermark}))
+        written = self._upsert_records(records)
+        total = list(conn.query(EMBEDDING_COUNT_QUERY))[0]["total"]
+        if total != len(self):
+            counts = {record["document"]: record["total"] for record in conn.query(DOCUMENT_COUNTS_QUERY)}
+            for document in list(self.partitions):
+                if document not in counts:
+                    self.drop_partition(document)
+            for document, count in counts.items():
+                if document is not None and (document not in self.partitions or len(self.partitions[document]) != count):
+                    logging.info(f"Vector index partition {document} out of sync, rebuilding it.")
+                    written += self.rebuild_partition(conn, document)
+        return written
+
+    def save(self, path=VECTOR_INDEX_PATH):
+        """
+        Writes the partitions changed since the last save and the manifest
+        listing every partition, into `partitions_dir(path)`.
+        """
+        from src.retriever.quantized_index import full_precision_path
+        directory = partitions_dir(path)
+        os.makedirs(directory, exist_ok=True)
+        for document in self._dirty:
+            self.partitions[document].save(os.path.join(directory, f"{document}.npz"))
+        for document in self._removed:
+            partition_path = os.path.join(directory, f"{document}.npz")
+            for stale_path in (partition_path, full_precision_path(partition_path)):
+                if os.path.exists(stale_path):
+                    os.remove(stale_path)
+        manifest = {
+            "format": PARTITIONS_FORMAT,
+            "backend": self.backend,
+            "watermark": self.watermark,
+            "partitions": sorted(self.partitions),
+        }
+        manifest_path = os.path.join(directory, "manifest.json")
+        tmp_path = f"{manifest_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, manifest_path)
+        self._dirty.clear()
+        self._removed.clear()
+
+    @classmethod
+    def load(cls, path=VECTOR_INDEX_PATH):
+        directory = partitions_dir(path)
+        with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["format"] != PARTITIONS_FORMAT:
+            raise ValueError(f"unknown partitioned index format {manifest['format']}")
+        index = cls(manifest["backend"], manifest["watermark"])
+        for document in manifest["partitions"]:
+            index.partitions[document] = VectorIndex.load(os.path.join(directory, f"{document}.npz"))
+        return index
+
+    @classmethod
+    def from_index(cls, index):
+        """
+        Splits a single index into partitions. Flat rows are shared with the
+        source matrix: a document stored contiguously (as in the snapshot) becomes
+        a slice, so a memory-mapped snapshot stays mapped. Other backends re-encode
+        each document's rows.
+        """
+        partitioned = cls(index.backend, index.watermark)
+        for document, rows in _group_rows(index.ids).items():
+            if rows[-1] - rows[0] + 1 == len(rows):
+                vectors = index.vectors[rows[0]:rows[-1] + 1]
+            else:
+                vectors = index.vectors[np.asarray(rows)]
+            partition = get_index_class(index.backend)(watermark=index.watermark)
+            ids = [index.ids[row] for row in rows]
+            texts = [index.texts[row] for row in rows]
+            if index.backend == "flat":
+                partition.ids, partition.texts, partition.vectors = ids, texts, vectors
+                partition._positions = {law_id: row for row, law_id in enumerate(ids)}
+            else:
+                partition.upsert(ids, texts, vectors)
+            partitioned.partitions[document] = partition
+            partitioned._dirty.add(document)
+        return partitioned
+
+def partition_index(index):
+    if index is None or isinstance(index, PartitionedIndex):
+        return index
+    return PartitionedIndex.from_index(index)
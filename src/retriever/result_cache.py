@@ -0,0 +1,79 @@
+"""
+This module provides a small TTL + LRU cache for retrieval results.
+
+Classes:
+- ResultCache: Size-bounded, time-limited cache invalidated on corpus version change.
+
+Functions:
+- normalize_query: Normalizes a query string for use in a cache key.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+def normalize_query(query):
+    return " ".join(query.lower().split())
+
+class ResultCache:
+    """
+    LRU cache whose entries expire after `ttl_seconds`.
+
+    Every lookup carries the current corpus version; when it differs from the
+    version the cached entries were computed against, the cache is emptied.
+
+    Args:
+        max_items (int): Maximum number of cached results.
+        ttl_seconds (float): Lifetime of a cached result.
+    """
+
+    def __init__(self, max_items=256, ttl_seconds=600):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_version(self, version):
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key, version=None):
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, version=None):
+        with self._lock:
+            self._check_version(version)
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_items:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "items": len(self._entries),
+        }
@@ -0,0 +1,141 @@
+"""
+This module provides a semantic cache for retrieval results.
+
+Paraphrases of a question ("grounds for divorce", "how can a wife get
+divorce") embed to nearby vectors. The cache keeps the normalized embeddings of
+recent queries in one preallocated matrix next to their results, so a lookup is
+a single matrix-vector product: when the best cached query with the same
+retrieval parameters is within the cosine threshold, its results are reused and
+the search is skipped.
+
+Classes:
+- SemanticCache: Size-bounded LRU of (query embedding, results), invalidated on corpus version change.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+import numpy as np
+from src.monitoring import metrics
+from src.retriever.vector_index import normalize_rows
+
+class SemanticCache:
+    """
+    Cache of retrieval results keyed by query embedding similarity.
+
+    Args:
+        max_items (int): Maximum number of cached queries; 0 disables the cache.
+        threshold (float): Minimum cosine similarity between a new query and a
+            cached one for the cached results to be reused.
+        ttl_seconds (float): Lifetime of a cached result.
+    """
+
+    def __init__(self, max_items=512, threshold=0.95, ttl_seconds=600):
+        self.max_items = max_items
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+        self._vectors = None
+        # slot -> (key, results, stored_at, retrieval seconds), least recently used first
+        self._entries = OrderedDict()
+        self._free = []
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_items > 0
+
+    def _reset(self):
+        self._entries.clear()
+        self._free = list(range(self.max_items - 1, -1, -1))
+
+    def _check_version(self, version):
+        if version != self.version:
+            self._reset()
+            self.version = version
+
+    def get(self, embedding, key=None, version=None):
+        """
+        Returns the results of the most similar cached query with the same `key`
+        (retrieval parameters such as top_k and filters), or None on a miss.
+        """
+        started = time.perf_counter()
+        with self._lock:
+            self._check_version(version)
+            query = normalize_rows(embedding)
+            slot = None
+            if self._entries and self._vectors.shape[1] == len(query):
+                slot = self._best_slot(query, key)
+            if slot is None:
+                self.misses += 1
+                metrics.increment("semantic_cache.miss")
+                return None
+            self._entries.move_to_end(slot)
+            _, results, _, seconds = self._entries[slot]
+            saved = max(0.0, seconds - (time.perf_counter() - started))
+            self.hits += 1
+            self.saved_seconds += saved
+        metrics.increment("semantic_cache.hit")
+        metrics.record("semantic_cache.saved", saved)
+        return results
+
+    def _best_slot(self, query, key):
+        slots = np.fromiter(self._entries, dtype=np.int64, count=len(self._entries))
+        scores = self._vectors[slots] @ query
+        now = time.monotonic()
+        for position in np.argsort(-scores):
+            if scores[position] < self.threshold:
+                break
+            slot = int(slots[position])
+            entry_key, _, stored_at, _ = self._entries[slot]
+            if entry_key != key:
+                continue
+            if now - stored_at >= self.ttl_seconds:
+                del self._entries[slot]
+                self._free.append(slot)
+                continue
+            return slot
+        return None
+
+    def put(self, embedding, results, key=None, version=None, seconds=0.0):
+        """
+        Caches the results of a query.
+
+        Args:
+            seconds (float): Time the retrieval took, counted as saved on every hit.
+        """
+        if not self.enabled:
+            return
+        query = normalize_rows(embedding)
+        with self._lock:
+            self._check_version(version)
+            if self._vectors is None or self._vectors.shape[1] != len(query):
+                self._vectors = np.zeros((self.max_items, len(query)), dtype=np.float32)
+                self._reset()
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot, _ = self._entries.popitem(last=False)
+            self._vectors[slot] = query
+            self._entries[slot] = (key, results, time.monotonic(), seconds)
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "items": len(self._entries),
+            "saved_seconds": self.saved_seconds,
+            "mean_saved_ms": self.saved_seconds / self.hits * 1000 if self.hits else 0.0,
+        }
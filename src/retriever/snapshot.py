@@ -0,0 +1,135 @@
+"""
+This module exports and loads a memory-mappable snapshot of the Law embeddings.
+
+A snapshot is a manifest (JSON: format, corpus version, dimensions, the id and
+text of every row, and the name of the vectors file) next to a contiguous,
+row-normalized float32 `.npy` matrix whose row offsets follow the id table.
+Rows are grouped by document, so every partition of a partitioned index is a
+contiguous slice of the mapping.
+Retriever processes `np.memmap` the matrix, so they start without pulling
+embeddings from Neo4j and share its pages through the OS page cache.
+
+Every export writes a new vectors file named after its corpus version and then
+atomically replaces the manifest, so running processes keep their mapping.
+
+Functions:
+- export_snapshot: Writes a snapshot of every embedded Law node.
+- load_snapshot: Memory-maps a snapshot as a FlatIndex, returning None if it does not exist.
+- is_snapshot_fresh: Checks a loaded snapshot against the corpus version in Neo4j.
+- main: Exports a snapshot from the database.
+"""
+
+import glob
+import json
+import logging
+import os
+import time
+import numpy as np
+from config.constants import EMBEDDING_SNAPSHOT_PATH, OLLAMA_MODEL
+from src.database.neo4j_utils import Neo4jConnection
+from src.retriever.vector_index import (
+    FlatIndex, normalize_rows, EMBEDDING_ROWS_QUERY, EMBEDDING_CORPUS_VERSION_QUERY
+)
+from src.retriever.partitioned_index import partition_key
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# 2: rows are identified by law id rather than by section number
+SNAPSHOT_FORMAT = 2
+
+# Rows normalized and written per chunk while exporting
+EXPORT_CHUNK_SIZE = 4096
+
+def _vectors_prefix(path):
+    return os.path.splitext(path)[0]
+
+def export_snapshot(conn, path=EMBEDDING_SNAPSHOT_PATH):
+    """
+    Writes the embeddings stored in Neo4j as a versioned, memory-mappable snapshot.
+
+    Returns:
+        dict: The manifest that was written, or None when no law is embedded yet.
+    """
+    records = conn.query(EMBEDDING_ROWS_QUERY, parameters={"since": 0})
+    # Rows of one document are contiguous, so each index partition is a slice of the mapping
+    records = sorted(records, key=lambda record: partition_key(record["law_id"]))
+    if not records:
+        logging.info("No embedded laws, skipping snapshot export.")
+        return None
+    watermark = max(record["embedded_at"] for record in records)
+    dimensions = len(records[0]["l.embedding"])
+    vectors_path = f"{_vectors_prefix(path)}-{len(records)}-{watermark}.npy"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    tmp_path = f"{vectors_path}.tmp"
+    vectors = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.float32, shape=(len(records), dimensions))
+    for start in range(0, len(records), EXPORT_CHUNK_SIZE):
+        chunk = records[start:start + EXPORT_CHUNK_SIZE]
+        vectors[start:start + len(chunk)] = normalize_rows([record["l.embedding"] for record in chunk])
+    vectors.flush()
+    del vectors
+    os.replace(tmp_path, vectors_path)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        "model": OLLAMA_MODEL,
+        "created_at": time.time(),
+        "total": len(records),
+        "watermark": watermark,
+        "dimensions": dimensions,
+        "vectors": os.path.basename(vectors_path),
+        "ids": [record["law_id"] for record in records],
+        "texts": [record["l.text"] for record in records],
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+    # Processes still mapping an older file keep it alive until they unmap it
+    for old_path in glob.glob(f"{_vectors_prefix(path)}-*.npy"):
+        if os.path.abspath(old_path) != os.path.abspath(vectors_path):
+            os.remove(old_path)
+    return manifest
+
+def load_snapshot(path=EMBEDDING_SNAPSHOT_PATH):
+    """
+    Memory-maps the snapshot at `path` as a FlatIndex.
+
+    The matrix is mapped copy-on-write, so later incremental refreshes can
+    update rows in private pages without touching the file other processes share.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest["format"] != SNAPSHOT_FORMAT:
+            logging.warning(f"Ignoring snapshot {path} with unknown format {manifest['format']}.")
+            return None
+        vectors = np.load(os.path.join(os.path.dirname(path), manifest["vectors"]), mmap_mode="c")
+        if vectors.shape != (manifest["total"], manifest["dimensions"]):
+            raise ValueError(f"vectors shape {vectors.shape} does not match the manifest")
+    except Exception as e:
+        logging.error(f"Error loading embedding snapshot from {path}: {e}")
+        return None
+    index = FlatIndex(watermark=manifest["watermark"])
+    index.ids = manifest["ids"]
+    index.texts = manifest["texts"]
+    index.vectors = vectors
+    index._positions = {law_id: row for row, law_id in enumerate(index.ids)}
+    return index
+
+def is_snapshot_fresh(index, conn):
+    record = conn.query(EMBEDDING_CORPUS_VERSION_QUERY)[0]
+    return record["total"] == len(index) and (record["watermark"] or 0) == index.watermark
+
+def main():
+    with Neo4jConnection() as conn:
+        manifest = export_snapshot(conn)
+    if manifest is not None:
+        print(f"✅ Embedding snapshot saved with {manifest['total']} laws.")
+
+if __name__ == "__main__":
+    main()
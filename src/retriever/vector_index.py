@@ -0,0 +1,301 @@
+"""
+This module provides an in-process vector index over the Law embeddings.
+
+The index keeps every embedding as a row of a pre-normalized float32 matrix
+together with an id map (law id -> row), so a top-k query is a single
+matrix-vector product followed by `argpartition`.
+
+Classes:
+- VectorIndex: Common interface and row storage shared by all index backends.
+- FlatIndex: Exact top-k search over a pre-normalized float32 matrix.
+
+Functions:
+- normalize_rows: L2-normalizes the rows of a matrix.
+- get_index_class: Resolves an index backend name ("flat", "ivf", "fp16", "int8") to its class.
+- build_index: Builds a fresh (optionally per-document partitioned) index from the Law embeddings stored in Neo4j.
+- load_index: Loads a persisted index (partitioned when VECTOR_INDEX_PARTITIONED), returning None if it does not exist.
+- main: Builds (or refreshes) and persists the index.
+"""
+
+import copy
+import logging
+import os
+import numpy as np
+from config.constants import VECTOR_INDEX_PATH, VECTOR_INDEX_BACKEND, VECTOR_INDEX_PARTITIONED
+from src.database.neo4j_utils import Neo4jConnection
+from src.database.law_keys import law_id_expression, CHUNK_SEPARATOR
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Rows are identified by their law id, since section numbers repeat across books.
+# Chunks of long sections are extra rows "<law id>@<position>" carrying the section text.
+EMBEDDING_ROWS_QUERY = f"""
+    MATCH (l:Law)
+    WHERE l.embedding IS NOT NULL AND coalesce(l.embedded_at, 0) >= $since
+    RETURN {law_id_expression("l")} AS law_id, l.text, l.embedding, coalesce(l.embedded_at, 0) AS embedded_at
+    UNION ALL
+    MATCH (l:Law)-[:HAS_CHUNK]->(c:Chunk)
+    WHERE c.embedding IS NOT NULL AND coalesce(c.embedded_at, 0) >= $since
+    RETURN {law_id_expression("l")} + '{CHUNK_SEPARATOR}' + toString(c.position) AS law_id, l.text AS `l.text`,
+           c.embedding AS `l.embedding`, coalesce(c.embedded_at, 0) AS embedded_at
+"""
+
+EMBEDDING_COUNT_QUERY = """
+    MATCH (l:Law) WHERE l.embedding IS NOT NULL
+    WITH count(l) AS laws
+    OPTIONAL MATCH (:Law)-[:HAS_CHUNK]->(c:Chunk) WHERE c.embedding IS NOT NULL
+    RETURN laws + count(c) AS total
+"""
+
+EMBEDDING_CORPUS_VERSION_QUERY = """
+    MATCH (l:Law) WHERE l.embedding IS NOT NULL
+    WITH count(l) AS laws, max(l.embedded_at) AS law_watermark
+    OPTIONAL MATCH (:Law)-[:HAS_CHUNK]->(c:Chunk) WHERE c.embedding IS NOT NULL
+    WITH laws, law_watermark, count(c) AS chunks, max(c.embedded_at) AS chunk_watermark
+    RETURN laws + chunks AS total,
+           CASE WHEN chunk_watermark > law_watermark THEN chunk_watermark ELSE law_watermark END AS watermark
+"""
+
+def normalize_rows(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+class VectorIndex:
+    """
+    Common interface and row storage for the retrieval indexes over Law embeddings.
+
+    Subclasses implement `search` and may extend `upsert`, `rebuild` and the
+    persisted arrays (`_extra_arrays` / `_load_extra_arrays` / `_saved_vectors`).
+    Writes replace arrays instead of changing them in place, so a `copy` can be
+    refreshed while the original keeps serving searches on other threads.
+
+    Attributes:
+        ids (list): Law id (see `law_keys`) of each row, or chunk id for the chunks of long sections.
+        texts (list): Section text of each row.
+        vectors (np.ndarray): Row-normalized float32 matrix of embeddings.
+        watermark (int): Largest `embedded_at` timestamp seen, used for incremental refreshes.
+    """
+
+    backend = None
+
+    def __init__(self, ids=None, texts=None, vectors=None, watermark=0):
+        self.ids = list(ids) if ids is not None else []
+        self.texts = list(texts) if texts is not None else []
+        if vectors is None or len(self.ids) == 0:
+            self.vectors = np.zeros((0, 0), dtype=np.float32)
+        else:
+            self.vectors = normalize_rows(vectors)
+        self.watermark = int(watermark)
+        self._positions = {law_id: row for row, law_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def copy(self):
+        """
+        Returns a copy that can be updated without affecting this index.
+
+        The row lists are copied and the arrays shared, since `_write_vectors`
+        replaces arrays rather than writing into them. Subclasses holding other
+        state that writes change in place (the full-precision file of a
+        quantized index) override this to copy it too.
+        """
+        index = copy.copy(self)
+        index.ids, index.texts, index._positions = list(self.ids), list(self.texts), dict(self._positions)
+        return index
+
+    def search(self, query_vector, top_k=3):
+        """
+        Returns the top-k rows by cosine similarity to the query vector.
+
+        Returns:
+            list: (score, law_id, text) tuples sorted by descending score.
+        """
+        raise NotImplementedError
+
+    def upsert(self, ids, texts, vectors):
+        """
+        Inserts new rows and overwrites rows whose id is already indexed.
+
+        Returns:
+            list: The row positions that were written.
+        """
+        if len(ids) == 0:
+            return []
+        vectors = normalize_rows(vectors)
+        rows = []
+        for law_id, text in zip(ids, texts):
+            row = self._positions.get(law_id)
+            if row is None:
+                row = len(self.ids)
+                self._positions[law_id] = row
+                self.ids.append(law_id)
+                self.texts.append(text)
+            else:
+                self.texts[row] = text
+            rows.append(row)
+        self._write_vectors(rows, vectors)
+        return rows
+
+    def _write_vectors(self, rows, vectors):
+        """
+        Stores normalized vectors at these rows; rows past the end of `vectors` are appended.
+        """
+        existing = len(self.vectors)
+        updated = np.empty((len(self), vectors.shape[1]), dtype=np.float32)
+        if existing:
+            updated[:existing] = self.vectors
+        updated[np.asarray(rows)] = vectors
+        self.vectors = updated
+
+    def rebuild(self, records):
+        """
+        Replaces the whole index content with the given embedding records.
+        """
+        self.ids, self.texts, self._positions = [], [], {}
+        self.vectors = np.zeros((0, 0), dtype=np.float32)
+        self.watermark = 0
+        self._upsert_records(records)
+
+    def refresh(self, conn):
+        """
+        Pulls embeddings written since the last refresh and upserts them.
+
+        Falls back to a full rebuild when the number of embedded laws in the
+        database no longer matches the index (e.g. after nodes were deleted).
+
+        Returns:
+            int: The number of rows written.
+        """
+        records = list(conn.query(EMBEDDING_ROWS_QUERY, parameters={"since": self.watermark}))
+        written = len(self._upsert_records(records))
+        total = list(conn.query(EMBEDDING_COUNT_QUERY))[0]["total"]
+        if total != len(self):
+            logging.info(f"Vector index out of sync ({len(self)} rows, {total} embedded laws), rebuilding.")
+            self.rebuild(list(conn.query(EMBEDDING_ROWS_QUERY, parameters={"since": 0})))
+            written = len(self)
+        return written
+
+    def _upsert_records(self, records):
+        if not records:
+            return []
+        self.watermark = max(self.watermark, max(record["embedded_at"] for record in records))
+        return self.upsert(
+            [record["law_id"] for record in records],
+            [record["l.text"] for record in records],
+            [record["l.embedding"] for record in records],
+        )
+
+    def _top_k(self, rows, scores, top_k):
+        if top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        ranked = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(float(scores[i]), self.ids[rows[i]], self.texts[rows[i]]) for i in ranked]
+
+    def _extra_arrays(self):
+        return {}
+
+    def _load_extra_arrays(self, data, path):
+        pass
+
+    def _saved_vectors(self):
+        return self.vectors
+
+    def save(self, path=VECTOR_INDEX_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            backend=np.array(self.backend),
+            ids=np.array(self.ids, dtype=str),
+            texts=np.array(self.texts, dtype=str),
+            vectors=self._saved_vectors(),
+            watermark=np.array(self.watermark, dtype=np.int64),
+            **self._extra_arrays(),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=VECTOR_INDEX_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            backend = str(data["backend"]) if "backend" in data.files else FlatIndex.backend
+            index_class = cls if cls.backend == backend else get_index_class(backend)
+            index = index_class(watermark=int(data["watermark"]))
+            index.ids = data["ids"].tolist()
+            index.texts = data["texts"].tolist()
+            index.vectors = data["vectors"].astype(np.float32, copy=False)
+            index._positions = {law_id: row for row, law_id in enumerate(index.ids)}
+            index._load_extra_arrays(data, path)
+        return index
+
+class FlatIndex(VectorIndex):
+    """
+    Exact cosine-similarity index: one matrix-vector product over every row.
+    """
+
+    backend = "flat"
+
+    def search(self, query_vector, top_k=3):
+        if len(self) == 0 or top_k <= 0:
+            return []
+        scores = self.vectors @ normalize_rows(query_vector)
+        return self._top_k(np.arange(len(scores)), scores, top_k)
+
+def get_index_class(backend):
+    if backend == FlatIndex.backend:
+        return FlatIndex
+    if backend == "ivf":
+        from src.retriever.ann_index import IVFIndex
+        return IVFIndex
+    if backend in ("fp16", "int8"):
+        from src.retriever.quantized_index import Float16Index, Int8Index
+        return Float16Index if backend == "fp16" else Int8Index
+    raise ValueError(f"Unknown vector index backend: {backend}")
+
+def build_index(conn, backend=VECTOR_INDEX_BACKEND, partitioned=False):
+    if partitioned:
+        from src.retriever.partitioned_index import PartitionedIndex
+        index = PartitionedIndex(backend)
+    else:
+        index = get_index_class(backend)()
+    index.rebuild(list(conn.query(EMBEDDING_ROWS_QUERY, parameters={"since": 0})))
+    return index
+
+def load_index(path=VECTOR_INDEX_PATH, partitioned=VECTOR_INDEX_PARTITIONED):
+    """
+    Loads the persisted index. With `partitioned`, the per-document partitions
+    are preferred and a single-file index is only loaded when none were saved.
+    """
+    if partitioned:
+        from src.retriever.partitioned_index import PartitionedIndex, partitions_dir
+        if os.path.exists(os.path.join(partitions_dir(path), "manifest.json")):
+            try:
+                return PartitionedIndex.load(path)
+            except Exception as e:
+                logging.error(f"Error loading partitioned vector index from {partitions_dir(path)}: {e}")
+    if not os.path.exists(path):
+        return None
+    try:
+        return VectorIndex.load(path)
+    except Exception as e:
+        logging.error(f"Error loading vector index from {path}: {e}")
+        return None
+
+def main():
+    with Neo4jConnection() as conn:
+        index = load_index()
+        is_partitioned = not isinstance(index, VectorIndex)
+        if index is None or index.backend != VECTOR_INDEX_BACKEND or is_partitioned != VECTOR_INDEX_PARTITIONED:
+            index = build_index(conn, partitioned=VECTOR_INDEX_PARTITIONED)
+        else:
+            index.refresh(conn)
+        index.save()
+    print(f"✅ Vector index saved with {len(index)} laws.")
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,132 @@
 """
 This module provides a Streamlit-based UI for querying laws.
 
+Streamlit re-runs this script on every interaction. The Neo4j driver and the
+vector index are process-wide singletons of the retriever (shared by every
+session thread and refreshed in the background of queries); they are loaded once
+at startup so the first query does not pay for it. The result cache is an
+`st.cache_resource` object shared by every session.
+
 Functions:
+- warm_up_retriever: Opens the Neo4j driver and loads the vector index once per process.
+- get_shared_result_cache: Shared TTL/LRU retrieval result cache.
+- get_shared_filter_options: Books, years and sources offered as search filters.
+- start_metrics_exporters: Starts the Prometheus endpoint / log summary when metrics are enabled.
+- show_answer: Streams the generated answer and shows its timings.
 - Streamlit UI components for user input and displaying results.
 """
+import time
 import streamlit as st
-from src.database.neo4j_utils import Neo4jConnection
-from src.retriever.backend_retriever import retrieve_similar_laws  # Use the RAG code
+from config.constants import (
+    RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS, RETRIEVAL_STRATEGY, CONTEXT_DEPTH, OLLAMA_GENERATE_MODEL
+)
+from src.database.neo4j_utils import Neo4jConnection, get_driver
+from src.database.law_keys import split_law_id
+from src.generation.answer_generator import answer_query
+from src.monitoring import metrics
+from src.retriever.backend_retriever import (  # Use the RAG code
+    retrieve_similar_laws_cached, get_vector_index, get_filter_options, semantic_cache_stats
+)
+from src.retriever.metadata_filters import make_filters
+from src.retriever.result_cache import ResultCache
+
+@st.cache_resource
+def warm_up_retriever():
+    # Retrieval reads both singletons itself; this only moves their loading to startup
+    get_driver()
+    get_vector_index()
+
+@st.cache_resource
+def get_shared_result_cache():
+    return ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS)
+
+@st.cache_data(ttl=300)
+def get_shared_filter_options():
+    # Books only change on import, so the options are re-read every few minutes at most
+    return get_filter_options()
+
+@st.cache_resource
+def start_metrics_exporters():
+    # Streamlit reruns the script on every interaction; the exporters start once per process
+    metrics.start_exporters()
+
+def show_answer(tokens, stats):
+    st.markdown("### Answer")
+    placeholder = st.empty()
+    answer = ""
+    try:
+        # Re-renders the placeholder on every token instead of waiting for the whole answer
+        for token in tokens:
+            answer += token
+            placeholder.markdown(answer + "▌")
+    except Exception as e:
+        st.error(f"Could not generate an answer: {e}")
+        return
+    placeholder.markdown(answer)
+    st.caption(
+        f"First token {stats.get('first_token_seconds', 0.0) * 1000:.0f} ms "
+        f"(retrieval {stats['retrieval_seconds'] * 1000:.0f} ms, "
+        f"model preload {stats['preload_seconds'] * 1000:.0f} ms) · "
+        f"{stats['tokens_per_second']:.1f} tokens/s · "
+        f"prompt {stats['prompt_tokens']} tokens from {stats['sections']} sections"
+    )
+
+warm_up_retriever()
+start_metrics_exporters()
 
 st.title("📚 Law Chatbot (Neo4j + Ollama)")
 
 query = st.text_input("Ask about the law...")
+strategies = ["vector", "hybrid", "lexical", "auto"]
+strategy = st.selectbox("Search mode", strategies, index=strategies.index(RETRIEVAL_STRATEGY))
+with_context = st.checkbox("Include parent, child and referenced sections")
+generate = st.checkbox(f"Answer with {OLLAMA_GENERATE_MODEL}", value=True)
+
+options = get_shared_filter_options()
+with st.expander("Filters"):
+    books = st.multiselect("Books", options["books"])
+    sources = st.multiselect("Sources", options["sources"])
+    years = options["years"]
+    if len(years) > 1:
+        year_from, year_to = st.slider("Years", min_value=years[0], max_value=years[-1], value=(years[0], years[-1]))
+    else:
+        year_from, year_to = None, None
+# The full year range filters nothing, so it keeps the unfiltered cache entries
+if years and (year_from, year_to) == (years[0], years[-1]):
+    year_from, year_to = None, None
+filters = make_filters(books, year_from, year_to, sources)
 
 if st.button("Search"):
     if query:
-        results = retrieve_similar_laws(query)
-        for score, number, text in results:
+        started = time.perf_counter()
+        context_depth = CONTEXT_DEPTH if with_context else 0
+        if generate:
+            results, tokens, stats = answer_query(
+                query, strategy=strategy, context_depth=context_depth, filters=filters,
+                cache=get_shared_result_cache(),
+            )
+            cache_hit, elapsed_ms = stats["cache_hit"], stats["retrieval_seconds"] * 1000
+            show_answer(tokens, stats)
+        else:
+            results, cache_hit = retrieve_similar_laws_cached(
+                query, cache=get_shared_result_cache(), strategy=strategy,
+                context_depth=context_depth, filters=filters,
+            )
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        semantic = semantic_cache_stats()
+        st.caption(
+            f"{'⚡ Cache hit' if cache_hit else 'Cache miss'} · {elapsed_ms:.0f} ms · "
+            f"semantic cache {semantic['hit_rate']:.0%} hits, {semantic['saved_seconds']:.1f} s saved"
+        )
+        for score, law_id, text, *context in results:
+            book, year, source, number = split_law_id(law_id)
             st.markdown(f"### Section {number}")
-            st.markdown(f"**Similarity**: {score:.2f}")
+            if book:
+                st.caption(f"{book} ({year}, {source})")
+            st.markdown(f"**{'Similarity' if strategy == 'vector' else 'Score'}**: {score:.2f}")
             st.markdown(f"> {text}")
+            for item in (context[0] if context else []):
+                st.markdown(f"*{item['relation'].capitalize()} {item['number']}*: {item['text']}")
             st.markdown("---")
     else:
         st.warning("Please enter a query!")
@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.retriever.ann_index import IVFIndex, spherical_kmeans
+from src.retriever.vector_index import FlatIndex, VectorIndex, build_index, get_index_class, normalize_rows
+from unittest.mock import MagicMock
+
+def clustered_vectors(rows=400, dim=16, clusters=8, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    labels = rng.integers(0, clusters, size=rows)
+    return centers[labels] + 0.05 * rng.standard_normal((rows, dim))
+
+class TestIVFIndex(unittest.TestCase):
+    def setUp(self):
+        self.vectors = clustered_vectors()
+        self.ids = [str(i) for i in range(len(self.vectors))]
+        self.texts = [f"Law {i}" for i in range(len(self.vectors))]
+        self.flat = FlatIndex(self.ids, self.texts, self.vectors)
+        self.ivf = IVFIndex(self.ids, self.texts, self.vectors, nlist=8, nprobe=2)
+
+    def test_spherical_kmeans_assigns_every_row(self):
+        centroids, assignments = spherical_kmeans(normalize_rows(self.vectors), 8)
+        self.assertEqual(centroids.shape, (8, 16))
+        self.assertEqual(len(assignments), len(self.vectors))
+        np.testing.assert_allclose(np.linalg.norm(centroids, axis=1), 1.0, rtol=1e-5)
+
+    def test_recall_against_exact_search(self):
+        hits = 0
+        for query in self.vectors[:50]:
+            expected = {number for _, number, _ in self.flat.search(query, 5)}
+            found = {number for _, number, _ in self.ivf.search(query, 5)}
+            hits += len(expected & found)
+        self.assertGreaterEqual(hits / 250, 0.9)
+
+    def test_probing_every_list_is_exact(self):
+        query = self.vectors[3]
+        self.assertEqual(
+            [number for _, number, _ in self.ivf.search(query, 10, nprobe=8)],
+            [number for _, number, _ in self.flat.search(query, 10)],
+        )
+
+    def test_upsert_assigns_new_rows(self):
+        new_vector = self.vectors[0] * 2
+        self.ivf.upsert(["new"], ["New law"], [new_vector])
+
+        self.assertEqual(len(self.ivf.assignments), len(self.ivf))
+        self.assertIn("new", [number for _, number, _ in self.ivf.search(new_vector, 3)])
+
+    def test_untrained_index_falls_back_to_exact(self):
+        index = IVFIndex()
+        index.upsert(["1", "2"], ["a", "b"], [[1, 0], [0, 1]])
+        self.assertFalse(index.is_trained)
+        self.assertEqual(index.search([0, 1], 1)[0][1], "2")
+
+    def test_save_and_load_keeps_backend(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.npz")
+            self.ivf.save(path)
+            loaded = VectorIndex.load(path)
+
+        self.assertIsInstance(loaded, IVFIndex)
+        np.testing.assert_array_equal(loaded.assignments, self.ivf.assignments)
+        query = self.vectors[10]
+        self.assertEqual(loaded.search(query, 5), self.ivf.search(query, 5))
+
+    def test_build_index_with_ivf_backend(self):
+        conn = MagicMock()
+        conn.query.return_value = [
+            {"law_id": number, "l.text": text, "l.embedding": list(vector), "embedded_at": 1}
+            for number, text, vector in zip(self.ids, self.texts, self.vectors)
+        ]
+        index = build_index(conn, backend="ivf")
+
+        self.assertIsInstance(index, IVFIndex)
+        self.assertTrue(index.is_trained)
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            get_index_class("hnsw")
+
+if __name__ == '__main__':
+    unittest.main()
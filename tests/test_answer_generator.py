@@ -0,0 +1,129 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from benchmarks.stub_ollama import run_stub_server
+from src.embeddings.chunking import count_tokens
+from src.generation.answer_generator import build_prompt, stream_answer, answer_query, PROMPT_HEADER
+from src.monitoring import metrics
+from src.retriever.api_utils import GenerationHTTPError
+
+RESULTS = [
+    (0.9, "CivilLaw_2010_Gazette#4", "A contract is an agreement enforceable by law."),
+    (0.8, "CivilLaw_2010_Gazette#5", "An offer must be communicated. " * 20),
+    (0.7, "CivilLaw_2010_Gazette#6", "Acceptance must be absolute."),
+]
+
+class TestBuildPrompt(unittest.TestCase):
+    def test_sections_are_added_in_rank_order(self):
+        prompt, prompt_tokens, sections = build_prompt("What is a contract?", RESULTS, token_budget=10000)
+
+        self.assertEqual(sections, 3)
+        self.assertLess(prompt.index("Section 4, CivilLaw"), prompt.index("Section 5"))
+        self.assertTrue(prompt.startswith(PROMPT_HEADER.format(query="What is a contract?")))
+        self.assertEqual(prompt_tokens, count_tokens(prompt))
+
+    def test_budget_stops_at_first_section_that_does_not_fit(self):
+        prompt, prompt_tokens, sections = build_prompt("What is a contract?", RESULTS, token_budget=100)
+
+        self.assertEqual(sections, 1)
+        self.assertNotIn("Acceptance", prompt)
+        self.assertLessEqual(prompt_tokens, 100)
+
+    def test_best_section_is_truncated_to_the_budget(self):
+        long_result = [(0.9, "CivilLaw_2010_Gazette#5", "offer " * 500)]
+
+        prompt, prompt_tokens, sections = build_prompt("offer?", long_result, token_budget=120)
+
+        self.assertEqual(sections, 1)
+        self.assertLessEqual(prompt_tokens, 120)
+        self.assertIn("offer offer", prompt)
+
+    def test_context_is_included(self):
+        context = [{"relation": "parent", "number": "4", "text": "Chapter on contracts."}]
+        prompt, _, _ = build_prompt("q", [(0.9, "4.1", "Offer.", context)], token_budget=1000)
+
+        self.assertIn("[Section 4.1]\nOffer.\nParent 4: Chapter on contracts.", prompt)
+
+class TestStreamAnswer(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+        metrics.enable()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+
+    def test_tokens_stream_and_timings_are_recorded(self):
+        with run_stub_server(delay_ms=20, token_delay_ms=5, answer="Section 4 defines a contract.") as (base_url, calls):
+            stats = {"prompt_tokens": 12}
+            tokens = list(stream_answer("prompt", stats, model="stub", url=f"{base_url}/api/generate"))
+
+        self.assertEqual("".join(tokens), "Section 4 defines a contract.")
+        self.assertEqual(stats["tokens"], 5)
+        self.assertEqual(stats["eval_count"], 5)
+        self.assertGreaterEqual(stats["first_token_seconds"], 0.02)
+        self.assertGreater(stats["tokens_per_second"], 0)
+        self.assertTrue(calls[0][1]["stream"])
+        stages = metrics.snapshot()["stages"]
+        self.assertEqual(stages["generate.first_token"]["calls"], 1)
+        self.assertEqual(stages["generate.decode"]["items"], 5)
+
+    def test_error_status_raises(self):
+        with run_stub_server() as (base_url, _):
+            with self.assertRaises(GenerationHTTPError):
+                list(stream_answer("prompt", {}, model="stub", url=f"{base_url}/api/unknown"))
+
+class TestAnswerQuery(unittest.TestCase):
+    def test_retrieval_overlaps_with_model_preload(self):
+        retrieving = threading.Event()
+        preloaded = threading.Event()
+
+        def fake_retrieve(query, top_k, cache, strategy, context_depth, filters):
+            retrieving.set()
+            # Returns only once the request thread has preloaded the model meanwhile
+            self.assertTrue(preloaded.wait(5))
+            return RESULTS[:1], False
+
+        def fake_preload(*args, **kwargs):
+            self.assertTrue(retrieving.wait(5))
+            preloaded.set()
+
+        with run_stub_server(answer="A contract.") as (base_url, calls), \
+                patch("src.generation.answer_generator.retrieve_similar_laws_cached", side_effect=fake_retrieve), \
+                patch("src.generation.answer_generator.preload_model", side_effect=fake_preload):
+            results, tokens, stats = answer_query("contract", url=f"{base_url}/api/generate", model="stub")
+            answer = "".join(tokens)
+
+        self.assertEqual(results, RESULTS[:1])
+        self.assertEqual(answer, "A contract.")
+        self.assertEqual(stats["sections"], 1)
+        self.assertIn("A contract is an agreement", calls[0][1]["prompt"])
+        self.assertEqual(stats["tokens"], 2)
+
+    def test_retrieval_time_leaves_out_a_slow_preload(self):
+        def slow_preload(*args, **kwargs):
+            time.sleep(0.3)
+
+        with run_stub_server(answer="Yes.") as (base_url, _), \
+                patch("src.generation.answer_generator.retrieve_similar_laws_cached", return_value=(RESULTS[:1], False)), \
+                patch("src.generation.answer_generator.preload_model", side_effect=slow_preload):
+            _, tokens, stats = answer_query("q", url=f"{base_url}/api/generate", model="stub", preload=True)
+            list(tokens)
+
+        self.assertLess(stats["retrieval_seconds"], 0.1)
+        self.assertGreaterEqual(stats["preload_seconds"], 0.3)
+
+    def test_preload_sends_request_without_prompt(self):
+        with run_stub_server(answer="Yes.") as (base_url, calls), \
+                patch("src.generation.answer_generator.retrieve_similar_laws_cached", return_value=([], True)):
+            _, tokens, stats = answer_query("q", url=f"{base_url}/api/generate", model="stub", preload=True)
+            list(tokens)
+
+        self.assertNotIn("prompt", calls[0][1])
+        self.assertEqual(calls[1][1]["options"], {"num_predict": 512})
+        self.assertTrue(stats["cache_hit"])
+        self.assertEqual(stats["sections"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
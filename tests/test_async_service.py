@@ -0,0 +1,115 @@
+import asyncio
+import threading
+import unittest
+from unittest.mock import patch
+from benchmarks.stub_ollama import run_stub_server, stub_embedding
+from src.retriever.async_service import AsyncRetrievalService
+from src.retriever.embedding_cache import EmbeddingCache
+from src.retriever.vector_index import FlatIndex
+
+def make_index(texts, dim=16):
+    return FlatIndex(
+        ids=[str(i) for i in range(len(texts))],
+        texts=texts,
+        vectors=[stub_embedding(text, dim) for text in texts],
+    )
+
+class TestAsyncRetrievalService(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.texts = ["talaq", "dower", "polygamy", "maintenance", "succession"]
+        self.index = make_index(self.texts)
+        self.batches = []
+
+    async def embed_batch(self, texts):
+        self.batches.append(list(texts))
+        await asyncio.sleep(0.01)
+        return [stub_embedding(text, 16) for text in texts]
+
+    def make_service(self, **kwargs):
+        return AsyncRetrievalService(
+            embed_batch=self.embed_batch, index=self.index, cache=EmbeddingCache(path=None), **kwargs
+        )
+
+    async def test_retrieve_returns_top_k(self):
+        service = self.make_service()
+        results = await service.retrieve("dower", top_k=2)
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[0][2], "dower")
+        self.assertAlmostEqual(results[0][0], 1.0, places=5)
+
+    async def test_identical_queries_are_coalesced(self):
+        service = self.make_service()
+        results = await asyncio.gather(*(service.retrieve(" Talaq ", top_k=1) for _ in range(10)))
+
+        self.assertTrue(all(result == results[0] for result in results))
+        self.assertEqual(self.batches, [[" Talaq "]])
+        self.assertEqual(service.stats["coalesced"], 9)
+
+    async def test_concurrent_queries_are_micro_batched(self):
+        service = self.make_service(batch_window_ms=20)
+        await asyncio.gather(*(service.retrieve(text, top_k=1) for text in self.texts))
+
+        self.assertEqual(len(self.batches), 1)
+        self.assertEqual(sorted(self.batches[0]), sorted(self.texts))
+
+    async def test_full_batch_flushes_immediately(self):
+        service = self.make_service(batch_window_ms=10000, max_batch_size=2)
+        await asyncio.wait_for(
+            asyncio.gather(service.retrieve("talaq"), service.retrieve("dower")), timeout=1
+        )
+        self.assertEqual(len(self.batches), 1)
+
+    async def test_cached_embeddings_skip_the_model(self):
+        service = self.make_service()
+        await service.retrieve("talaq")
+        await service.retrieve("talaq", top_k=5)
+
+        self.assertEqual(len(self.batches), 1)
+
+    async def test_cache_and_scan_run_off_the_event_loop(self):
+        loop_thread = threading.get_ident()
+        cache = EmbeddingCache(path=None)
+        threads = {}
+        for name in ("get", "put_many"):
+            method = getattr(cache, name)
+            def record(*args, name=name, method=method):
+                threads[name] = threading.get_ident()
+                return method(*args)
+            setattr(cache, name, record)
+        service = AsyncRetrievalService(embed_batch=self.embed_batch, index=self.index, cache=cache)
+        with patch("src.retriever.async_service.search_vector_index",
+                   side_effect=lambda *args: threads.setdefault("search", threading.get_ident()) and []):
+            await service.retrieve("talaq")
+
+        self.assertEqual(set(threads), {"get", "put_many", "search"})
+        self.assertNotIn(loop_thread, threads.values())
+        self.assertEqual(service._batch_tasks, set())
+
+    async def test_embedding_errors_propagate(self):
+        async def failing(texts):
+            raise Exception("Ollama down")
+        service = AsyncRetrievalService(embed_batch=failing, index=self.index, cache=EmbeddingCache(path=None))
+
+        with self.assertRaises(Exception):
+            await service.retrieve("talaq")
+
+    async def test_stub_server_batch_endpoint(self):
+        with run_stub_server(dim=16) as (base_url, calls):
+            async with AsyncRetrievalService(
+                index=self.index, cache=EmbeddingCache(path=None), embed_url=f"{base_url}/api/embed"
+            ) as service:
+                results = await asyncio.gather(service.retrieve("talaq", 1), service.retrieve("dower", 1))
+
+        self.assertEqual([result[0][2] for result in results], ["talaq", "dower"])
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(calls[0][0], "/api/embed")
+
+    @patch('src.retriever.async_service.AsyncGraphDatabase', None)
+    @patch('src.retriever.async_service.scan_similar_laws', return_value=[(0.5, "1", "Fallback")])
+    async def test_falls_back_to_scan_without_index(self, mock_scan):
+        service = AsyncRetrievalService(embed_batch=self.embed_batch, index=FlatIndex(), cache=EmbeddingCache(path=None))
+        self.assertEqual(await service.retrieve("talaq"), [(0.5, "1", "Fallback")])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,26 @@
+import threading
+import time
 import unittest
 from unittest.mock import patch, MagicMock
 import numpy as np
+import src.retriever.backend_retriever as backend_retriever
 from src.retriever.backend_retriever import cosine_similarity, retrieve_similar_laws, get_embedding
+from src.retriever.vector_index import FlatIndex
+from src.retriever.result_cache import ResultCache
+from src.retriever.embedding_cache import EmbeddingCache
+from src.retriever.bm25_index import BM25Index
+from src.retriever.metadata_filters import make_filters
+from src.retriever.partitioned_index import PartitionedIndex
+from src.retriever.semantic_cache import SemanticCache
+
+def setUpModule():
+    # The process-wide semantic cache would serve one test's results to the next
+    global _semantic_cache
+    _semantic_cache = backend_retriever._semantic_cache
+    backend_retriever._semantic_cache = SemanticCache(max_items=0)
+
+def tearDownModule():
+    backend_retriever._semantic_cache = _semantic_cache
 
 class TestBackendRetriever(unittest.TestCase):
     def test_cosine_similarity(self):
@@ -26,18 +45,19 @@ class TestBackendRetriever(unittest.TestCase):
         expected = np.dot(vec1, vec2) / (np.linalg.norm(vec1) * np.linalg.norm(vec2))
         self.assertAlmostEqual(cosine_similarity(vec1, vec2), expected)
 
+    @patch('src.retriever.backend_retriever.get_vector_index', return_value=None)
     @patch('src.retriever.backend_retriever.get_embedding')
     @patch('src.retriever.backend_retriever.Neo4jConnection')
-    def test_retrieve_similar_laws(self, mock_neo4j, mock_get_embedding):
+    def test_retrieve_similar_laws(self, mock_neo4j, mock_get_embedding, mock_get_index):
         # Setup mock embedding function
         mock_get_embedding.return_value = [0.1, 0.2, 0.3, 0.4]
         
         # Setup mock database results
         mock_result = [
-            {"l.number": "Art 1", "l.text": "First law", "l.embedding": [0.9, 0.1, 0.1, 0.1]},
-            {"l.number": "Art 2", "l.text": "Second law", "l.embedding": [0.1, 0.9, 0.1, 0.1]},
-            {"l.number": "Art 3", "l.text": "Third law", "l.embedding": [0.1, 0.2, 0.3, 0.4]},
-            {"l.number": "Art 4", "l.text": "Fourth law", "l.embedding": [0.4, 0.3, 0.2, 0.1]},
+            {"law_id": "Art 1", "l.text": "First law", "l.embedding": [0.9, 0.1, 0.1, 0.1]},
+            {"law_id": "Art 2", "l.text": "Second law", "l.embedding": [0.1, 0.9, 0.1, 0.1]},
+            {"law_id": "Art 3", "l.text": "Third law", "l.embedding": [0.1, 0.2, 0.3, 0.4]},
+            {"law_id": "Art 4", "l.text": "Fourth law", "l.embedding": [0.4, 0.3, 0.2, 0.1]},
         ]
         
         mock_neo4j_instance = mock_neo4j.return_value.__enter__.return_value
@@ -51,14 +71,32 @@ class TestBackendRetriever(unittest.TestCase):
         self.assertEqual(results[0][1], "Art 3")  # First result should be Art 3
         self.assertAlmostEqual(results[0][0], 1.0)  # Perfect similarity
         
-    @patch('src.retriever.backend_retriever.fetch_embedding')
-    def test_get_embedding(self, mock_fetch):
-        mock_fetch.return_value = [0.1, 0.2, 0.3]
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    @patch('src.retriever.backend_retriever.get_embedding')
+    @patch('src.retriever.backend_retriever.Neo4jConnection')
+    def test_retrieve_similar_laws_uses_index(self, mock_neo4j, mock_get_embedding, mock_get_index):
+        mock_get_embedding.return_value = [0.1, 0.2, 0.3, 0.4]
+        mock_get_index.return_value = FlatIndex(
+            ids=["Art 1", "Art 3"],
+            texts=["First law", "Third law"],
+            vectors=[[0.9, 0.1, 0.1, 0.1], [0.1, 0.2, 0.3, 0.4]],
+        )
+
+        results = retrieve_similar_laws("test query", top_k=1)
+
+        self.assertEqual(results[0][1], "Art 3")
+        self.assertAlmostEqual(results[0][0], 1.0, places=5)
+        mock_neo4j.assert_not_called()
+
+    @patch('src.retriever.backend_retriever.get_embedding_cache', return_value=EmbeddingCache(path=None))
+    @patch('src.retriever.backend_retriever.get_embedding_client')
+    def test_get_embedding(self, mock_client, mock_cache):
+        mock_client.return_value.embed.return_value = [0.1, 0.2, 0.3]
         
         result = get_embedding("test text")
         
         self.assertEqual(result, [0.1, 0.2, 0.3])
-        mock_fetch.assert_called_once()
+        mock_client.return_value.embed.assert_called_once_with("test text")
 
     @patch('src.retriever.backend_retriever.Neo4jConnection')
     @patch('src.retriever.backend_retriever.get_embedding')
@@ -69,5 +107,446 @@ class TestBackendRetriever(unittest.TestCase):
         with self.assertRaises(Exception):
             retrieve_similar_laws("test query")
             
+class TestCachedRetrieval(unittest.TestCase):
+    @patch('src.retriever.backend_retriever.get_corpus_version')
+    @patch('src.retriever.backend_retriever.retrieve_similar_laws')
+    def test_retrieve_similar_laws_cached(self, mock_retrieve, mock_version):
+        mock_retrieve.return_value = [(0.9, "7", "Talaq")]
+        mock_version.return_value = "10:100"
+        cache = ResultCache()
+
+        first = backend_retriever.retrieve_similar_laws_cached("Talaq ", top_k=3, cache=cache)
+        second = backend_retriever.retrieve_similar_laws_cached("  talaq", top_k=3, cache=cache)
+        mock_version.return_value = "11:200"
+        third = backend_retriever.retrieve_similar_laws_cached("talaq", top_k=3, cache=cache)
+
+        self.assertEqual(first, ([(0.9, "7", "Talaq")], False))
+        self.assertEqual(second, ([(0.9, "7", "Talaq")], True))
+        self.assertFalse(third[1])
+        self.assertEqual(mock_retrieve.call_count, 2)
+
+    @patch('src.retriever.backend_retriever.get_corpus_version', return_value="1:1")
+    @patch('src.retriever.backend_retriever.Neo4jConnection')
+    @patch('src.retriever.backend_retriever.retrieve_laws')
+    def test_cached_retrieval_with_context(self, mock_retrieve, mock_neo4j, mock_version):
+        mock_retrieve.return_value = [(0.9, "7", "Talaq")]
+        conn = mock_neo4j.return_value.__enter__.return_value
+        conn.query.return_value = [
+            {"law_id": "7", "ancestors": [{"law_id": "6", "number": "6", "text": "Divorce", "distance": 1}],
+             "children": [], "references": []},
+        ]
+
+        results, hit = backend_retriever.retrieve_similar_laws_cached("talaq", cache=ResultCache(), context_depth=1)
+
+        self.assertFalse(hit)
+        self.assertEqual(results[0][:3], (0.9, "7", "Talaq"))
+        self.assertEqual(results[0][3][0]["number"], "6")
+        conn.query.assert_called_once()
+
+    @patch('src.retriever.backend_retriever.VECTOR_INDEX_PARTITIONED', False)
+    @patch('src.retriever.backend_retriever.load_index')
+    @patch('src.retriever.backend_retriever.Neo4jConnection')
+    @patch('src.retriever.backend_retriever.is_snapshot_fresh')
+    @patch('src.retriever.backend_retriever.load_snapshot')
+    def test_load_startup_index_refreshes_stale_snapshot(self, mock_load_snapshot, mock_fresh, mock_neo4j, mock_load_index):
+        snapshot = MagicMock()
+        mock_load_snapshot.return_value = snapshot
+        mock_fresh.return_value = True
+        self.assertIs(backend_retriever.load_startup_index(), snapshot)
+        snapshot.refresh.assert_not_called()
+
+        mock_fresh.return_value = False
+        backend_retriever.load_startup_index()
+        snapshot.refresh.assert_called_once()
+
+        mock_load_snapshot.return_value = None
+        self.assertIs(backend_retriever.load_startup_index(), mock_load_index.return_value)
+
+    @patch('src.retriever.backend_retriever._vector_index', None)
+    @patch('src.retriever.backend_retriever.load_startup_index')
+    def test_concurrent_cold_start_loads_the_index_once(self, mock_load):
+        def slow_load():
+            time.sleep(0.05)
+            return FlatIndex(ids=["1"], texts=["a"], vectors=[[1, 0]])
+        mock_load.side_effect = slow_load
+        indexes = []
+        threads = [threading.Thread(target=lambda: indexes.append(backend_retriever.get_vector_index())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock_load.assert_called_once()
+        self.assertTrue(all(index is indexes[0] for index in indexes))
+
+    @patch('src.retriever.backend_retriever.VECTOR_INDEX_REFRESH_SECONDS', 0)
+    @patch('src.retriever.backend_retriever.Neo4jConnection')
+    def test_refresh_swaps_in_a_refreshed_copy(self, mock_neo4j):
+        served = FlatIndex(ids=["1"], texts=["a"], vectors=[[1, 0]], watermark=1)
+        conn = mock_neo4j.return_value.__enter__.return_value
+        conn.query.side_effect = [
+            [{"law_id": "2", "l.text": "b", "l.embedding": [0, 1], "embedded_at": 2}],
+            [{"total": 2}],
+        ]
+        with patch.object(backend_retriever, "_vector_index", served), \
+                patch.object(FlatIndex, "save") as mock_save:
+            refreshed = backend_retriever.get_vector_index()
+
+        self.assertIsNot(refreshed, served)
+        self.assertEqual(refreshed.ids, ["1", "2"])
+        self.assertEqual(served.ids, ["1"])
+        self.assertEqual(served.vectors.shape, (1, 2))
+        mock_save.assert_called_once()
+
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    def test_get_corpus_version_from_index(self, mock_get_index):
+        index = FlatIndex(ids=["1", "2"], texts=["a", "b"], vectors=[[1, 0], [0, 1]], watermark=42)
+        mock_get_index.return_value = index
+        self.assertEqual(backend_retriever.get_corpus_version(), "2:42")
+
+class FakeVectorIndexConnection:
+    """Stand-in for a Neo4j 5.11+ server: answers SHOW INDEXES and db.index.vector.queryNodes."""
+
+    def __init__(self, vector_index=True, search_error=None):
+        self.vector_index = vector_index
+        self.search_error = search_error
+        self.queries = []
+
+    def query(self, query, parameters=None):
+        self.queries.append((query, parameters))
+        if query.startswith("SHOW INDEXES"):
+            if not self.vector_index:
+                raise Exception("Invalid input 'SHOW'")
+            return [{"state": "ONLINE"}]
+        if "db.index.vector.queryNodes" in query:
+            if self.search_error:
+                raise self.search_error
+            rows = [(1.0, "7", "Talaq"), (0.75, "8", "Dissolution of marriage")]
+            return [{"score": score, "law_id": number, "text": text} for score, number, text in rows[:parameters["top_k"]]]
+        raise AssertionError(f"Unexpected query: {query}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+class TestServerVectorRetrieval(unittest.TestCase):
+    def setUp(self):
+        backend_retriever._server_vector_index_available = None
+        backend_retriever._server_vector_index_checked_at = 0.0
+
+    def tearDown(self):
+        backend_retriever._server_vector_index_available = None
+        backend_retriever._server_vector_index_checked_at = 0.0
+
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    @patch('src.retriever.backend_retriever.get_embedding', return_value=[0.1, 0.2])
+    @patch('src.retriever.backend_retriever.Neo4jConnection')
+    def test_server_mode_queries_vector_index(self, mock_neo4j, mock_get_embedding, mock_get_index):
+        fake = FakeVectorIndexConnection()
+        mock_neo4j.return_value = fake
+
+        results = retrieve_similar_laws("talaq", top_k=2, mode="server")
+
+        self.assertEqual(results, [(1.0, "7", "Talaq"), (0.5, "8", "Dissolution of marriage")])
+        query, parameters = fake.queries[-1]
+        self.assertIn("CALL db.index.vector.queryNodes($index_name, $top_k, $embedding)", query)
+        self.assertEqual(parameters, {"index_name": "law_embedding", "top_k": 2, "embedding": [0.1, 0.2]})
+        mock_get_index.assert_not_called()
+
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    @patch('src.retriever.backend_retriever.get_embedding', return_value=[0.1, 0.2])
+    @patch('src.retriever.backend_retriever.Neo4jConnection')
+    def test_auto_mode_falls_back_without_vector_index(self, mock_neo4j, mock_get_embedding, mock_get_index):
+        mock_neo4j.return_value = FakeVectorIndexConnection(vector_index=False)
+        mock_get_index.return_value = FlatIndex(ids=["1"], texts=["Local"], vectors=[[0.1, 0.2]])
+
+        results = retrieve_similar_laws("talaq", top_k=1, mode="auto")
+
+        self.assertEqual(results[0][1], "1")
+        self.assertFalse(backend_retriever._server_vector_index_available)
+
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    @patch('src.retriever.backend_retriever.get_embedding', return_value=[0.1, 0.2])
+    @patch('src.retriever.backend_retriever.Neo4jConnection')
+    def test_failed_server_search_falls_back_and_rechecks(self, mock_neo4j, mock_get_embedding, mock_get_index):
+        fake = FakeVectorIndexConnection(search_error=Exception("There is no such vector schema index"))
+        mock_neo4j.return_value = fake
+        mock_get_index.return_value = FlatIndex(ids=["1"], texts=["Local"], vectors=[[0.1, 0.2]])
+
+        results = retrieve_similar_laws("talaq", top_k=1, mode="auto")
+
+        self.assertEqual(results[0][1], "1")
+        self.assertIsNone(backend_retriever._server_vector_index_available)
+        fake.search_error = None
+        results = retrieve_similar_laws("talaq", top_k=1, mode="auto")
+        self.assertEqual(results[0][1], "7")
+        self.assertEqual(sum(query.startswith("SHOW INDEXES") for query, _ in fake.queries), 2)
+
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    @patch('src.retriever.backend_retriever.get_embedding', return_value=[0.1, 0.2])
+    @patch('src.retriever.backend_retriever.Neo4jConnection')
+    def test_availability_is_rechecked_after_refresh_interval(self, mock_neo4j, mock_get_embedding, mock_get_index):
+        fake = FakeVectorIndexConnection(vector_index=False)
+        mock_neo4j.return_value = fake
+        mock_get_index.return_value = FlatIndex(ids=["1"], texts=["Local"], vectors=[[0.1, 0.2]])
+
+        self.assertEqual(retrieve_similar_laws("talaq", top_k=1, mode="auto")[0][1], "1")
+        fake.vector_index = True
+        # Within the interval the failed check is kept
+        self.assertEqual(retrieve_similar_laws("talaq", top_k=1, mode="auto")[0][1], "1")
+        with patch('src.retriever.backend_retriever.VECTOR_INDEX_REFRESH_SECONDS', 0):
+            self.assertEqual(retrieve_similar_laws("talaq", top_k=1, mode="auto")[0][1], "7")
+
+class TestHybridRetrieval(unittest.TestCase):
+    def setUp(self):
+        self.lexical_index = BM25Index()
+        self.lexical_index.replace_document("book.docx", [
+            ("1", "Dower is payable on marriage"),
+            ("2", "Talaq is pronounced by the husband"),
+            ("3", "Maintenance of the wife during marriage"),
+        ])
+
+    def test_reciprocal_rank_fusion(self):
+        lexical = [(5.0, "1", "a"), (3.0, "2", "b")]
+        vector = [(0.9, "2", "b"), (0.8, "3", "c")]
+        fused = backend_retriever.reciprocal_rank_fusion([lexical, vector], top_k=3)
+        self.assertEqual([number for _, number, _ in fused], ["2", "1", "3"])
+
+    @patch('src.retriever.backend_retriever.retrieve_similar_laws')
+    @patch('src.retriever.backend_retriever.get_bm25_index')
+    def test_lexical_strategy_skips_embedding(self, mock_get_bm25, mock_retrieve):
+        mock_get_bm25.return_value = self.lexical_index
+        results = backend_retriever.retrieve_laws("talaq", top_k=1, strategy="lexical")
+        self.assertEqual(results[0][1], "2")
+        mock_retrieve.assert_not_called()
+
+    @patch('src.retriever.backend_retriever.retrieve_similar_laws')
+    @patch('src.retriever.backend_retriever.get_bm25_index')
+    def test_hybrid_strategy_fuses_both_rankings(self, mock_get_bm25, mock_retrieve):
+        mock_get_bm25.return_value = self.lexical_index
+        mock_retrieve.return_value = [(0.9, "3", "Maintenance of the wife during marriage")]
+        results = backend_retriever.retrieve_laws("marriage dower", top_k=2, strategy="hybrid")
+        self.assertEqual({number for _, number, _ in results}, {"1", "3"})
+        mock_retrieve.assert_called_once()
+
+    @patch('src.retriever.backend_retriever.retrieve_similar_laws')
+    @patch('src.retriever.backend_retriever.get_bm25_index')
+    def test_auto_strategy_routes_by_query_shape(self, mock_get_bm25, mock_retrieve):
+        mock_get_bm25.return_value = self.lexical_index
+        mock_retrieve.return_value = [(0.9, "3", "Maintenance of the wife during marriage")]
+        backend_retriever.retrieve_laws("dower", top_k=1, strategy="auto")
+        mock_retrieve.assert_not_called()
+        backend_retriever.retrieve_laws("what does the husband owe his wife after divorce", top_k=1, strategy="auto")
+        mock_retrieve.assert_called_once()
+
+    @patch('src.retriever.backend_retriever.retrieve_similar_laws')
+    @patch('src.retriever.backend_retriever.get_bm25_index')
+    def test_falls_back_to_vector_without_bm25_index(self, mock_get_bm25, mock_retrieve):
+        mock_get_bm25.return_value = None
+        mock_retrieve.return_value = [(0.9, "3", "c")]
+        self.assertEqual(backend_retriever.retrieve_laws("dower", top_k=1, strategy="hybrid"), [(0.9, "3", "c")])
+
+class TestCitationRouting(unittest.TestCase):
+    def setUp(self):
+        backend_retriever._citation_index_version = None
+        backend_retriever._book_aliases = None
+        self.index = FlatIndex(
+            ids=["CivilLaw_2020_A#4.2", "CivilLaw_2020_A#4.2.1", "PenalCode_2019_B#4.2"],
+            texts=["Contracts", "Offer", "Theft"],
+            vectors=[[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+        )
+
+    @patch('src.retriever.backend_retriever.CitationIndex')
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    def test_concurrent_first_requests_build_the_citation_index_once(self, mock_get_index, mock_citation_index):
+        mock_get_index.return_value = self.index
+        def slow_build(rows):
+            time.sleep(0.05)
+            return object()
+        mock_citation_index.side_effect = slow_build
+        indexes = []
+        threads = [threading.Thread(target=lambda: indexes.append(backend_retriever.get_citation_index())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock_citation_index.assert_called_once()
+        self.assertTrue(all(index is indexes[0] for index in indexes))
+
+    @patch('src.retriever.backend_retriever._bm25_index_mtime', None)
+    @patch('src.retriever.backend_retriever._bm25_index', None)
+    @patch('src.retriever.backend_retriever.os.path.getmtime', return_value=1.0)
+    @patch('src.retriever.backend_retriever.load_bm25_index')
+    def test_concurrent_first_requests_load_the_bm25_index_once(self, mock_load, mock_getmtime):
+        def slow_load(path):
+            time.sleep(0.05)
+            return BM25Index()
+        mock_load.side_effect = slow_load
+        indexes = []
+        threads = [threading.Thread(target=lambda: indexes.append(backend_retriever.get_bm25_index())) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        mock_load.assert_called_once()
+        self.assertTrue(all(index is indexes[0] for index in indexes))
+
+    @patch('src.retriever.backend_retriever.get_embedding')
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    def test_citation_skips_embedding(self, mock_get_index, mock_get_embedding):
+        mock_get_index.return_value = self.index
+        before = backend_retriever.routing_stats()["routes"].get("citation", {}).get("queries", 0)
+
+        results = backend_retriever.retrieve_laws("Section 4.2 of the penal code", top_k=3, strategy="vector")
+
+        self.assertEqual(results, [(1.0, "PenalCode_2019_B#4.2", "Theft")])
+        mock_get_embedding.assert_not_called()
+        self.assertEqual(backend_retriever.routing_stats()["routes"]["citation"]["queries"], before + 1)
+
+    @patch('src.retriever.backend_retriever.retrieve_similar_laws')
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    def test_unknown_section_falls_back_to_retrieval(self, mock_get_index, mock_retrieve):
+        mock_get_index.return_value = self.index
+        mock_retrieve.return_value = [(0.7, "CivilLaw_2020_A#4.2", "Contracts")]
+
+        results = backend_retriever.retrieve_laws("Section 99", top_k=1, strategy="vector")
+
+        self.assertEqual(results, mock_retrieve.return_value)
+        self.assertIn("citation_miss", backend_retriever.routing_stats()["routes"])
+
+    @patch('src.retriever.backend_retriever.Neo4jConnection')
+    @patch('src.retriever.backend_retriever.get_bm25_index', return_value=None)
+    @patch('src.retriever.backend_retriever.get_vector_index', return_value=None)
+    def test_index_seek_without_local_index(self, mock_get_index, mock_get_bm25, mock_neo4j):
+        conn = mock_neo4j.return_value.__enter__.return_value
+        conn.query.side_effect = [
+            [{"book": "CivilLaw", "document": "CivilLaw_2020_A"}, {"book": "PenalCode", "document": "PenalCode_2019_B"}],
+            [{"law_id": "CivilLaw_2020_A#4.2", "text": "Contracts", "depth": 2},
+             {"law_id": "CivilLaw_2020_A#4.2.1", "text": "Offer", "depth": 3}],
+        ]
+
+        results = backend_retriever.resolve_citation("s. 4.2 civil law", top_k=2, filters=make_filters(year_from=2010))
+
+        self.assertEqual([score for score, _, _ in results], [1.0, 0.5])
+        _, kwargs = conn.query.call_args
+        self.assertEqual(kwargs["parameters"], {
+            "number": "4.2", "prefix": "4.2.", "cited_books": ["CivilLaw"], "top_k": 2,
+            "books": None, "sources": None, "year_from": 2010, "year_to": None,
+        })
+
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    def test_non_citation_does_not_touch_indexes(self, mock_get_index):
+        self.assertIsNone(backend_retriever.resolve_citation("what is dower"))
+        mock_get_index.assert_not_called()
+
+class TestFilteredRetrieval(unittest.TestCase):
+    def setUp(self):
+        self.ids = ["CivilLaw_2010_A#1", "CivilLaw_2010_A#2", "PenalCode_2020_B#1", "PenalCode_2020_B#2"]
+        self.texts = ["Contracts", "Offer", "Theft", "Fraud"]
+        self.vectors = np.array([[1, 0], [0.9, 0.1], [0.95, 0.05], [0, 1]], dtype=np.float32)
+
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    @patch('src.retriever.backend_retriever.get_embedding', return_value=[1, 0])
+    def test_partitioned_index_searches_matching_documents(self, mock_embed, mock_get_index):
+        index = PartitionedIndex.from_index(FlatIndex(self.ids, self.texts, self.vectors))
+        mock_get_index.return_value = index
+        with patch.object(index.partitions["CivilLaw_2010_A"], "search", wraps=index.partitions["CivilLaw_2010_A"].search) as civil:
+            results = retrieve_similar_laws("theft", top_k=2, mode="local", filters=make_filters(books=["PenalCode"]))
+        self.assertEqual([law_id for _, law_id, _ in results], ["PenalCode_2020_B#1", "PenalCode_2020_B#2"])
+        civil.assert_not_called()
+
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    @patch('src.retriever.backend_retriever.get_embedding', return_value=[1, 0])
+    def test_single_index_results_are_filtered(self, mock_embed, mock_get_index):
+        mock_get_index.return_value = FlatIndex(self.ids, self.texts, self.vectors)
+        results = retrieve_similar_laws("theft", top_k=1, mode="local", filters=make_filters(year_from=2015))
+        self.assertEqual(results[0][1], "PenalCode_2020_B#1")
+
+    @patch('src.retriever.backend_retriever.Neo4jConnection')
+    def test_scan_pushes_filters_into_cypher(self, mock_neo4j):
+        conn = mock_neo4j.return_value.__enter__.return_value
+        conn.query.return_value = [{"law_id": "PenalCode_2020_B#1", "l.text": "Theft", "l.embedding": [1, 0]}]
+        backend_retriever.scan_similar_laws([1, 0], filters=make_filters(sources=["B"], year_to=2020))
+        query, = conn.query.call_args.args
+        self.assertIn("l.source IN $sources", query)
+        self.assertEqual(conn.query.call_args.kwargs["parameters"]["sources"], ["B"])
+
+    @patch('src.retriever.backend_retriever.get_corpus_version', return_value="1:1")
+    @patch('src.retriever.backend_retriever.retrieve_laws')
+    def test_cache_key_includes_filters(self, mock_retrieve, mock_version):
+        mock_retrieve.return_value = [(1.0, "CivilLaw_2010_A#1", "Contracts")]
+        cache = ResultCache()
+        backend_retriever.retrieve_similar_laws_cached("contracts", cache=cache, filters=make_filters(books=["CivilLaw"]))
+        _, hit = backend_retriever.retrieve_similar_laws_cached("contracts", cache=cache)
+        self.assertFalse(hit)
+        _, hit = backend_retriever.retrieve_similar_laws_cached("contracts", cache=cache, filters=make_filters(books=["CivilLaw"]))
+        self.assertTrue(hit)
+
+    @patch('src.retriever.backend_retriever.VECTOR_INDEX_PARTITIONED', True)
+    @patch('src.retriever.backend_retriever.Neo4jConnection')
+    @patch('src.retriever.backend_retriever.is_snapshot_fresh', return_value=True)
+    @patch('src.retriever.backend_retriever.load_snapshot')
+    def test_startup_snapshot_is_partitioned_without_copies(self, mock_load_snapshot, mock_fresh, mock_neo4j):
+        snapshot = FlatIndex(self.ids, self.texts, self.vectors)
+        mock_load_snapshot.return_value = snapshot
+        index = backend_retriever.load_startup_index()
+        self.assertIsInstance(index, PartitionedIndex)
+        self.assertEqual(sorted(index.partitions), ["CivilLaw_2010_A", "PenalCode_2020_B"])
+        for partition in index.partitions.values():
+            self.assertTrue(np.shares_memory(partition.vectors, snapshot.vectors))
+
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    def test_filter_options_from_partitions(self, mock_get_index):
+        mock_get_index.return_value = PartitionedIndex.from_index(FlatIndex(self.ids, self.texts, self.vectors))
+        self.assertEqual(backend_retriever.get_filter_options(), {
+            "books": ["CivilLaw", "PenalCode"], "years": [2010, 2020], "sources": ["A", "B"],
+        })
+
+class TestChunkedRetrieval(unittest.TestCase):
+    def setUp(self):
+        # Section 2 is long: its own row holds the mean of its chunks, which match the query better
+        self.index = FlatIndex(
+            ids=["Book_2020_A#1", "Book_2020_A#2", "Book_2020_A#2@0", "Book_2020_A#2@1", "Book_2020_A#3"],
+            texts=["Short", "Long", "Long", "Long", "Other"],
+            vectors=[[0.8, 0.6, 0], [0.5, 0.5, 0.7], [0.95, 0, 0.3], [0.9, 0.1, 0.4], [0, 0, 1]],
+        )
+
+    def test_max_sim_ranks_sections_by_best_chunk(self):
+        results = backend_retriever.search_vector_index(self.index, [1, 0, 0], top_k=2)
+        self.assertEqual([law_id for _, law_id, _ in results], ["Book_2020_A#2", "Book_2020_A#1"])
+        self.assertEqual(results[0][2], "Long")
+
+    def test_chunk_rows_do_not_crowd_out_sections(self):
+        results = backend_retriever.search_vector_index(self.index, [1, 0, 0.3], top_k=3)
+        self.assertEqual(len({law_id for _, law_id, _ in results}), 3)
+
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    def test_citation_index_skips_chunk_rows(self, mock_get_index):
+        mock_get_index.return_value = self.index
+        backend_retriever._citation_index_version = None
+        self.assertEqual(len(backend_retriever.get_citation_index()), 3)
+
+class TestSemanticCaching(unittest.TestCase):
+    @patch('src.retriever.backend_retriever.get_vector_index')
+    @patch('src.retriever.backend_retriever.get_embedding')
+    def test_paraphrase_reuses_results(self, mock_get_embedding, mock_get_index):
+        index = FlatIndex(ids=["7", "8"], texts=["Talaq", "Dower"], vectors=[[1, 0], [0, 1]])
+        mock_get_index.return_value = index
+        cache = SemanticCache(max_items=8, threshold=0.95)
+        mock_get_embedding.side_effect = [[1.0, 0.05], [0.99, 0.08], [0.1, 1.0]]
+
+        with patch.object(index, "search", wraps=index.search) as search:
+            first = retrieve_similar_laws("grounds for divorce", top_k=1, mode="local", semantic_cache=cache)
+            second = retrieve_similar_laws("how can a wife get divorce", top_k=1, mode="local", semantic_cache=cache)
+            retrieve_similar_laws("what is dower", top_k=1, mode="local", semantic_cache=cache)
+
+        self.assertEqual(first, second)
+        self.assertEqual(search.call_count, 2)
+        self.assertEqual(cache.stats()["hits"], 1)
+
 if __name__ == '__main__':
     unittest.main()
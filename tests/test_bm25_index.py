@@ -0,0 +1,43 @@
+import os
+import tempfile
+import unittest
+from src.retriever.bm25_index import BM25Index, tokenize, load_bm25_index
+
+class TestBM25Index(unittest.TestCase):
+    def setUp(self):
+        self.index = BM25Index()
+        self.index.replace_document("a.docx", [
+            ("1", "Dower is payable on marriage"),
+            ("2", "Talaq is pronounced by the husband, see 4.2"),
+        ])
+        self.index.replace_document("b.docx", [("1", "Maintenance of the wife during marriage")])
+
+    def test_tokenize_keeps_section_numbers(self):
+        self.assertEqual(tokenize("See Section 4.2.1, Talaq!"), ["see", "section", "4.2.1", "talaq"])
+
+    def test_search_ranks_matching_sections(self):
+        results = self.index.search("talaq", top_k=3)
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0][1:], ("2", "Talaq is pronounced by the husband, see 4.2"))
+        self.assertEqual(self.index.search("4.2")[0][1], "2")
+        self.assertEqual(self.index.search("unknown"), [])
+
+    def test_replace_and_remove_document(self):
+        self.index.replace_document("a.docx", [("1", "Khula is requested by the wife")])
+        self.assertEqual(self.index.search("talaq"), [])
+        self.assertEqual(len(self.index), 2)
+        self.index.remove_document("b.docx")
+        self.assertEqual(self.index.search("maintenance"), [])
+        self.assertEqual(self.index.total_length, sum(self.index.lengths.values()))
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bm25.json")
+            self.assertIsNone(load_bm25_index(path))
+            self.index.save(path)
+            loaded = load_bm25_index(path)
+        self.assertEqual(len(loaded), len(self.index))
+        self.assertEqual(loaded.search("marriage", top_k=2), self.index.search("marriage", top_k=2))
+
+if __name__ == '__main__':
+    unittest.main()
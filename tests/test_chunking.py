@@ -0,0 +1,25 @@
+import unittest
+from src.embeddings.chunking import count_tokens, split_into_chunks
+
+class TestChunking(unittest.TestCase):
+    def test_count_tokens_splits_punctuation(self):
+        self.assertEqual(count_tokens("Section 4.2: the wife's dower."), 11)
+
+    def test_short_text_is_one_chunk(self):
+        text = "A short provision."
+        self.assertEqual(split_into_chunks(text, max_tokens=10, overlap=2), [text])
+
+    def test_long_text_windows_overlap(self):
+        text = " ".join(f"w{i}" for i in range(10))
+        chunks = split_into_chunks(text, max_tokens=4, overlap=1)
+        self.assertEqual(chunks, ["w0 w1 w2 w3", "w3 w4 w5 w6", "w6 w7 w8 w9"])
+        self.assertTrue(all(count_tokens(chunk) <= 4 for chunk in chunks))
+
+    def test_chunks_keep_original_formatting(self):
+        text = "First,  second;\nthird fourth fifth"
+        chunks = split_into_chunks(text, max_tokens=4, overlap=0)
+        self.assertEqual(chunks[0], "First,  second;")
+        self.assertEqual(chunks[1], "third fourth fifth")
+
+if __name__ == '__main__':
+    unittest.main()
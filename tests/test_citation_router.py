@@ -0,0 +1,92 @@
+import unittest
+from src.database.law_keys import make_law_id
+from src.retriever.citation_router import CitationIndex, RoutingStats, book_aliases, parse_citation
+
+def law_id(book, number):
+    return make_law_id(book, "1961", "Gazette", number)
+
+ROWS = [
+    (law_id("MuslimFamilyLawsOrdinance", "4"), "Succession."),
+    (law_id("MuslimFamilyLawsOrdinance", "4.1"), "Orphaned grandchildren inherit."),
+    (law_id("MuslimFamilyLawsOrdinance", "4.2"), "Share of the predeceased parent."),
+    (law_id("MuslimFamilyLawsOrdinance", "4.2.1"), "Per stirpes."),
+    (law_id("CivilLaw", "4.2"), "Civil contracts."),
+    (law_id("CivilLaw", "7"), "Limitation."),
+]
+
+class TestCitationParsing(unittest.TestCase):
+    def test_book_aliases(self):
+        self.assertEqual(
+            book_aliases("MuslimFamilyLawsOrdinance"),
+            {"muslimfamilylawsordinance", "muslim family laws ordinance", "mflo"},
+        )
+        self.assertEqual(book_aliases("Penal"), {"penal"})
+        self.assertEqual(book_aliases("CivilLaw"), {"civillaw", "civil law"})
+
+    def test_stopword_book_is_not_cited_by_every_query(self):
+        # THE_MUSLIM_FAMILY_LAWS_ORDINANCE.docx gives the book "THE"
+        self.assertEqual(book_aliases("THE"), set())
+        aliases = CitationIndex(ROWS + [(law_id("THE", "7"), "Polygamy.")]).aliases
+        self.assertEqual(parse_citation("Section 7 of the Civil Law", aliases), ("7", {"CivilLaw"}))
+
+    def test_book_without_aliases_is_cited_by_its_document_name(self):
+        self.assertEqual(book_aliases("THE", "THE_1961_Gazette"), {"the 1961 gazette"})
+        self.assertEqual(book_aliases("Penal", "Penal_1961_Gazette"), {"penal"})
+        index = CitationIndex(ROWS + [(law_id("THE", "7"), "Polygamy.")])
+        self.assertEqual(parse_citation("Section 7 of THE_1961_Gazette", index.aliases), ("7", {"THE"}))
+        self.assertEqual(index.resolve("Section 7 of the 1961 gazette", 3), [(1.0, law_id("THE", "7"), "Polygamy.")])
+        self.assertEqual(parse_citation("Section 7 of the Civil Law", index.aliases), ("7", {"CivilLaw"}))
+
+    def test_parse_citation(self):
+        aliases = CitationIndex(ROWS).aliases
+        self.assertEqual(parse_citation("Section 7", aliases), ("7", set()))
+        self.assertEqual(parse_citation("what does sec. 4.2.1 say?", aliases), ("4.2.1", set()))
+        self.assertEqual(
+            parse_citation("s. 4.2 of the Muslim Family Laws Ordinance", aliases),
+            ("4.2", {"MuslimFamilyLawsOrdinance"}),
+        )
+        self.assertEqual(parse_citation("4.2.", aliases), ("4.2", set()))
+        self.assertEqual(parse_citation("4.2 of the civil law", aliases), ("4.2", {"CivilLaw"}))
+        self.assertEqual(parse_citation("§ 4 MFLO", aliases), ("4", {"MuslimFamilyLawsOrdinance"}))
+
+    def test_questions_are_not_citations(self):
+        for query in ("what is dower", "2 of my children inherit?", "can a wife's share be 4 times less",
+                      "laws 4 inheritance"):
+            self.assertIsNone(parse_citation(query, {}), query)
+
+class TestCitationIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = CitationIndex(ROWS)
+
+    def test_exact_match_in_every_book(self):
+        results = self.index.resolve("Section 4.2", top_k=2)
+        self.assertEqual([law for _, law, _ in results], [ROWS[2][0], ROWS[4][0]])
+        self.assertTrue(all(score == 1.0 for score, _, _ in results))
+
+    def test_book_filter(self):
+        results = self.index.resolve("s. 4.2 of the Civil Law", top_k=3)
+        self.assertEqual(results, [(1.0, ROWS[4][0], "Civil contracts.")])
+
+    def test_parent_is_completed_with_sub_sections(self):
+        results = self.index.resolve("Section 4", top_k=3)
+        self.assertEqual([law for _, law, _ in results], [ROWS[0][0], ROWS[1][0], ROWS[2][0]])
+        self.assertEqual([score for score, _, _ in results], [1.0, 0.5, 0.5])
+
+    def test_missing_section_and_non_citation(self):
+        self.assertEqual(self.index.resolve("Section 9.9"), [])
+        self.assertIsNone(self.index.resolve("what is dower"))
+
+class TestRoutingStats(unittest.TestCase):
+    def test_hit_rate(self):
+        stats = RoutingStats()
+        stats.record("citation", 0.001)
+        stats.record("retrieval", 0.2)
+        stats.record("retrieval", 0.4)
+        snapshot = stats.snapshot()
+        self.assertEqual(snapshot["queries"], 3)
+        self.assertAlmostEqual(snapshot["citation_hit_rate"], 1 / 3)
+        self.assertAlmostEqual(snapshot["routes"]["retrieval"]["mean_ms"], 300)
+        self.assertAlmostEqual(snapshot["routes"]["retrieval"]["max_ms"], 400)
+
+if __name__ == '__main__':
+    unittest.main()
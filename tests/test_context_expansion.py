@@ -0,0 +1,80 @@
+import unittest
+from unittest.mock import MagicMock
+from src.embeddings.chunking import count_tokens
+from src.retriever.context_expansion import build_context_query, expand_context
+
+def law_id(number, document="Family_1961_Gazette"):
+    return f"{document}#{number}"
+
+def make_record(number, ancestors=(), children=(), references=()):
+    def items(rows):
+        return [{"law_id": law_id(n), "number": n, "text": t, "distance": d} for n, t, d in rows]
+    return {
+        "law_id": law_id(number),
+        "ancestors": items(ancestors),
+        "children": items(children),
+        "references": items(references),
+    }
+
+class TestContextExpansion(unittest.TestCase):
+    def setUp(self):
+        self.conn = MagicMock()
+        self.results = [(0.9, law_id("1.1"), "Dower is payable"), (0.8, law_id("1.2"), "Dower may be deferred")]
+
+    def test_build_context_query_formats_depth(self):
+        query = build_context_query(2)
+        self.assertIn("[:HAS_CHILD*1..2]", query)
+        self.assertIn("UNWIND $keys AS key", query)
+        self.assertIn("MATCH (hit:Law {number: key.number, book: key.book, year: key.year, source: key.source})", query)
+        self.assertIn("[:REFERS_TO]", query)
+
+    def test_count_tokens(self):
+        # The chunking tokenizer, shared with the answer prompt budget
+        self.assertEqual(count_tokens("  one two\nthree "), 3)
+        self.assertEqual(count_tokens("Section 4.2, dower."), 7)
+
+    def test_expand_context_single_query_and_deduplication(self):
+        self.conn.query.return_value = [
+            make_record("1.1", ancestors=[("1", "Chapter 1 Dower", 1)], references=[("1.2", "Dower may be deferred", 1)]),
+            make_record("1.2", ancestors=[("1", "Chapter 1 Dower", 1)], references=[("3", "Khula", 1)]),
+        ]
+
+        expanded = expand_context(self.conn, self.results, depth=1, token_budget=100)
+
+        self.conn.query.assert_called_once()
+        keys = self.conn.query.call_args.kwargs["parameters"]["keys"]
+        self.assertEqual(keys[0], {
+            "law_id": law_id("1.1"), "book": "Family", "year": "1961", "source": "Gazette", "number": "1.1"
+        })
+        self.assertEqual(len(keys), 2)
+        first, second = expanded
+        # The parent goes to the first hit only, and hit 1.2 is never repeated as context
+        self.assertEqual([(c["number"], c["relation"]) for c in first[3]], [("1", "ancestor")])
+        self.assertEqual([(c["number"], c["relation"]) for c in second[3]], [("3", "reference")])
+        self.assertEqual(second[:3], self.results[1])
+
+    def test_expand_context_respects_token_budget_round_robin(self):
+        self.conn.query.return_value = [
+            make_record("1.1", children=[("1.1.1", "a b c", 1), ("1.1.2", "d e f", 1)]),
+            make_record("1.2", children=[("1.2.1", "g h i", 1)]),
+        ]
+
+        expanded = expand_context(self.conn, self.results, depth=1, token_budget=6)
+
+        self.assertEqual([c["number"] for c in expanded[0][3]], ["1.1.1"])
+        self.assertEqual([c["number"] for c in expanded[1][3]], ["1.2.1"])
+
+    def test_expand_context_orders_ancestors_by_distance(self):
+        self.conn.query.return_value = [
+            make_record("1.1", ancestors=[("Book", "Book", 2), ("1", "Chapter", 1)]),
+        ]
+        expanded = expand_context(self.conn, self.results[:1], depth=2, token_budget=100)
+        self.assertEqual([c["number"] for c in expanded[0][3]], ["1", "Book"])
+
+    def test_expand_context_without_depth_skips_query(self):
+        expanded = expand_context(self.conn, self.results, depth=0)
+        self.conn.query.assert_not_called()
+        self.assertEqual(expanded[0], (0.9, law_id("1.1"), "Dower is payable", []))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import MagicMock
+from src.database.create_indexes import (
+    create_indexes, create_law_key_constraint, create_vector_index, get_embedding_dimensions
+)
+
+class TestCreateIndexes(unittest.TestCase):
+    def test_create_indexes_drops_text_index(self):
+        mock_conn = MagicMock()
+
+        create_indexes(mock_conn)
+
+        queries = [call.args[0] for call in mock_conn.query.call_args_list]
+        self.assertIn("DROP INDEX law_text IF EXISTS", queries)
+        self.assertFalse(any("CREATE INDEX law_text" in query for query in queries))
+
+    def test_create_indexes_creates_law_node_key(self):
+        mock_conn = MagicMock()
+
+        create_indexes(mock_conn)
+
+        first_query = mock_conn.query.call_args_list[0].args[0]
+        self.assertIn("REQUIRE (l.book, l.year, l.source, l.number) IS NODE KEY", first_query)
+
+    def test_create_law_key_constraint_falls_back(self):
+        mock_conn = MagicMock()
+        mock_conn.query.side_effect = [Exception("Enterprise only"), Exception("Invalid input"), None]
+
+        self.assertEqual(create_law_key_constraint(mock_conn), "index")
+        self.assertIn("ON (l.book, l.year, l.source, l.number)", mock_conn.query.call_args.args[0])
+
+        mock_conn.query.side_effect = [Exception("Enterprise only"), None]
+        self.assertEqual(create_law_key_constraint(mock_conn), "unique")
+
+    def test_get_embedding_dimensions(self):
+        mock_conn = MagicMock()
+        mock_conn.query.return_value = [{"dimensions": 768}]
+        self.assertEqual(get_embedding_dimensions(mock_conn), 768)
+
+        mock_conn.query.return_value = []
+        self.assertIsNone(get_embedding_dimensions(mock_conn))
+
+    def test_create_vector_index_uses_stored_dimensions(self):
+        mock_conn = MagicMock()
+        mock_conn.query.side_effect = [[{"dimensions": 4}], None]
+
+        self.assertTrue(create_vector_index(mock_conn))
+
+        query = mock_conn.query.call_args_list[1].args[0]
+        self.assertIn("CREATE VECTOR INDEX law_embedding IF NOT EXISTS", query)
+        self.assertIn("FOR (l:Law) ON (l.embedding)", query)
+        self.assertIn("`vector.dimensions`: 4", query)
+        self.assertIn("`vector.similarity_function`: 'cosine'", query)
+
+    def test_create_vector_index_unsupported_server(self):
+        mock_conn = MagicMock()
+        mock_conn.query.side_effect = Exception("Invalid input 'VECTOR'")
+
+        self.assertFalse(create_vector_index(mock_conn, dimensions=768))
+
+if __name__ == '__main__':
+    unittest.main()
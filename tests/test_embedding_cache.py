@@ -0,0 +1,66 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from src.retriever.embedding_cache import EmbeddingCache, make_cache_key
+
+class TestEmbeddingCache(unittest.TestCase):
+    def test_make_cache_key_depends_on_model_and_text(self):
+        self.assertEqual(make_cache_key("m", "text"), make_cache_key("m", "text"))
+        self.assertNotEqual(make_cache_key("m", "text"), make_cache_key("other", "text"))
+        self.assertNotEqual(make_cache_key("m", "text"), make_cache_key("m", "text2"))
+
+    def test_get_or_fetch_only_fetches_once(self):
+        cache = EmbeddingCache(path=None)
+        fetch = MagicMock(return_value=[0.1, 0.2])
+
+        self.assertEqual(cache.get_or_fetch("m", "text", fetch), [0.1, 0.2])
+        self.assertEqual(cache.get_or_fetch("m", "text", fetch), [0.1, 0.2])
+
+        fetch.assert_called_once()
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_lru_evicts_oldest(self):
+        cache = EmbeddingCache(path=None, max_memory_items=2)
+        cache.put("m", "a", [1.0])
+        cache.put("m", "b", [2.0])
+        cache.get("m", "a")
+        cache.put("m", "c", [3.0])
+
+        self.assertIsNone(cache.get("m", "b"))
+        self.assertEqual(cache.get("m", "a"), [1.0])
+
+    def test_persists_across_instances(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "embeddings.sqlite3")
+            first = EmbeddingCache(path=path)
+            first.put("m", "text", [0.1, 0.2, 0.3])
+            first.close()
+
+            second = EmbeddingCache(path=path)
+            fetch = MagicMock()
+            self.assertEqual(second.get_or_fetch("m", "text", fetch), [0.1, 0.2, 0.3])
+            fetch.assert_not_called()
+            self.assertEqual(second.stats()["disk_hits"], 1)
+            second.close()
+
+    def test_put_many_persists_a_batch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "embeddings.sqlite3")
+            first = EmbeddingCache(path=path)
+            first.put_many("m", [("a", [1.0]), ("b", [2.0])])
+            first.close()
+
+            second = EmbeddingCache(path=path)
+            self.assertEqual([second.get("m", "a"), second.get("m", "b")], [[1.0], [2.0]])
+            second.close()
+
+    def test_constructing_does_not_touch_disk(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "embeddings.sqlite3")
+            EmbeddingCache(path=path)
+            self.assertFalse(os.path.exists(path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import MagicMock
+import requests
+from src.retriever.api_utils import EmbeddingHTTPError
+from src.retriever.embedding_client import EmbeddingClient, CircuitBreaker, CircuitOpenError, is_retryable
+
+def make_response(status_code, embedding=None, text=""):
+    response = MagicMock()
+    response.status_code = status_code
+    response.json.return_value = {"embedding": embedding}
+    response.text = text
+    return response
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_and_half_opens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10, clock=clock)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "closed")
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        self.assertFalse(breaker.allow())
+        self.assertEqual(breaker.seconds_until_retry(), 10)
+
+        clock.now = 10
+        self.assertTrue(breaker.allow())
+        # Only one trial call while half-open
+        self.assertFalse(breaker.allow())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+
+        clock.now = 20
+        self.assertTrue(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+        self.assertTrue(breaker.allow())
+
+class TestEmbeddingClient(unittest.TestCase):
+    def setUp(self):
+        self.session = MagicMock()
+        self.sleeps = []
+        self.client = EmbeddingClient(
+            url="http://ollama/api/embeddings", model="test-model", timeout=5, max_retries=2, backoff=1,
+            max_backoff=3, session=self.session, sleep=self.sleeps.append,
+            breaker=CircuitBreaker(failure_threshold=2, reset_seconds=30),
+        )
+
+    def test_uses_session_and_timeout(self):
+        self.session.post.return_value = make_response(200, [0.1, 0.2])
+
+        self.assertEqual(self.client.embed("text"), [0.1, 0.2])
+        self.session.post.assert_called_once_with(
+            "http://ollama/api/embeddings", json={"model": "test-model", "prompt": "text"}, timeout=5
+        )
+
+    def test_retries_transient_errors_with_backoff(self):
+        self.session.post.side_effect = [
+            requests.ConnectionError("reset"), make_response(503, text="busy"), make_response(200, [1.0])
+        ]
+
+        self.assertEqual(self.client.embed("text"), [1.0])
+        self.assertEqual(self.session.post.call_count, 3)
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertTrue(0 <= self.sleeps[0] <= 1 and 0 <= self.sleeps[1] <= 2)
+
+    def test_gives_up_after_max_retries(self):
+        self.session.post.side_effect = requests.Timeout("slow")
+
+        with self.assertRaises(requests.Timeout):
+            self.client.embed("text")
+        self.assertEqual(self.session.post.call_count, 3)
+        self.assertEqual(self.client.breaker.failures, 1)
+
+    def test_client_errors_are_not_retried(self):
+        self.session.post.return_value = make_response(404, text="model not found")
+
+        with self.assertRaises(EmbeddingHTTPError):
+            self.client.embed("text")
+        self.assertEqual(self.session.post.call_count, 1)
+        self.assertEqual(self.client.breaker.state, "closed")
+
+    def test_open_circuit_fails_fast(self):
+        self.session.post.side_effect = requests.ConnectionError("down")
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectionError):
+                self.client.embed("text")
+        calls = self.session.post.call_count
+
+        with self.assertRaises(CircuitOpenError):
+            self.client.embed("text")
+        self.assertEqual(self.session.post.call_count, calls)
+
+    def test_is_retryable(self):
+        self.assertTrue(is_retryable(EmbeddingHTTPError("", 429)))
+        self.assertTrue(is_retryable(EmbeddingHTTPError("", 500)))
+        self.assertFalse(is_retryable(EmbeddingHTTPError("", 400)))
+        self.assertFalse(is_retryable(ValueError("bad json")))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,43 +1,148 @@
 import unittest
 from unittest.mock import patch, MagicMock, call
-from src.embeddings.generate_embeddings import get_embedding, add_embedding, main
+from src.embeddings.generate_embeddings import get_embedding, add_embedding, add_embeddings_batch, run_pipeline, main
+from src.retriever.embedding_cache import EmbeddingCache
 
 class TestEmbeddingsGeneration(unittest.TestCase):
-    @patch('src.embeddings.generate_embeddings.fetch_embedding')
-    def test_get_embedding(self, mock_fetch):
+    @patch('src.embeddings.generate_embeddings.get_embedding_cache', return_value=EmbeddingCache(path=None))
+    @patch('src.embeddings.generate_embeddings.get_embedding_client')
+    def test_get_embedding(self, mock_client, mock_cache):
         # Setup mock return value
-        mock_fetch.return_value = [0.1, 0.2, 0.3]
+        mock_client.return_value.embed.return_value = [0.1, 0.2, 0.3]
         
         # Call the function
         result = get_embedding("test text")
         
         # Verify results
         self.assertEqual(result, [0.1, 0.2, 0.3])
-        mock_fetch.assert_called_once()
+        mock_client.return_value.embed.assert_called_once_with("test text")
         
     def test_add_embedding(self):
         # Create mock transaction
         mock_tx = MagicMock()
         
         # Call the function
-        add_embedding(mock_tx, "Article 1", [0.1, 0.2, 0.3])
+        add_embedding(mock_tx, "Article 1", [0.1, 0.2, 0.3], "CivilLaw", "2020", "SourceA")
         
         # Verify the transaction was called with correct parameters
         mock_tx.run.assert_called_once()
         args, kwargs = mock_tx.run.call_args
-        self.assertIn("MATCH (l:Law {number: $number})", args[0])
+        self.assertIn("MATCH (l:Law {number: $number, book: $book, year: $year, source: $source})", args[0])
         self.assertIn("SET l.embedding = $embedding", args[0])
         self.assertEqual(kwargs["number"], "Article 1")
         self.assertEqual(kwargs["embedding"], [0.1, 0.2, 0.3])
+        self.assertEqual((kwargs["book"], kwargs["year"], kwargs["source"]), ("CivilLaw", "2020", "SourceA"))
+
+    def test_add_embeddings_batch(self):
+        mock_tx = MagicMock()
+        rows = [{"node_id": 1, "embedding": [0.1]}, {"node_id": 2, "embedding": [0.2]}]
+
+        add_embeddings_batch(mock_tx, rows, model="test-model")
+
+        mock_tx.run.assert_called_once()
+        args, kwargs = mock_tx.run.call_args
+        self.assertIn("UNWIND $rows AS row", args[0])
+        self.assertIn("l.embedding_model = $model", args[0])
+        self.assertEqual(kwargs["rows"], rows)
+        self.assertEqual(kwargs["model"], "test-model")
+
+    @patch('src.embeddings.generate_embeddings.get_embedding')
+    def test_run_pipeline_batches_and_skips_failures(self, mock_get_embedding):
+        mock_conn = MagicMock()
+        mock_conn.query.side_effect = [
+            [
+                {"node_id": 1, "l.number": "1", "l.text": "First law"},
+                {"node_id": 2, "l.number": "2", "l.text": "Second law"},
+                {"node_id": 3, "l.number": "3", "l.text": "Third law"},
+            ],
+            [],
+        ]
+        def fake_embedding(text):
+            if text == "Second law":
+                raise Exception("Ollama unavailable")
+            return [len(text)]
+        mock_get_embedding.side_effect = fake_embedding
+
+        stats = run_pipeline(mock_conn, page_size=3, batch_size=1, workers=2, retry_passes=0)
+
+        self.assertEqual(stats["embedded"], 2)
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(mock_conn.execute_write.call_count, 2)
+        written = [call.args[1][0]["node_id"] for call in mock_conn.execute_write.call_args_list]
+        self.assertEqual(written, [1, 3])
+        # The failed node is excluded from the next page so the run terminates
+        _, kwargs = mock_conn.query.call_args_list[1]
+        self.assertEqual(kwargs["parameters"]["skip"], [2])
         
+    @patch('src.embeddings.generate_embeddings.split_into_chunks')
+    @patch('src.embeddings.generate_embeddings.get_embedding')
+    def test_run_pipeline_embeds_long_sections_by_chunk(self, mock_get_embedding, mock_split):
+        mock_conn = MagicMock()
+        mock_conn.query.side_effect = [
+            [{"node_id": 1, "l.number": "1", "l.text": "Short"}, {"node_id": 2, "l.number": "2", "l.text": "Long"}],
+            [],
+        ]
+        mock_split.side_effect = lambda text: [text] if text == "Short" else ["Long a", "Long b"]
+        mock_get_embedding.side_effect = lambda text: {"Short": [1.0, 0.0], "Long a": [1.0, 0.0], "Long b": [0.0, 1.0]}[text]
+
+        stats = run_pipeline(mock_conn, page_size=2, batch_size=2, workers=1, retry_passes=0)
+
+        self.assertEqual(stats["embedded"], 2)
+        short, long = mock_conn.execute_write.call_args.args[1]
+        self.assertEqual((short["embedding"], short["chunks"]), ([1.0, 0.0], []))
+        self.assertEqual([chunk["text"] for chunk in long["chunks"]], ["Long a", "Long b"])
+        self.assertAlmostEqual(long["embedding"][0], long["embedding"][1])
+        self.assertAlmostEqual(sum(value * value for value in long["embedding"]), 1.0, places=5)
+
+    @patch('src.embeddings.generate_embeddings.time.sleep')
+    @patch('src.embeddings.generate_embeddings.get_embedding')
+    def test_run_pipeline_retries_dead_letters(self, mock_get_embedding, mock_sleep):
+        mock_conn = MagicMock()
+        mock_conn.query.side_effect = [
+            [{"node_id": 1, "l.number": "1", "l.text": "First law"}],
+            [],
+            # Retry pass: the failed node is pending again
+            [{"node_id": 1, "l.number": "1", "l.text": "First law"}],
+            [],
+        ]
+        mock_get_embedding.side_effect = [Exception("Ollama timeout"), [0.5]]
+
+        stats = run_pipeline(mock_conn, page_size=10, batch_size=10, workers=1, retry_passes=1)
+
+        self.assertEqual((stats["embedded"], stats["failed"]), (1, 0))
+        _, kwargs = mock_conn.query.call_args_list[2]
+        self.assertEqual(kwargs["parameters"]["skip"], [])
+        mock_sleep.assert_called_once()
+
+    @patch('src.embeddings.generate_embeddings.time.sleep')
+    @patch('src.embeddings.generate_embeddings.export_snapshot')
     @patch('src.embeddings.generate_embeddings.Neo4jConnection')
     @patch('src.embeddings.generate_embeddings.get_embedding')
-    def test_main_success(self, mock_get_embedding, mock_neo4j):
+    def test_main_keeps_going_after_failures(self, mock_get_embedding, mock_neo4j, mock_export, mock_sleep):
+        mock_neo4j_instance = mock_neo4j.return_value.__enter__.return_value
+        mock_neo4j_instance.query.return_value = [
+            {"l.number": "1", "l.text": "First law", "l.book": "CivilLaw", "l.year": "2020", "l.source": "A"},
+            {"l.number": "2", "l.text": "Second law", "l.book": "CivilLaw", "l.year": "2020", "l.source": "A"},
+        ]
+        # The first law fails once, the second succeeds; the retry pass embeds the first
+        mock_get_embedding.side_effect = [Exception("Ollama hiccup"), [0.4], [0.1]]
+
+        main(retry_passes=1)
+
+        self.assertEqual(mock_get_embedding.call_args_list, [call("First law"), call("Second law"), call("First law")])
+        written = [write_call.args[1] for write_call in mock_neo4j_instance.execute_write.call_args_list]
+        self.assertEqual(written, ["2", "1"])
+        mock_export.assert_called_once_with(mock_neo4j_instance)
+
+    @patch('src.embeddings.generate_embeddings.export_snapshot')
+    @patch('src.embeddings.generate_embeddings.Neo4jConnection')
+    @patch('src.embeddings.generate_embeddings.get_embedding')
+    def test_main_success(self, mock_get_embedding, mock_neo4j, mock_export):
         # Setup mock database connection and results
         mock_neo4j_instance = mock_neo4j.return_value.__enter__.return_value
         mock_neo4j_instance.query.return_value = [
-            {"l.number": "Article 1", "l.text": "First law"},
-            {"l.number": "Article 2", "l.text": "Second law"}
+            {"l.number": "Article 1", "l.text": "First law", "l.book": "CivilLaw", "l.year": "2020", "l.source": "A"},
+            {"l.number": "Article 2", "l.text": "Second law", "l.book": "CivilLaw", "l.year": "2020", "l.source": "A"}
         ]
         
         # Setup mock embedding function
@@ -47,7 +152,7 @@ class TestEmbeddingsGeneration(unittest.TestCase):
         main()
         
         # Verify database was queried
-        mock_neo4j_instance.query.assert_called_once_with("MATCH (l:Law) RETURN l.number, l.text")
+        mock_neo4j_instance.query.assert_called_once_with("MATCH (l:Law) RETURN l.number, l.text, l.book, l.year, l.source")
         
         # Verify get_embedding was called for each law
         mock_get_embedding.assert_has_calls([
@@ -57,6 +162,9 @@ class TestEmbeddingsGeneration(unittest.TestCase):
         
         # Verify execute_write was called for each law
         self.assertEqual(mock_neo4j_instance.execute_write.call_count, 2)
+
+        # Verify the snapshot was exported once embedding finished
+        mock_export.assert_called_once_with(mock_neo4j_instance)
         
     @patch('src.embeddings.generate_embeddings.Neo4jConnection')
     @patch('src.embeddings.generate_embeddings.logging.error')
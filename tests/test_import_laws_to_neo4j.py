@@ -1,7 +1,13 @@
 import unittest
 from unittest.mock import patch, MagicMock, mock_open
 import os
+import re
+import tempfile
 from pathlib import Path
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docx.oxml import OxmlElement
+from src.retriever.bm25_index import BM25Index
 from src.database.import_laws_to_neo4j import (
     clear_database, 
     create_law_node, 
@@ -10,9 +16,118 @@ from src.database.import_laws_to_neo4j import (
     create_refers_to_relation,
     parse_docx,
     extract_metadata_from_filename,
+    import_document,
+    build_import_rows,
+    bulk_import_document,
+    merge_law_nodes,
+    merge_parent_child_relations,
+    merge_sibling_relations,
+    parse_documents,
+    parse_docx_streaming,
+    compute_text_hash,
+    incremental_import_document,
+    upsert_changed_law_nodes,
+    delete_law_nodes,
+    set_document_fingerprint,
+    DATA_DIR,
     main
 )
 
+NODE_PATTERN = re.compile(r"\((\w+):Law \{([^}]*)\}\)")
+EDGE_PATTERN = re.compile(r"MERGE \((\w+)\)-\[:(\w+)\]->\((\w+)\)")
+
+class FakeGraph:
+    """
+    Evaluates the node MERGE and edge MATCH/MERGE statements of the importer
+    against in-memory nodes, with Neo4j's matching semantics (every node whose
+    properties match the pattern), so wrong or duplicated edges show up in counts.
+    """
+
+    def __init__(self):
+        self.nodes = []
+        self.edges = set()
+
+    def run(self, query, parameters=None, **kwargs):
+        parameters = dict(parameters or {}, **kwargs)
+        if "DETACH DELETE n" in query:
+            self.nodes, self.edges = [], set()
+            return []
+        unwind = re.search(r"UNWIND \$(\w+) AS (\w+)", query)
+        bindings = [{unwind.group(2): row} for row in parameters[unwind.group(1)]] if unwind else [{}]
+        for binding in bindings:
+            self._apply(query, parameters, binding)
+        return []
+
+    def query(self, query, parameters=None):
+        return self.run(query, parameters)
+
+    def execute_write(self, func, *args, **kwargs):
+        return func(self, *args, **kwargs)
+
+    def _value(self, expression, parameters, binding):
+        if expression.startswith("$"):
+            return parameters[expression[1:]]
+        variable, _, field = expression.partition(".")
+        return binding[variable][field]
+
+    def _matching(self, pattern, parameters, binding):
+        properties = {
+            key.strip(): self._value(value.strip(), parameters, binding)
+            for key, value in (item.split(":", 1) for item in pattern.split(","))
+        }
+        return [i for i, node in enumerate(self.nodes) if all(node.get(k) == v for k, v in properties.items())], properties
+
+    def _apply(self, query, parameters, binding):
+        edge = EDGE_PATTERN.search(query)
+        patterns = dict(NODE_PATTERN.findall(query))
+        if edge is None:
+            matches, properties = self._matching(patterns["l"], parameters, binding)
+            if not matches:
+                self.nodes.append(properties)
+                matches = [len(self.nodes) - 1]
+            for field, expression in re.findall(r"l\.(\w+) = ([$\w.]+)", query):
+                self.nodes[matches[0]][field] = self._value(expression, parameters, binding)
+            return
+        start, edge_type, end = edge.groups()
+        for i in self._matching(patterns[start], parameters, binding)[0]:
+            for j in self._matching(patterns[end], parameters, binding)[0]:
+                self.edges.add((i, edge_type, j))
+
+class TestMultiBookImport(unittest.TestCase):
+    SECTIONS = [
+        ("1", "Preliminary. See Section 2.1"),
+        ("1.1", "Short title"),
+        ("1.2", "Extent"),
+        ("2", "Definitions"),
+        ("2.1", "Dower"),
+    ]
+    # Per book: 3 HAS_CHILD, 3 NEXT_SIBLING (1->2, 1.1->1.2->2.1) and 1 REFERS_TO
+    EDGES_PER_BOOK = {"HAS_CHILD": 3, "NEXT_SIBLING": 3, "REFERS_TO": 1}
+
+    def assert_books_isolated(self, graph, books):
+        self.assertEqual(len(graph.nodes), len(self.SECTIONS) * len(books))
+        counts = {}
+        for i, edge_type, j in graph.edges:
+            counts[edge_type] = counts.get(edge_type, 0) + 1
+            self.assertEqual(graph.nodes[i]["book"], graph.nodes[j]["book"])
+        self.assertEqual(counts, {edge_type: count * len(books) for edge_type, count in self.EDGES_PER_BOOK.items()})
+
+    def test_row_by_row_import_of_several_books(self):
+        graph = FakeGraph()
+        books = [("CivilLaw", "2020", "SourceA"), ("FamilyLaw", "1961", "SourceB"), ("PenalCode", "1860", "SourceC")]
+        for book, year, source in books:
+            import_document(graph, self.SECTIONS, book, year, source)
+        self.assert_books_isolated(graph, books)
+
+    def test_bulk_import_of_several_books(self):
+        graph = FakeGraph()
+        books = [("CivilLaw", "2020", "SourceA"), ("FamilyLaw", "1961", "SourceB")]
+        for book, year, source in books:
+            bulk_import_document(graph, self.SECTIONS, book, year, source, batch_size=2)
+        # Importing a book again must not add nodes or edges
+        bulk_import_document(graph, self.SECTIONS, *books[0], batch_size=2)
+        self.assert_books_isolated(graph, books)
+
 class TestImportLawsToNeo4j(unittest.TestCase):
     def test_extract_metadata_from_filename(self):
         # Test extracting metadata from filename
@@ -73,16 +188,17 @@ class TestImportLawsToNeo4j(unittest.TestCase):
         mock_conn = MagicMock()
         
         # Call the function
-        create_parent_child_relation(mock_conn, "1", "1.1")
+        create_parent_child_relation(mock_conn, "1", "1.1", "CivilLaw", "2020", "SourceA")
         
         # Verify the query was executed with correct parameters
         mock_conn.query.assert_called_once()
         args, kwargs = mock_conn.query.call_args
-        self.assertIn("MATCH (parent:Law {number: $parent_number})", args[0])
-        self.assertIn("MATCH (child:Law {number: $child_number})", args[0])
+        self.assertIn("MATCH (parent:Law {number: $parent_number, book: $book, year: $year, source: $source})", args[0])
+        self.assertIn("MATCH (child:Law {number: $child_number, book: $book, year: $year, source: $source})", args[0])
         self.assertIn("MERGE (parent)-[:HAS_CHILD]->(child)", args[0])
         self.assertEqual(kwargs["parameters"]["parent_number"], "1")
         self.assertEqual(kwargs["parameters"]["child_number"], "1.1")
+        self.assertEqual(kwargs["parameters"]["book"], "CivilLaw")
         
     @patch('src.database.import_laws_to_neo4j.Neo4jConnection')
     def test_create_sibling_relation(self, mock_neo4j):
@@ -90,13 +206,13 @@ class TestImportLawsToNeo4j(unittest.TestCase):
         mock_conn = MagicMock()
         
         # Call the function
-        create_sibling_relation(mock_conn, "1.1", "1.2")
+        create_sibling_relation(mock_conn, "1.1", "1.2", "CivilLaw", "2020", "SourceA")
         
         # Verify the query was executed with correct parameters
         mock_conn.query.assert_called_once()
         args, kwargs = mock_conn.query.call_args
-        self.assertIn("MATCH (a:Law {number: $first_number})", args[0])
-        self.assertIn("MATCH (b:Law {number: $second_number})", args[0])
+        self.assertIn("MATCH (a:Law {number: $first_number, book: $book, year: $year, source: $source})", args[0])
+        self.assertIn("MATCH (b:Law {number: $second_number, book: $book, year: $year, source: $source})", args[0])
         self.assertIn("MERGE (a)-[:NEXT_SIBLING]->(b)", args[0])
         self.assertEqual(kwargs["parameters"]["first_number"], "1.1")
         self.assertEqual(kwargs["parameters"]["second_number"], "1.2")
@@ -107,13 +223,13 @@ class TestImportLawsToNeo4j(unittest.TestCase):
         mock_conn = MagicMock()
         
         # Call the function
-        create_refers_to_relation(mock_conn, "1.1", "2.3")
+        create_refers_to_relation(mock_conn, "1.1", "2.3", "CivilLaw", "2020", "SourceA")
         
         # Verify the query was executed with correct parameters
         mock_conn.query.assert_called_once()
         args, kwargs = mock_conn.query.call_args
-        self.assertIn("MATCH (a:Law {number: $from_number})", args[0])
-        self.assertIn("MATCH (b:Law {number: $to_number})", args[0])
+        self.assertIn("MATCH (a:Law {number: $from_number, book: $book, year: $year, source: $source})", args[0])
+        self.assertIn("MATCH (b:Law {number: $to_number, book: $book, year: $year, source: $source})", args[0])
         self.assertIn("MERGE (a)-[:REFERS_TO]->(b)", args[0])
         self.assertEqual(kwargs["parameters"]["from_number"], "1.1")
         self.assertEqual(kwargs["parameters"]["to_number"], "2.3")
@@ -147,11 +263,12 @@ class TestImportLawsToNeo4j(unittest.TestCase):
         ]
         self.assertEqual(results, expected_results)
         
+    @patch('src.database.import_laws_to_neo4j.BM25Index.save')
     @patch('src.database.import_laws_to_neo4j.Neo4jConnection')
     @patch('src.database.import_laws_to_neo4j.os.listdir')
     @patch('src.database.import_laws_to_neo4j.parse_docx')
     @patch('src.database.import_laws_to_neo4j.extract_metadata_from_filename')
-    def test_main_function(self, mock_extract, mock_parse, mock_listdir, mock_neo4j):
+    def test_main_function(self, mock_extract, mock_parse, mock_listdir, mock_neo4j, mock_save):
         # Setup mocks
         mock_conn = MagicMock()
         mock_neo4j.return_value.__enter__.return_value = mock_conn
@@ -196,5 +313,180 @@ class TestImportLawsToNeo4j(unittest.TestCase):
         self.assertEqual(parent_child_count, 3)   # For 1.1, 1.1.1, and 1.2
         self.assertEqual(sibling_count, 2)        # Between siblings at same level
         
+    def test_build_import_rows_matches_row_by_row_import(self):
+        sections = [
+            ("1", "Introduction"),
+            ("1.1", "Definition. See Section 2"),
+            ("1.1.1", "Historical context"),
+            ("1.2", "Applications. See Section 1.1.1 and See Section 9"),
+            ("2", "Legal Framework"),
+        ]
+        mock_conn = MagicMock()
+        import_document(mock_conn, sections, "CivilLaw", "2020", "SourceA")
+
+        expected = {"nodes": [], "children": [], "siblings": [], "references": []}
+        for call in mock_conn.query.call_args_list:
+            query, parameters = call.args[0], call.kwargs["parameters"]
+            if "MERGE (l:Law" in query:
+                expected["nodes"].append(parameters)
+            elif "HAS_CHILD" in query:
+                expected["children"].append(parameters)
+            elif "NEXT_SIBLING" in query:
+                expected["siblings"].append(parameters)
+            elif "REFERS_TO" in query:
+                expected["references"].append(parameters)
+
+        self.assertEqual(build_import_rows(sections, "CivilLaw", "2020", "SourceA"), expected)
+
+    def test_bulk_import_document_batches_rows(self):
+        sections = [("1", "Introduction"), ("1.1", "Definition"), ("1.2", "Applications")]
+        mock_conn = MagicMock()
+
+        written = bulk_import_document(mock_conn, sections, "CivilLaw", "2020", "SourceA", batch_size=2)
+
+        # 3 nodes + 2 parent-child + 1 sibling
+        self.assertEqual(written, 6)
+        calls = mock_conn.execute_write.call_args_list
+        self.assertEqual([call.args[0] for call in calls], [
+            merge_law_nodes, merge_law_nodes, merge_parent_child_relations,
+            merge_sibling_relations,
+        ])
+        self.assertEqual([len(call.args[1]) for call in calls], [2, 1, 2, 1])
+        mock_conn.query.assert_not_called()
+
+    def test_merge_law_nodes_uses_unwind(self):
+        mock_tx = MagicMock()
+        rows = [{"number": "1", "text": "Intro", "book": "B", "year": "2020", "source": "S"}]
+
+        merge_law_nodes(mock_tx, rows)
+
+        args, kwargs = mock_tx.run.call_args
+        self.assertIn("UNWIND $rows AS row", args[0])
+        self.assertIn("MERGE (l:Law {number: row.number", args[0])
+        self.assertEqual(kwargs["rows"], rows)
+
+    @patch('src.database.import_laws_to_neo4j.BM25Index.save')
+    @patch('src.database.import_laws_to_neo4j.Neo4jConnection')
+    @patch('src.database.import_laws_to_neo4j.os.listdir')
+    @patch('src.database.import_laws_to_neo4j.parse_docx')
+    def test_main_bulk(self, mock_parse, mock_listdir, mock_neo4j, mock_save):
+        mock_conn = MagicMock()
+        mock_neo4j.return_value.__enter__.return_value = mock_conn
+        mock_listdir.return_value = ["CivilLaw_2020_SourceA.docx"]
+        mock_parse.return_value = [("1", "Introduction"), ("1.1", "Definition")]
+
+        main(bulk=True)
+
+        # Only the clear runs as an auto-commit query; everything else is batched
+        mock_conn.query.assert_called_once_with("MATCH (n) DETACH DELETE n")
+        self.assertEqual(mock_conn.execute_write.call_count, 2)
+
+    def test_parse_documents_parallel_matches_serial(self):
+        filenames = sorted(os.listdir(DATA_DIR))
+        serial = [(name, sections) for name, sections, _ in parse_documents(filenames, DATA_DIR, workers=1)]
+        parallel = [(name, sections) for name, sections, _ in parse_documents(filenames, DATA_DIR, workers=2)]
+
+        self.assertEqual(parallel, serial)
+        self.assertGreater(len(serial[0][1]), 0)
+
+    def test_parse_docx_streaming_matches_parse_docx(self):
+        for filename in sorted(os.listdir(DATA_DIR)):
+            filepath = str(DATA_DIR / filename)
+            self.assertEqual(list(parse_docx_streaming(filepath, filename)), parse_docx(filepath, filename))
+
+    def test_parse_docx_streaming_skips_tables_and_maps_runs(self):
+        document = Document()
+        document.add_paragraph("1. Preliminary")
+        paragraph = document.add_paragraph("1.1. Short title")
+        paragraph.add_run().add_tab()
+        paragraph.add_run("and extent").add_break()
+        document.add_table(rows=1, cols=1).cell(0, 0).text = "9. Not a body paragraph"
+        document.add_paragraph("   ")
+        document.add_paragraph("2. Definitions")
+        with tempfile.TemporaryDirectory() as tmp:
+            filepath = os.path.join(tmp, "Book_2020_Source.docx")
+            document.save(filepath)
+            streamed = list(parse_docx_streaming(filepath, "Book_2020_Source.docx"))
+            self.assertEqual(streamed, parse_docx(filepath, "Book_2020_Source.docx"))
+        self.assertEqual(streamed, [("1", "Preliminary"), ("1.1", "Short title\tand extent"), ("2", "Definitions")])
+
+    def test_parse_docx_streaming_keeps_hyperlinks_and_typed_breaks(self):
+        # python-docx >= 1.0 text rules (requirements.txt): hyperlink runs count, page breaks do not
+        document = Document()
+        paragraph = document.add_paragraph("1. Dower, see ")
+        hyperlink = OxmlElement("w:hyperlink")
+        hyperlink.append(paragraph.add_run("Section 2")._r)
+        paragraph._p.append(hyperlink)
+        paragraph.add_run().add_break(WD_BREAK.PAGE)
+        paragraph.add_run(".")
+        with tempfile.TemporaryDirectory() as tmp:
+            filepath = os.path.join(tmp, "Book_2020_Source.docx")
+            document.save(filepath)
+            streamed = list(parse_docx_streaming(filepath, "Book_2020_Source.docx"))
+            self.assertEqual(streamed, parse_docx(filepath, "Book_2020_Source.docx"))
+        self.assertEqual(streamed, [("1", "Dower, see Section 2.")])
+
+    def test_incremental_import_document_only_upserts_changed_sections(self):
+        mock_conn = MagicMock()
+        mock_conn.query.return_value = [
+            {"number": "1", "text_hash": compute_text_hash("Introduction")},
+            {"number": "1.1", "text_hash": compute_text_hash("Old definition")},
+            {"number": "3", "text_hash": compute_text_hash("Repealed")},
+        ]
+        sections = [("1", "Introduction"), ("1.1", "New definition"), ("2", "Legal Framework")]
+
+        stats = incremental_import_document(mock_conn, sections, "CivilLaw", "2020", "SourceA")
+
+        self.assertEqual(stats, {"upserted": 2, "deleted": 1, "unchanged": 1})
+        writes = {call.args[0]: call.args[1:] for call in mock_conn.execute_write.call_args_list}
+        self.assertEqual(writes[delete_law_nodes][0], ["3"])
+        self.assertEqual([row["number"] for row in writes[upsert_changed_law_nodes][0]], ["1.1", "2"])
+
+    def test_upsert_changed_law_nodes_invalidates_embedding(self):
+        mock_tx = MagicMock()
+        upsert_changed_law_nodes(mock_tx, [])
+        args, _ = mock_tx.run.call_args
+        self.assertIn("REMOVE l.embedding", args[0])
+
+    @patch('src.database.import_laws_to_neo4j.BM25Index.save')
+    @patch('src.database.import_laws_to_neo4j.load_bm25_index')
+    @patch('src.database.import_laws_to_neo4j.Neo4jConnection')
+    @patch('src.database.import_laws_to_neo4j.os.listdir')
+    @patch('src.database.import_laws_to_neo4j.compute_file_hash')
+    @patch('src.database.import_laws_to_neo4j.parse_docx')
+    def test_main_incremental(self, mock_parse, mock_hash, mock_listdir, mock_neo4j, mock_load_bm25, mock_save):
+        mock_conn = MagicMock()
+        mock_neo4j.return_value.__enter__.return_value = mock_conn
+        mock_listdir.return_value = ["CivilLaw_2020_SourceA.docx", "PanelCode_2019_SourceB.docx"]
+        mock_hash.side_effect = lambda path: "same" if "CivilLaw" in str(path) else "new"
+        mock_parse.return_value = [("1", "Introduction")]
+        lexical_index = BM25Index()
+        lexical_index.replace_document("CivilLaw_2020_SourceA.docx", [("1", "Unchanged civil law")])
+        lexical_index.replace_document("PanelCode_2019_SourceB.docx", [("1", "Old panel code")])
+        mock_load_bm25.return_value = lexical_index
+
+        def query(cypher, parameters=None):
+            if "MATCH (d:Document)" in cypher:
+                return [
+                    {"filename": "CivilLaw_2020_SourceA.docx", "file_hash": "same"},
+                    {"filename": "PanelCode_2019_SourceB.docx", "file_hash": "old"},
+                ]
+            return []
+        mock_conn.query.side_effect = query
+
+        main(incremental=True)
+
+        # The database is not cleared and only the changed file is parsed
+        self.assertNotIn(unittest.mock.call("MATCH (n) DETACH DELETE n"), mock_conn.query.call_args_list)
+        mock_parse.assert_called_once()
+        self.assertIn("PanelCode", str(mock_parse.call_args.args[0]))
+        fingerprints = [call.args for call in mock_conn.execute_write.call_args_list if call.args[0] is set_document_fingerprint]
+        self.assertEqual(fingerprints, [(set_document_fingerprint, "PanelCode_2019_SourceB.docx", "new", "PanelCode", "2019", "SourceB")])
+        # Only the changed document is re-indexed lexically
+        self.assertEqual(lexical_index.search("civil")[0][2], "Unchanged civil law")
+        self.assertEqual(lexical_index.search("introduction")[0][2], "Introduction")
+        self.assertEqual(lexical_index.search("panel"), [])
+        mock_save.assert_called_once()
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,22 @@
+import unittest
+from src.database.law_keys import make_law_id, split_law_id, law_id_expression, law_key_parameters
+
+class TestLawKeys(unittest.TestCase):
+    def test_law_id_round_trip(self):
+        law_id = make_law_id("FamilyLaw", "1961", "Gazette", "4.2")
+        self.assertEqual(law_id, "FamilyLaw_1961_Gazette#4.2")
+        self.assertEqual(split_law_id(law_id), ("FamilyLaw", "1961", "Gazette", "4.2"))
+
+    def test_split_plain_number(self):
+        self.assertEqual(split_law_id("4.2"), (None, None, None, "4.2"))
+
+    def test_law_id_expression(self):
+        self.assertEqual(law_id_expression("n"), "n.book + '_' + n.year + '_' + n.source + '#' + n.number")
+
+    def test_law_key_parameters(self):
+        self.assertEqual(law_key_parameters(["A_1_B#1"]), [
+            {"book": "A", "year": "1", "source": "B", "number": "1", "law_id": "A_1_B#1"}
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import asyncio
+import unittest
+import urllib.request
+from src.monitoring import metrics
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        metrics.reset()
+        metrics.enable()
+
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+
+    def test_disabled_records_nothing(self):
+        metrics.disable()
+
+        @metrics.timed("stage")
+        def work():
+            return 42
+
+        self.assertEqual(work(), 42)
+        with metrics.span("other") as timer:
+            timer.items = 10
+        metrics.increment("events")
+        self.assertEqual(metrics.snapshot(), {"stages": {}, "counters": {}})
+
+    def test_timed_and_span(self):
+        @metrics.timed("stage")
+        def work(value):
+            return value * 2
+
+        self.assertEqual(work(2), 4)
+        self.assertEqual(work(3), 6)
+        with metrics.span("block") as timer:
+            timer.items = 5
+        stages = metrics.snapshot()["stages"]
+        self.assertEqual((stages["stage"]["calls"], stages["stage"]["items"]), (2, 2))
+        self.assertEqual((stages["block"]["calls"], stages["block"]["items"]), (1, 5))
+        self.assertGreaterEqual(stages["stage"]["seconds"], stages["stage"]["max_seconds"])
+
+    def test_errors_are_counted_and_raised(self):
+        @metrics.timed("failing")
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            fail()
+        self.assertEqual(metrics.snapshot()["stages"]["failing"]["errors"], 1)
+
+    def test_timed_coroutine(self):
+        @metrics.timed("async")
+        async def work():
+            await asyncio.sleep(0)
+            return "done"
+
+        self.assertEqual(asyncio.run(work()), "done")
+        self.assertEqual(metrics.snapshot()["stages"]["async"]["calls"], 1)
+
+    def test_render_prometheus(self):
+        metrics.record("neo4j.query", 0.5, items=3)
+        metrics.increment("cache.hit", 2)
+        text = metrics.render_prometheus()
+        self.assertIn('lawchatbot_stage_calls_total{stage="neo4j.query"} 1', text)
+        self.assertIn('lawchatbot_stage_items_total{stage="neo4j.query"} 3', text)
+        self.assertIn('lawchatbot_stage_seconds_total{stage="neo4j.query"} 0.5', text)
+        self.assertIn('lawchatbot_events_total{event="cache.hit"} 2', text)
+
+    def test_summary_filters_prefixes(self):
+        metrics.record("import.parse", 2.0, items=100)
+        metrics.record("retrieve.score", 0.1)
+        summary = metrics.format_summary(("import.",))
+        self.assertIn("import.parse", summary)
+        self.assertIn("50.0", summary)
+        self.assertNotIn("retrieve.score", summary)
+
+    def test_metrics_server(self):
+        metrics.record("ollama.embed", 0.25)
+        server = metrics.start_metrics_server(port=0, host="127.0.0.1")
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            with urllib.request.urlopen(url) as response:
+                body = response.read().decode("utf-8")
+        finally:
+            server.shutdown()
+            server.server_close()
+        self.assertIn('lawchatbot_stage_calls_total{stage="ollama.embed"} 1', body)
+
+if __name__ == '__main__':
+    unittest.main()
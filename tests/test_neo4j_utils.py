@@ -1,8 +1,14 @@
 import unittest
 from unittest.mock import patch, MagicMock
-from src.database.neo4j_utils import Neo4jConnection
+from src.database.neo4j_utils import Neo4jConnection, close_driver, pool_stats
 
 class TestNeo4jConnection(unittest.TestCase):
+    def setUp(self):
+        close_driver()
+
+    def tearDown(self):
+        close_driver()
+
     @patch("src.database.neo4j_utils.GraphDatabase.driver")
     def test_query_success(self, mock_driver):
         # Create a mock for the session and its run method
@@ -11,14 +17,15 @@ class TestNeo4jConnection(unittest.TestCase):
         
         # Create a mock result that will be returned by session.run()
         mock_result = MagicMock()
+        mock_result.__iter__.return_value = iter([{"n": 1}, {"n": 2}])
         mock_session.run.return_value = mock_result
 
         # Test the query method
         conn = Neo4jConnection()
         result = conn.query("MATCH (n) RETURN n")
         
-        # Verify that we get back the mock result object
-        self.assertEqual(result, mock_result)
+        # Verify that we get back the records, consumed inside the session
+        self.assertEqual(result, [{"n": 1}, {"n": 2}])
         
         # Verify that run was called with the correct query
         mock_session.run.assert_called_once_with("MATCH (n) RETURN n", None)
@@ -38,5 +45,57 @@ class TestNeo4jConnection(unittest.TestCase):
             conn.query("MATCH (n) RETURN n")
         conn.close()
 
+    @patch("src.database.neo4j_utils.GraphDatabase.driver")
+    def test_driver_is_shared(self, mock_driver):
+        with Neo4jConnection() as first:
+            pass
+        with Neo4jConnection() as second:
+            pass
+
+        mock_driver.assert_called_once()
+        self.assertIs(first.driver, second.driver)
+        mock_driver.return_value.close.assert_not_called()
+        _, kwargs = mock_driver.call_args
+        self.assertIn("max_connection_pool_size", kwargs)
+        self.assertIn("connection_acquisition_timeout", kwargs)
+
+    @patch("src.database.neo4j_utils.GraphDatabase.driver")
+    def test_session_is_reused(self, mock_driver):
+        mock_session = MagicMock()
+        mock_driver.return_value.session.return_value.__enter__.return_value = mock_session
+        opened = pool_stats()["sessions_opened"]
+
+        conn = Neo4jConnection()
+        with conn.session():
+            conn.query("RETURN 1")
+            conn.query("RETURN 2")
+            conn.execute_write(MagicMock())
+
+        mock_driver.return_value.session.assert_called_once()
+        self.assertEqual(mock_session.run.call_count, 2)
+        mock_session.write_transaction.assert_called_once()
+        self.assertEqual(pool_stats()["sessions_opened"], opened + 1)
+        self.assertEqual(pool_stats()["active_sessions"], 0)
+
+    @patch("src.database.neo4j_utils.GraphDatabase.driver")
+    def test_transaction_commits_and_rolls_back(self, mock_driver):
+        mock_session = MagicMock()
+        mock_driver.return_value.session.return_value.__enter__.return_value = mock_session
+        mock_tx = mock_session.begin_transaction.return_value
+        write = MagicMock()
+
+        conn = Neo4jConnection()
+        with conn.transaction():
+            conn.query("CREATE (n)")
+            conn.execute_write(write, 1)
+        mock_tx.run.assert_called_once_with("CREATE (n)", None)
+        write.assert_called_once_with(mock_tx, 1)
+        mock_tx.commit.assert_called_once()
+
+        with self.assertRaises(ValueError):
+            with conn.transaction():
+                raise ValueError("boom")
+        mock_tx.rollback.assert_called_once()
+
 if __name__ == "__main__":
-    unittest.main()
\ No newline at end of file
+    unittest.main()
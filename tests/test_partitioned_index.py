@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from src.retriever.metadata_filters import make_filters, filters_key, document_matches, law_id_matches
+from src.retriever.partitioned_index import PartitionedIndex, partition_key, partitions_dir, DOCUMENT_ROWS_QUERY
+from src.retriever.vector_index import load_index
+
+def make_records(rows):
+    return [
+        {"law_id": law_id, "l.text": text, "l.embedding": embedding, "embedded_at": embedded_at}
+        for law_id, text, embedding, embedded_at in rows
+    ]
+
+class TestMetadataFilters(unittest.TestCase):
+    def test_empty_filters_are_none(self):
+        self.assertIsNone(make_filters())
+        self.assertIsNone(make_filters(books=[], sources=[]))
+        self.assertIsNone(filters_key(None))
+
+    def test_document_matches(self):
+        filters = make_filters(books=["CivilLaw"], year_from=2000, year_to=2010)
+        self.assertTrue(document_matches("CivilLaw_2005_Gazette", filters))
+        self.assertFalse(document_matches("CivilLaw_2015_Gazette", filters))
+        self.assertFalse(document_matches("PenalCode_2005_Gazette", filters))
+        self.assertFalse(document_matches("CivilLaw_undated_Gazette", filters))
+        self.assertTrue(law_id_matches("CivilLaw_2005_Gazette#4.2", filters))
+        self.assertFalse(law_id_matches("4.2", filters))
+        self.assertTrue(law_id_matches("4.2", None))
+
+    def test_filters_key_ignores_order(self):
+        self.assertEqual(
+            filters_key(make_filters(books=["B", "A"])), filters_key(make_filters(books=["A", "B"]))
+        )
+
+class TestPartitionedIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = PartitionedIndex("flat")
+        self.index.rebuild(make_records([
+            ("CivilLaw_2010_A#1", "Contracts", [1, 0, 0], 10),
+            ("CivilLaw_2010_A#2", "Offer", [0.9, 0.1, 0], 11),
+            ("PenalCode_2020_B#1", "Theft", [0.8, 0, 0.2], 12),
+            ("PenalCode_2020_B#2", "Fraud", [0, 0, 1], 13),
+        ]))
+
+    def test_partition_key(self):
+        self.assertEqual(partition_key("CivilLaw_2010_A#4.2"), "CivilLaw_2010_A")
+
+    def test_search_merges_partitions(self):
+        results = self.index.search([1, 0, 0], top_k=3)
+        self.assertEqual(
+            [law_id for _, law_id, _ in results], ["CivilLaw_2010_A#1", "CivilLaw_2010_A#2", "PenalCode_2020_B#1"]
+        )
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.watermark, 13)
+
+    def test_filtered_search_only_uses_matching_partitions(self):
+        filters = make_filters(year_from=2015)
+        results = self.index.search([1, 0, 0], top_k=3, filters=filters)
+        self.assertEqual([law_id for _, law_id, _ in results], ["PenalCode_2020_B#1", "PenalCode_2020_B#2"])
+        self.assertEqual(self.index.size(filters), 2)
+
+    def test_refresh_only_touches_new_partition(self):
+        conn = MagicMock()
+        conn.query.side_effect = [
+            make_records([("FamilyLaw_2021_C#1", "Dower", [0, 1, 0], 20)]),
+            [{"total": 5}],
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.npz")
+            self.index.save(path)
+            civil_path = os.path.join(partitions_dir(path), "CivilLaw_2010_A.npz")
+            saved_at = os.path.getmtime(civil_path)
+            os.utime(civil_path, (saved_at - 100, saved_at - 100))
+
+            self.assertEqual(self.index.refresh(conn), 1)
+            self.index.save(path)
+
+            self.assertEqual(os.path.getmtime(civil_path), saved_at - 100)
+            loaded = load_index(path, partitioned=True)
+        self.assertIsInstance(loaded, PartitionedIndex)
+        self.assertEqual(sorted(loaded.partitions), ["CivilLaw_2010_A", "FamilyLaw_2021_C", "PenalCode_2020_B"])
+        self.assertEqual(loaded.watermark, 20)
+        self.assertEqual(loaded.search([0, 1, 0], 1)[0][1], "FamilyLaw_2021_C#1")
+
+    def test_refresh_rebuilds_only_out_of_sync_partition(self):
+        conn = MagicMock()
+        conn.query.side_effect = [
+            [],
+            [{"total": 3}],
+            [{"document": "CivilLaw_2010_A", "total": 2}, {"document": "PenalCode_2020_B", "total": 1}],
+            make_records([("PenalCode_2020_B#1", "Theft", [0.8, 0, 0.2], 12)]),
+        ]
+        civil = self.index.partitions["CivilLaw_2010_A"]
+
+        self.index.refresh(conn)
+
+        self.assertIs(self.index.partitions["CivilLaw_2010_A"], civil)
+        self.assertEqual(self.index.partitions["PenalCode_2020_B"].ids, ["PenalCode_2020_B#1"])
+        query, = conn.query.call_args.args
+        self.assertEqual(query, DOCUMENT_ROWS_QUERY)
+        self.assertEqual(conn.query.call_args.kwargs["parameters"], {"book": "PenalCode", "year": "2020", "source": "B"})
+
+    def test_refreshing_a_copy_leaves_the_served_index_unchanged(self):
+        partitions = self.index.partitions
+        civil = partitions["CivilLaw_2010_A"]
+        copy = self.index.copy()
+        copy._upsert_records(make_records([("CivilLaw_2010_A#3", "Acceptance", [0, 1, 0], 30)]))
+        copy.drop_partition("PenalCode_2020_B")
+
+        self.assertIs(self.index.partitions, partitions)
+        self.assertEqual(sorted(partitions), ["CivilLaw_2010_A", "PenalCode_2020_B"])
+        self.assertEqual(civil.ids, ["CivilLaw_2010_A#1", "CivilLaw_2010_A#2"])
+        self.assertEqual(len(civil.vectors), 2)
+        self.assertEqual(copy.partitions["CivilLaw_2010_A"].ids[-1], "CivilLaw_2010_A#3")
+        self.assertEqual(list(copy.partitions), ["CivilLaw_2010_A"])
+
+    def test_dropped_partition_is_removed_on_save(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.npz")
+            self.index.save(path)
+            self.index.drop_partition("PenalCode_2020_B")
+            self.index.save(path)
+            self.assertEqual(os.listdir(partitions_dir(path)).count("PenalCode_2020_B.npz"), 0)
+            self.assertEqual(list(load_index(path).partitions), ["CivilLaw_2010_A"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import gc
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.retriever.quantized_index import (
+    Float16Index, Int8Index, FullPrecisionStore, quantize_int8, full_precision_path
+)
+from src.retriever.vector_index import FlatIndex, load_index
+
+def random_vectors(rows=500, dim=32, seed=0):
+    return np.random.default_rng(seed).standard_normal((rows, dim)).astype(np.float32)
+
+class TestQuantizedIndex(unittest.TestCase):
+    def setUp(self):
+        self.vectors = random_vectors()
+        self.ids = [str(i) for i in range(len(self.vectors))]
+        self.texts = [f"Law {i}" for i in range(len(self.vectors))]
+        self.flat = FlatIndex(self.ids, self.texts, self.vectors)
+        self.queries = random_vectors(rows=20, seed=1)
+
+    def test_quantize_int8_round_trip(self):
+        codes, scales = quantize_int8(self.vectors)
+        self.assertEqual(codes.dtype, np.int8)
+        np.testing.assert_allclose(codes * scales[:, None], self.vectors, atol=float(scales.max()))
+
+    def test_rescoring_matches_exact_search(self):
+        for index_class in (Float16Index, Int8Index):
+            index = index_class(self.ids, self.texts, self.vectors, rescore_factor=4)
+            for query in self.queries:
+                expected = self.flat.search(query, 5)
+                found = index.search(query, 5)
+                self.assertEqual([n for _, n, _ in found], [n for _, n, _ in expected])
+                self.assertAlmostEqual(found[0][0], expected[0][0], places=5)
+
+    def test_memory_usage(self):
+        # 32 dims: the per-row float32 scale costs 4 of every 128 bytes
+        self.assertAlmostEqual(Float16Index(self.ids, self.texts, self.vectors).memory_usage()["saving"], 0.46875)
+        self.assertAlmostEqual(Int8Index(self.ids, self.texts, self.vectors).memory_usage()["saving"], 0.71875)
+
+    def test_full_precision_rows_are_not_resident(self):
+        for index in (Int8Index(self.ids, self.texts, self.vectors), Int8Index()):
+            if not len(index):
+                index.rebuild([
+                    {"law_id": law_id, "l.text": text, "l.embedding": vector, "embedded_at": 1}
+                    for law_id, text, vector in zip(self.ids, self.texts, self.vectors)
+                ])
+            self.assertIsInstance(index.vectors, np.memmap)
+            usage = index.memory_usage()
+            self.assertEqual(usage["full_precision_bytes"], 0)
+            self.assertEqual(usage["resident_bytes"], index.codes.nbytes + index.scales.nbytes)
+
+    def test_store_appends_in_place_and_removes_scratch_file(self):
+        store = FullPrecisionStore.create(4)
+        store.append(np.ones((2, 4), dtype=np.float32))
+        store.append(np.full((1, 4), 2, dtype=np.float32))
+        store.write_rows([0], np.zeros((1, 4), dtype=np.float32))
+        path = store.path
+        np.testing.assert_array_equal(np.load(path), [[0] * 4, [1] * 4, [2] * 4])
+        del store
+        gc.collect()
+        self.assertFalse(os.path.exists(path))
+
+    def test_shared_store_copies_on_write(self):
+        store = FullPrecisionStore.create(4)
+        store.append(np.ones((2, 4), dtype=np.float32))
+        shared = store.share()
+        shared.write_rows([0], np.zeros((1, 4), dtype=np.float32))
+        shared.append(np.full((1, 4), 2, dtype=np.float32))
+        store.append(np.full((1, 4), 3, dtype=np.float32))
+
+        self.assertEqual((store.rows, shared.rows), (3, 3))
+        self.assertNotEqual(store.path, shared.path)
+        np.testing.assert_array_equal(store.vectors(), [[1] * 4, [1] * 4, [3] * 4])
+        np.testing.assert_array_equal(shared.vectors(), [[0] * 4, [1] * 4, [2] * 4])
+
+        # The file both handles started from lives until neither uses it
+        first = store.share()
+        path = first.path
+        del store
+        gc.collect()
+        self.assertTrue(os.path.exists(path))
+        np.testing.assert_array_equal(first.vectors()[2], [3] * 4)
+        del first
+        gc.collect()
+        self.assertFalse(os.path.exists(path))
+
+    def test_updating_a_copy_leaves_the_original_unchanged(self):
+        for index_class in (Float16Index, Int8Index):
+            index = index_class(self.ids[:10], self.texts[:10], self.vectors[:10])
+            vectors, codes, scales = np.array(index.vectors), index.codes.copy(), index.scales.copy()
+            expected = index.search(self.queries[0], 3)
+
+            copy = index.copy()
+            copy.upsert(["3", "new"], ["Changed", "New"], self.queries[:2])
+
+            self.assertEqual(index.store.rows, 10)
+            self.assertEqual(len(index), 10)
+            np.testing.assert_array_equal(index.vectors, vectors)
+            np.testing.assert_array_equal(index.codes, codes)
+            np.testing.assert_array_equal(index.scales, scales)
+            self.assertEqual(index.search(self.queries[0], 3), expected)
+            self.assertEqual(copy.store.rows, 11)
+            self.assertEqual(copy.search(self.queries[0], 1)[0][1], "3")
+
+    def test_upsert_encodes_new_rows(self):
+        index = Int8Index()
+        index.upsert(["1", "2"], ["a", "b"], [[1, 0], [0, 1]])
+        index.upsert(["3"], ["c"], [[1, 1]])
+        self.assertEqual(index.codes.shape, (3, 2))
+        self.assertEqual(index.search([1, 1], 1)[0][1], "3")
+
+    def test_save_and_load_memory_maps_full_precision(self):
+        index = Int8Index(self.ids, self.texts, self.vectors)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.npz")
+            index.save(path)
+            self.assertTrue(os.path.exists(full_precision_path(path)))
+            loaded = load_index(path)
+            self.assertIsInstance(loaded, Int8Index)
+            self.assertIsInstance(loaded.vectors, np.memmap)
+            self.assertEqual(loaded.search(self.queries[0], 5), index.search(self.queries[0], 5))
+            loaded.upsert(["new"], ["New law"], [self.queries[0]])
+            self.assertEqual(loaded.search(self.queries[0], 1)[0][1], "new")
+            # The saved sidecar is copied on write, and replaced only by the next save
+            self.assertEqual(np.load(full_precision_path(path)).shape, self.vectors.shape)
+            loaded.save(path)
+            self.assertEqual(np.load(full_precision_path(path)).shape, (len(self.vectors) + 1, self.vectors.shape[1]))
+            self.assertEqual(load_index(path).search(self.queries[0], 1)[0][1], "new")
+            del loaded
+
+if __name__ == '__main__':
+    unittest.main()
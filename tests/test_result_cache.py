@@ -0,0 +1,46 @@
+import unittest
+from unittest.mock import patch
+from src.retriever.result_cache import ResultCache, normalize_query
+
+class TestResultCache(unittest.TestCase):
+    def test_normalize_query(self):
+        self.assertEqual(normalize_query("  Grounds for   DIVORCE "), "grounds for divorce")
+
+    def test_get_and_put(self):
+        cache = ResultCache(max_items=2)
+        cache.put(("q", 3), ["result"], version="v1")
+
+        self.assertEqual(cache.get(("q", 3), version="v1"), ["result"])
+        self.assertIsNone(cache.get(("q", 5), version="v1"))
+        self.assertEqual(cache.stats()["hits"], 1)
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_lru_eviction(self):
+        cache = ResultCache(max_items=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
+    def test_ttl_expiry(self):
+        cache = ResultCache(ttl_seconds=10)
+        with patch("src.retriever.result_cache.time.monotonic", return_value=100.0):
+            cache.put("a", 1)
+        with patch("src.retriever.result_cache.time.monotonic", return_value=105.0):
+            self.assertEqual(cache.get("a"), 1)
+        with patch("src.retriever.result_cache.time.monotonic", return_value=111.0):
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
+
+    def test_version_change_invalidates(self):
+        cache = ResultCache()
+        cache.put("a", 1, version="v1")
+
+        self.assertIsNone(cache.get("a", version="v2"))
+        self.assertEqual(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
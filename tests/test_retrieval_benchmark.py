@@ -0,0 +1,49 @@
+import unittest
+import numpy as np
+from benchmarks.retrieval_benchmark import run_benchmark, find_regressions, ENGINES
+from benchmarks.synthetic_corpus import generate_corpus, exact_top_k, FakeNeo4jConnection
+from src.database.law_keys import split_law_id
+from src.retriever.vector_index import build_index
+
+class TestSyntheticCorpus(unittest.TestCase):
+    def test_corpus_is_unique_and_normalized(self):
+        corpus = generate_corpus(500, dim=16, books=3)
+        self.assertEqual(len(set(corpus.ids)), 500)
+        self.assertEqual({split_law_id(law_id)[0] for law_id in corpus.ids}, {"Book1", "Book2", "Book3"})
+        np.testing.assert_allclose(np.linalg.norm(corpus.vectors, axis=1), 1.0, rtol=1e-5)
+
+    def test_exact_top_k_matches_argsort(self):
+        corpus = generate_corpus(300, dim=8)
+        queries = corpus.vectors[:4]
+        expected = np.argsort(-(queries @ corpus.vectors.T), axis=1)[:, :5]
+        np.testing.assert_array_equal(exact_top_k(corpus.vectors, queries, 5), expected)
+
+    def test_fake_connection_builds_index(self):
+        corpus = generate_corpus(100, dim=8)
+        index = build_index(FakeNeo4jConnection(corpus), "flat")
+        self.assertEqual(index.ids, corpus.ids)
+        self.assertEqual(index.search(corpus.vectors[7], 1)[0][1], corpus.ids[7])
+
+class TestRetrievalBenchmark(unittest.TestCase):
+    def test_exact_engines_have_full_recall(self):
+        report = run_benchmark([400], dim=16, queries=10, top_k=5, engines=("scan", "flat"))
+        self.assertEqual([row["engine"] for row in report["results"]], ["scan", "flat"])
+        for row in report["results"]:
+            self.assertEqual(row["recall"], 1.0)
+            self.assertGreater(row["qps"], 0)
+            self.assertLessEqual(row["p50_ms"], row["p99_ms"])
+
+    def test_scan_skipped_on_large_corpus(self):
+        report = run_benchmark([400], dim=16, queries=5, top_k=5, engines=ENGINES, scan_max_sections=100)
+        self.assertNotIn("scan", [row["engine"] for row in report["results"]])
+
+    def test_find_regressions(self):
+        row = {"sections": 1000, "engine": "ivf", "recall": 0.95, "p95_ms": 1.0, "index_bytes": 100}
+        baseline = {"results": [row]}
+        self.assertEqual(find_regressions(baseline, {"results": [dict(row, p95_ms=1.1)]}), [])
+        regressions = find_regressions(baseline, {"results": [dict(row, recall=0.9, p95_ms=2.0, index_bytes=200)]})
+        self.assertEqual(len(regressions), 3)
+        self.assertIn("recall 0.950 -> 0.900", regressions[0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from unittest.mock import patch
+from src.retriever.semantic_cache import SemanticCache
+
+class TestSemanticCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = SemanticCache(max_items=2, threshold=0.9, ttl_seconds=60)
+        self.results = [(0.9, "Book_2020_A#7", "Talaq")]
+
+    def test_near_duplicate_query_hits(self):
+        self.cache.put([1.0, 0.0, 0.0], self.results, key=3, version="v1", seconds=0.05)
+        self.assertEqual(self.cache.get([0.98, 0.1, 0.0], key=3, version="v1"), self.results)
+        self.assertIsNone(self.cache.get([0.5, 0.8, 0.0], key=3, version="v1"))
+        stats = self.cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["hit_rate"]), (1, 1, 0.5))
+        self.assertGreater(stats["saved_seconds"], 0.04)
+
+    def test_parameters_must_match(self):
+        self.cache.put([1.0, 0.0], self.results, key=(3, None))
+        self.assertIsNone(self.cache.get([1.0, 0.0], key=(5, None)))
+
+    def test_corpus_version_change_invalidates(self):
+        self.cache.put([1.0, 0.0], self.results, version="v1")
+        self.assertIsNone(self.cache.get([1.0, 0.0], version="v2"))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_least_recently_used_is_evicted(self):
+        self.cache.put([1.0, 0.0, 0.0], "first")
+        self.cache.put([0.0, 1.0, 0.0], "second")
+        self.cache.get([1.0, 0.0, 0.0])
+        self.cache.put([0.0, 0.0, 1.0], "third")
+        self.assertEqual(self.cache.get([1.0, 0.0, 0.0]), "first")
+        self.assertIsNone(self.cache.get([0.0, 1.0, 0.0]))
+        self.assertEqual(self.cache.get([0.0, 0.0, 1.0]), "third")
+
+    @patch('src.retriever.semantic_cache.time.monotonic')
+    def test_expired_entries_miss_and_free_their_slot(self, mock_monotonic):
+        mock_monotonic.return_value = 0.0
+        self.cache.put([1.0, 0.0], "old")
+        mock_monotonic.return_value = 61.0
+        self.assertIsNone(self.cache.get([1.0, 0.0]))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_disabled_cache_stores_nothing(self):
+        cache = SemanticCache(max_items=0)
+        self.assertFalse(cache.enabled)
+        cache.put([1.0, 0.0], self.results)
+        self.assertEqual(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
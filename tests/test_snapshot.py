@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+from src.retriever.snapshot import export_snapshot, load_snapshot, is_snapshot_fresh
+from src.retriever.vector_index import EMBEDDING_CORPUS_VERSION_QUERY
+
+def make_records(rows):
+    return [
+        {"law_id": number, "l.text": text, "l.embedding": embedding, "embedded_at": embedded_at}
+        for number, text, embedding, embedded_at in rows
+    ]
+
+class TestSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "snapshot.json")
+        self.conn = MagicMock()
+        self.conn.query.return_value = make_records([
+            ("1", "First law", [3.0, 4.0], 10),
+            ("2", "Second law", [0.0, 2.0], 20),
+        ])
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_export_and_load(self):
+        manifest = export_snapshot(self.conn, self.path)
+        self.assertEqual((manifest["total"], manifest["watermark"], manifest["dimensions"]), (2, 20, 2))
+
+        index = load_snapshot(self.path)
+        self.assertIsInstance(index.vectors, np.memmap)
+        np.testing.assert_allclose(index.vectors, [[0.6, 0.8], [0.0, 1.0]])
+        self.assertEqual(index.ids, ["1", "2"])
+        self.assertEqual(index.watermark, 20)
+        self.assertEqual(index.search([0, 1], 1)[0][1:], ("2", "Second law"))
+        # Copy-on-write mapping: refreshes may update rows without touching the file
+        index.upsert(["1"], ["First law amended"], [[1.0, 0.0]])
+        self.assertEqual(load_snapshot(self.path).search([1, 0], 1)[0][2], "First law")
+
+    def test_reexport_replaces_vectors_file(self):
+        export_snapshot(self.conn, self.path)
+        self.conn.query.return_value = make_records([("1", "First law", [1.0, 0.0], 30)])
+        export_snapshot(self.conn, self.path)
+
+        vectors_files = [name for name in os.listdir(self.tmp.name) if name.endswith(".npy")]
+        self.assertEqual(vectors_files, ["snapshot-1-30.npy"])
+        self.assertEqual(len(load_snapshot(self.path)), 1)
+
+    def test_export_without_embeddings(self):
+        self.conn.query.return_value = []
+        self.assertIsNone(export_snapshot(self.conn, self.path))
+        self.assertIsNone(load_snapshot(self.path))
+
+    def test_is_snapshot_fresh(self):
+        export_snapshot(self.conn, self.path)
+        index = load_snapshot(self.path)
+        version_conn = MagicMock()
+        version_conn.query.return_value = [{"total": 2, "watermark": 20}]
+        self.assertTrue(is_snapshot_fresh(index, version_conn))
+        version_conn.query.assert_called_once_with(EMBEDDING_CORPUS_VERSION_QUERY)
+        version_conn.query.return_value = [{"total": 3, "watermark": 25}]
+        self.assertFalse(is_snapshot_fresh(index, version_conn))
+
+if __name__ == '__main__':
+    unittest.main()
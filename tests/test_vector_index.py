@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+from src.retriever.vector_index import FlatIndex, build_index, load_index, normalize_rows
+
+def make_records(rows):
+    return [
+        {"law_id": number, "l.text": text, "l.embedding": embedding, "embedded_at": embedded_at}
+        for number, text, embedding, embedded_at in rows
+    ]
+
+class TestFlatIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = FlatIndex(
+            ids=["1", "2", "3", "4"],
+            texts=["First law", "Second law", "Third law", "Fourth law"],
+            vectors=[[0.9, 0.1, 0.1, 0.1], [0.1, 0.9, 0.1, 0.1], [0.1, 0.2, 0.3, 0.4], [0.4, 0.3, 0.2, 0.1]],
+        )
+
+    def test_normalize_rows_handles_zero_vectors(self):
+        normalized = normalize_rows([[3.0, 4.0], [0.0, 0.0]])
+        np.testing.assert_allclose(normalized, [[0.6, 0.8], [0.0, 0.0]])
+
+    def test_search_matches_brute_force(self):
+        query = [0.1, 0.2, 0.3, 0.4]
+        results = self.index.search(query, top_k=2)
+
+        self.assertEqual([number for _, number, _ in results], ["3", "4"])
+        self.assertAlmostEqual(results[0][0], 1.0, places=5)
+        self.assertEqual(results[0][2], "Third law")
+
+    def test_search_top_k_larger_than_index(self):
+        results = self.index.search([1, 0, 0, 0], top_k=10)
+        self.assertEqual(len(results), 4)
+        self.assertEqual(results[0][1], "1")
+
+    def test_upsert_overwrites_and_appends(self):
+        self.index.upsert(["2", "5"], ["Second law amended", "Fifth law"], [[0.1, 0.2, 0.3, 0.4], [0, 0, 0, 1]])
+
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(self.index.search([0, 0, 0, 1], top_k=1)[0][1], "5")
+        texts = {number: text for _, number, text in self.index.search([0.1, 0.2, 0.3, 0.4], top_k=5)}
+        self.assertEqual(texts["2"], "Second law amended")
+
+    def test_save_and_load_roundtrip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "index.npz")
+            self.index.watermark = 42
+            self.index.save(path)
+            loaded = load_index(path)
+
+        self.assertEqual(loaded.ids, self.index.ids)
+        self.assertEqual(loaded.watermark, 42)
+        self.assertEqual(loaded.search([0.1, 0.2, 0.3, 0.4], 2), self.index.search([0.1, 0.2, 0.3, 0.4], 2))
+
+    def test_load_index_missing_file(self):
+        self.assertIsNone(load_index("/nonexistent/index.npz"))
+
+    def test_refresh_is_incremental(self):
+        conn = MagicMock()
+        self.index.watermark = 100
+        conn.query.side_effect = [
+            make_records([("5", "Fifth law", [0, 0, 0, 1], 150)]),
+            [{"total": 5}],
+        ]
+
+        written = self.index.refresh(conn)
+
+        self.assertEqual(written, 1)
+        self.assertEqual(self.index.watermark, 150)
+        args, kwargs = conn.query.call_args_list[0]
+        self.assertEqual(kwargs["parameters"], {"since": 100})
+
+    def test_refresh_rebuilds_when_out_of_sync(self):
+        conn = MagicMock()
+        conn.query.side_effect = [
+            [],
+            [{"total": 1}],
+            make_records([("1", "First law", [1, 0, 0, 0], 10)]),
+        ]
+
+        self.index.refresh(conn)
+
+        self.assertEqual(self.index.ids, ["1"])
+        self.assertEqual(self.index.watermark, 10)
+
+    def test_build_index(self):
+        conn = MagicMock()
+        conn.query.return_value = make_records([
+            ("1", "First law", [1, 0], 5),
+            ("2", "Second law", [0, 1], 7),
+        ])
+
+        index = build_index(conn)
+
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.watermark, 7)
+        self.assertEqual(index.search([0, 1], 1)[0][1], "2")
+
+if __name__ == '__main__':
+    unittest.main()